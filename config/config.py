@@ -6,20 +6,81 @@ LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
 
 import os
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 class Config:
     """Centralized configuration"""
+    _banner_printed = False
+
     def __init__(self):
         self.project_id = os.getenv("WATSONX_PROJECT_ID")
         self.api_key = os.getenv("WATSONX_API_KEY")
         self.url = os.getenv("WATSONX_URL")
         self.model_id = os.getenv("WATSONX_MODEL_ID")
-        print("\n" + "-" * 60)
-        print(f"LLM used from IBM watsonx ** '{self.model_id}' **")
-        print("-" * 60)
-        print("\n")
+        self.clause_index_path = os.getenv("LEGAL_CLAUSE_INDEX_PATH")
+        self.clause_index_max_entries = int(os.getenv("LEGAL_CLAUSE_INDEX_MAX_ENTRIES", "10000"))
+        self.fraud_prescoring_enabled = os.getenv("FRAUD_PRESCORING_ENABLED", "true").lower() == "true"
+        self.fraud_auto_approve_below = float(os.getenv("FRAUD_AUTO_APPROVE_BELOW", "0.15"))
+        self.fraud_auto_flag_above = float(os.getenv("FRAUD_AUTO_FLAG_ABOVE", "0.6"))
+        self.order_checkpoint_db = os.getenv("LANGGRAPH_CHECKPOINT_DB")
+        # Off by default: like the original graph, in-stock orders ship even when validation flags them
+        self.order_require_valid_to_ship = os.getenv("ORDER_REQUIRE_VALID_TO_SHIP", "false").lower() == "true"
+        self.shipping_report_mode = os.getenv("SHIPPING_REPORT_MODE", "template").lower()
+        self.shipping_personalization_rate = float(os.getenv("SHIPPING_PERSONALIZATION_RATE", "0.0"))
+        # Shared watsonx quota across all frameworks in the process; 0 disables the RPM/TPM bucket
+        self.llm_requests_per_minute = float(os.getenv("WATSONX_REQUESTS_PER_MINUTE", "0"))
+        self.llm_tokens_per_minute = float(os.getenv("WATSONX_TOKENS_PER_MINUTE", "0"))
+        self.llm_max_concurrency = int(os.getenv("WATSONX_MAX_CONCURRENCY", "16"))
+        self.llm_max_retries = int(os.getenv("WATSONX_MAX_RETRIES", "5"))
+        # Per-attempt timeout and optional hedging (a duplicate request after the observed p95 latency)
+        self.llm_call_timeout_s = float(os.getenv("WATSONX_CALL_TIMEOUT_S", "60"))
+        self.llm_hedging_enabled = os.getenv("WATSONX_HEDGING_ENABLED", "false").lower() == "true"
+        self.llm_hedge_max_fraction = float(os.getenv("WATSONX_HEDGE_MAX_FRACTION", "0.05"))
+        # End-to-end budgets; every LLM call inside a run gets at most what is left of its workflow's budget
+        self.order_deadline_s = float(os.getenv("ORDER_DEADLINE_S", "60"))
+        self.legal_analysis_deadline_s = float(os.getenv("LEGAL_ANALYSIS_DEADLINE_S", "180"))
+        self.research_deadline_s = float(os.getenv("RESEARCH_DEADLINE_S", "180"))
+        self.financial_analysis_deadline_s = float(os.getenv("FINANCIAL_ANALYSIS_DEADLINE_S", "300"))
+        self.content_creation_deadline_s = float(os.getenv("CONTENT_CREATION_DEADLINE_S", "600"))
+        # Model routing: model_id is the strong model; steps can be routed to a smaller, faster model
+        self.fast_model_id = os.getenv("WATSONX_FAST_MODEL_ID")
+        self.model_routes = os.getenv("WATSONX_MODEL_ROUTES", "")
+        self.auto_model_routing = os.getenv("WATSONX_AUTO_ROUTING", "false").lower() == "true"
+        self.auto_routing_max_prompt_chars = int(os.getenv("WATSONX_AUTO_ROUTING_MAX_PROMPT_CHARS", "1500"))
+        # HTTP service (service/http_service.py)
+        self.service_host = os.getenv("SERVICE_HOST", "127.0.0.1")
+        self.service_port = int(os.getenv("SERVICE_PORT", "8080"))
+        self.service_max_in_flight = int(os.getenv("SERVICE_MAX_IN_FLIGHT", "64"))
+        self.service_max_queue = int(os.getenv("SERVICE_MAX_QUEUE", "256"))
+        self.service_queue_timeout_s = float(os.getenv("SERVICE_QUEUE_TIMEOUT_S", "10"))
+        self.service_thread_pool_size = int(os.getenv("SERVICE_THREAD_POOL_SIZE", "8"))
+        # Tracing (utils/tracing.py): spans go to a local JSONL file or an OTLP/HTTP collector
+        self.tracing_enabled = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+        self.tracing_sample_rate = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+        self.tracing_exporter = os.getenv("TRACING_EXPORTER", "jsonl").lower()
+        self.tracing_jsonl_path = os.getenv("TRACING_JSONL_PATH", "traces.jsonl")
+        self.tracing_otlp_endpoint = os.getenv("TRACING_OTLP_ENDPOINT", "http://127.0.0.1:4318/v1/traces")
+        # Startup (utils/runtime.py): optional warm-up call per framework and its time limit
+        self.startup_warm_up = os.getenv("STARTUP_WARM_UP", "false").lower() == "true"
+        self.startup_warm_up_timeout_s = float(os.getenv("STARTUP_WARM_UP_TIMEOUT_S", "30"))
+        # Prompt budgets (utils/prompt_budget.py): a prompt over its budget is logged and, with "trim", cut to fit
+        self.prompt_context_window_tokens = int(os.getenv("PROMPT_CONTEXT_WINDOW_TOKENS", "8192"))
+        self.prompt_output_reserve_tokens = int(os.getenv("PROMPT_OUTPUT_RESERVE_TOKENS", "1024"))
+        self.prompt_token_budgets = os.getenv("PROMPT_TOKEN_BUDGETS", "")
+        self.prompt_overflow_policy = os.getenv("PROMPT_OVERFLOW_POLICY", "trim").lower()
+        # Memory profiling (utils/memory_profiler.py): tracemalloc per workflow call plus periodic RSS samples
+        self.memory_profiling_enabled = os.getenv("MEMORY_PROFILING_ENABLED", "false").lower() == "true"
+        self.memory_profiling_frames = int(os.getenv("MEMORY_PROFILING_FRAMES", "1"))
+        self.memory_rss_sample_interval_s = float(os.getenv("MEMORY_RSS_SAMPLE_INTERVAL_S", "5"))
+        # The banner is printed once per process, however many Config objects are created
+        if not Config._banner_printed:
+            Config._banner_printed = True
+            print("\n" + "-" * 60)
+            print(f"LLM used from IBM watsonx ** '{self.model_id}' **")
+            print("-" * 60)
+            print("\n")
 
     def validate(self) -> bool:
         """Validate configuration"""
@@ -32,8 +93,23 @@ class Config:
         if not is_valid:
             logger.warning("Configuration not fully set. Please ensure project_id, api_key, url, and model_id are correctly configured.")
         return is_valid
+
+
+_shared_config = None
+_shared_config_lock = threading.Lock()
+
+
+def get_config() -> Config:
+    """The process-wide Config, loaded from the environment on first use."""
+    global _shared_config
+    with _shared_config_lock:
+        if _shared_config is None:
+            _shared_config = Config()
+        return _shared_config
+
+
 if __name__ == "__main__":
-    config = Config()
+    config = get_config()
     print(f"Project ID: {config.project_id}")
     print(f"API Key (first 5 chars): {config.api_key[:5]}...")
     print(f"URL: {config.url}")
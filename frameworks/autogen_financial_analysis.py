@@ -5,40 +5,86 @@ File Name: frameworks/autogen_financial_analysis.py
 LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
 """
 
+import time
 import asyncio
 import logging
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.conditions import TextMentionTermination, MaxMessageTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.messages import TextMessage
+from autogen_agentchat.base import TaskResult
+from autogen_core.models import UserMessage
 from autogen_watsonx_client.config import WatsonxClientConfiguration
 from autogen_watsonx_client.client import WatsonXChatCompletionClient
 
-from config.config import Config
+from config.config import Config, get_config
 from utils.common_utils import extract_json_from_text
+from utils.deadlines import deadline
+from utils.model_router import ModelRouter, STRONG, WARM_UP_PROMPT
+from utils.prompt_budget import PromptBudget
+from utils.rate_limiter import estimate_tokens, get_shared_rate_limiter
+from utils.tracing import AGENT, LLM, SERVER, get_tracer
 
 logger = logging.getLogger(__name__)
 
+AUTOGEN_AGENTS = ("FinancialAnalyst", "InvestmentStrategist")
+
+
+def _create_result_tokens(result) -> Optional[int]:
+    usage = getattr(result, "usage", None)
+    return (usage.prompt_tokens + usage.completion_tokens) if usage else None
+
+
+class ManagedWatsonXChatCompletionClient(WatsonXChatCompletionClient):
+    """WatsonX completion client whose calls go through the shared AdaptiveRateLimiter."""
+    route_recorder = None
+
+    async def create(self, messages, *args, **kwargs):
+        parent_create = super().create
+        started_at = time.perf_counter()
+        with get_tracer().span("autogen.llm", LLM) as span:
+            result = await get_shared_rate_limiter().acall(
+                lambda: parent_create(messages, *args, **kwargs),
+                estimated_tokens=estimate_tokens(messages), name="autogen", usage=_create_result_tokens,
+            )
+            span.set_attribute("tokens", _create_result_tokens(result))
+        if self.route_recorder:
+            self.route_recorder(time.perf_counter() - started_at, _create_result_tokens(result))
+        return result
+
+    async def create_stream(self, messages, *args, **kwargs):
+        async with get_shared_rate_limiter().aslot(estimate_tokens(messages), name="autogen_stream"):
+            async for chunk in super().create_stream(messages, *args, **kwargs):
+                yield chunk
+
+
 class AutoGenFinancialAnalyzer:
     """AutoGen-based financial data analyzer"""
     def __init__(self, config: Config):
         self.config = config
         self.watsonx_client = None
+        self.router = None
+        self.prompt_budget = PromptBudget.from_config(self.config, "financial")
         self._setup_client()
 
+    def _client_for(self, model_id: str) -> ManagedWatsonXChatCompletionClient:
+        wx_config = WatsonxClientConfiguration(
+            project_id=self.config.project_id,
+            url=self.config.url,
+            api_key=self.config.api_key,
+            model_id=model_id
+        )
+        return ManagedWatsonXChatCompletionClient(**wx_config)
+
     def _setup_client(self):
         """Setup AutoGen Watsonx client"""
         try:
-            wx_config = WatsonxClientConfiguration(
-                project_id=self.config.project_id,
-                url=self.config.url,
-                api_key=self.config.api_key,
-                model_id=self.config.model_id
-            )
-            self.watsonx_client = WatsonXChatCompletionClient(**wx_config)
+            self.watsonx_client = self._client_for(self.config.model_id)
+            # Each agent gets the model routed to it (strong = Config.model_id), see utils/model_router.py
+            self.router = ModelRouter.from_config(self.config, "financial", self._client_for, low_stakes_steps=("FinancialAnalyst",))
             logger.info("AutoGen Watsonx client initialized successfully for financial analysis.")
         except ImportError as e:
             logger.error(f"AutoGen dependencies not installed: {e}. Please install 'autogen-agentchat' and 'autogen-watsonx-client'.")
@@ -50,6 +96,33 @@ class AutoGenFinancialAnalyzer:
         if not self.watsonx_client:
             return {"error": "AutoGen client not available", "framework": "autogen"}
 
+        routes = {agent: self.router.route(agent) for agent in AUTOGEN_AGENTS}
+        with get_tracer().span("financial.analyze_stock", SERVER, {"company": company_data.get("name")}) as span:
+            result = await self._run_analysis(company_data, routes)
+            # A recommendation without parseable JSON from a non-strong strategist is retried on the strong model
+            if result.get("note") and routes["InvestmentStrategist"] != STRONG:
+                self.router.escalated("InvestmentStrategist", "no JSON recommendation")
+                span.set_attribute("escalated", True)
+                result = await self._run_analysis(company_data, {**routes, "InvestmentStrategist": STRONG})
+        return result
+
+    async def warm_up(self):
+        """Sends one tiny prompt to every model the router can pick, so auth and connections are ready before traffic."""
+        if not self.watsonx_client:
+            raise RuntimeError("AutoGen client not available")
+        await asyncio.gather(*(self.router.model(route).create([UserMessage(content=WARM_UP_PROMPT, source="user")])
+                               for route in self.router.warm_up_routes()))
+
+    def routing_report(self) -> Dict[str, Any]:
+        """Calls, latency and tokens per agent and model route, with the savings from fast-model routing."""
+        return self.router.report() if self.router else {}
+
+    def prompt_report(self) -> Dict[str, Any]:
+        """Estimated prompt tokens, overflows and trims per prompt (see utils/prompt_budget.py)."""
+        return self.prompt_budget.report()
+
+    async def _run_analysis(self, company_data: Dict[str, Any], routes: Dict[str, str]) -> Dict[str, Any]:
+        """Runs the analyst/strategist team with the given model route per agent."""
         try:
             company_name = company_data.get("name", "a company")
             financial_data = company_data.get("financials", {})
@@ -58,7 +131,7 @@ class AutoGenFinancialAnalyzer:
             # Create agents with more specific instructions
             analyst_agent = AssistantAgent(
                 name="FinancialAnalyst",
-                model_client=self.watsonx_client,
+                model_client=self.router.step_model("FinancialAnalyst", routes["FinancialAnalyst"]),
                 system_message=f"""You are a skilled financial analyst. Analyze the provided financial data for {company_name} and provide:
 1. Revenue and profitability assessment
 2. Financial health indicators
@@ -70,7 +143,7 @@ Keep your analysis concise but comprehensive. End your response by saying 'Analy
 
             strategist_agent = AssistantAgent(
                 name="InvestmentStrategist",
-                model_client=self.watsonx_client,
+                model_client=self.router.step_model("InvestmentStrategist", routes["InvestmentStrategist"]),
                 system_message=f"""You are an expert investment strategist. Based on the financial analyst's report, provide your investment recommendation.
 
 You MUST format your final response as a valid JSON object with this exact structure:
@@ -94,20 +167,33 @@ After providing the JSON, write 'ANALYSIS_COMPLETE' to signal completion."""
                 [analyst_agent, strategist_agent],
                 termination_condition=termination_conditions[0] 
             )
-            prompt = f"""
+            prompt = self.prompt_budget.render("task", """
 Please analyze the following financial data for {company_name}:
 
 Financial Metrics:
-{json.dumps(financial_data, indent=2)}
+{financial_data}
 
 Recent News Sentiment: {news_sentiment}
 
 FinancialAnalyst: Please provide your analysis first.
 InvestmentStrategist: Then provide your investment strategy recommendation in the specified JSON format.
-"""
+""", trimmable=("financial_data", "news_sentiment"), company_name=company_name, financial_data=financial_data,
+                news_sentiment=news_sentiment)
 
             logger.info(f"AutoGen: Starting analysis for {company_name}...")
-            task_result = await team.run(task=prompt)
+            task_result = None
+            with deadline(self.config.financial_analysis_deadline_s):
+                # Streaming the run lets each agent message close a span for the step that produced it
+                step_started_ns = time.time_ns()
+                async for item in team.run_stream(task=prompt):
+                    if isinstance(item, TaskResult):
+                        task_result = item
+                        continue
+                    now_ns = time.time_ns()
+                    if getattr(item, "source", "user") != "user":
+                        get_tracer().record("autogen.agent_step", step_started_ns, now_ns, AGENT,
+                                            {"agent": item.source, "message_type": type(item).__name__})
+                    step_started_ns = now_ns
             
             print("##############")
             print(f'Task completed. Message count: {len(task_result.messages)}')
@@ -176,7 +262,7 @@ async def main():
     print("📈 AUTOGEN FINANCIAL ANALYSIS SHOWCASE")
     print("=" * 60)
 
-    config = Config()
+    config = get_config()
     if not config.validate():
         print("Watsonx configuration is invalid. Please set environment variables or update watsonx_config.py.")
         return
@@ -5,20 +5,73 @@ File Name: frameworks/beeai_research_assistant.py
 LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
 """
 
+import time
 import asyncio
 import logging
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from beeai_framework.agents.react import ReActAgent
 from beeai_framework.adapters.watsonx import WatsonxChatModel 
+from beeai_framework.backend.message import UserMessage
 from beeai_framework.memory.token_memory import TokenMemory
 from beeai_framework.tools.search.wikipedia import WikipediaTool
-from config.config import Config
+from config.config import Config, get_config
+from utils.deadlines import deadline
+from utils.model_router import ModelRouter, WARM_UP_PROMPT
+from utils.rate_limiter import estimate_tokens, get_shared_rate_limiter
+from utils.tracing import LLM, SERVER, TOOL, get_tracer
 
 
 logger = logging.getLogger(__name__)
 BEEAI_AVAILABLE = True
 
+
+def _chat_output_tokens(output) -> Optional[int]:
+    usage = getattr(output, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage else None
+
+
+class ManagedWatsonxChatModel(WatsonxChatModel):
+    """WatsonxChatModel whose completions go through the shared AdaptiveRateLimiter."""
+    route_recorder = None
+
+    async def _create(self, input, run):
+        parent_create = super()._create
+        started_at = time.perf_counter()
+        with get_tracer().span("beeai.llm", LLM, {"model": getattr(self, "model_id", None)}) as span:
+            output = await get_shared_rate_limiter().acall(
+                lambda: parent_create(input, run),
+                estimated_tokens=estimate_tokens(input.messages), name="beeai", usage=_chat_output_tokens,
+            )
+            span.set_attribute("tokens", _chat_output_tokens(output))
+        if self.route_recorder:
+            self.route_recorder(time.perf_counter() - started_at, _chat_output_tokens(output))
+        return output
+
+    async def _create_stream(self, input, run):
+        async with get_shared_rate_limiter().aslot(estimate_tokens(input.messages), name="beeai_stream"):
+            async for chunk in super()._create_stream(input, run):
+                yield chunk
+
+
+class TracedWikipediaTool(WikipediaTool):
+    """WikipediaTool whose searches are recorded as tool spans."""
+
+    async def _run(self, *args, **kwargs):
+        with get_tracer().span("beeai.tool.wikipedia", TOOL):
+            return await super()._run(*args, **kwargs)
+
+
+def research_router(config: Config) -> ModelRouter:
+    """Routes the research agent's model (strong = Config.model_id), see utils/model_router.py."""
+    return ModelRouter.from_config(config, "research", lambda model_id: ManagedWatsonxChatModel(
+        api_key=config.api_key,
+        project_id=config.project_id,
+        model=model_id,
+        url=config.url,
+    ))
+
+
 class BeeAIResearchAssistant:
     """BeeAI-based research assistant with tool usage."""
     
@@ -26,6 +79,7 @@ class BeeAIResearchAssistant:
         self.config = config
         self.agent = None
         self.llm = None
+        self.router = None
         self._setup_agent()
 
     def _setup_agent(self):
@@ -35,15 +89,11 @@ class BeeAIResearchAssistant:
             return
 
         try:
-            self.llm = WatsonxChatModel(
-                api_key=self.config.api_key,
-                project_id=self.config.project_id,
-                model=self.config.model_id,
-                url=self.config.url,
-            )
+            self.router = research_router(self.config)
+            self.llm = self.router.step_model("agent")
             
             memory = TokenMemory(llm=self.llm)
-            wikipedia_tool = WikipediaTool()
+            wikipedia_tool = TracedWikipediaTool()
             self.agent = ReActAgent(
                 llm=self.llm, 
                 memory=memory, 
@@ -55,6 +105,17 @@ class BeeAIResearchAssistant:
             logger.error(f"Error setting up BeeAI agent: {e}")
             self.agent = None
 
+    async def warm_up(self):
+        """Sends one tiny prompt to every model the router can pick, so auth and connections are ready before traffic."""
+        if not self.agent:
+            raise RuntimeError("BeeAI agent not available")
+        await asyncio.gather(*(self.router.model(route).create(messages=[UserMessage(WARM_UP_PROMPT)])
+                               for route in self.router.warm_up_routes()))
+
+    def routing_report(self) -> Dict[str, Any]:
+        """Calls, latency and tokens per agent and model route, with the savings from fast-model routing."""
+        return self.router.report() if self.router else {}
+
     async def get_research_answer(self, query: str) -> Dict[str, Any]:
         """Gets an answer to a research query using BeeAI agent and its tools."""
         if not self.agent:
@@ -62,7 +123,8 @@ class BeeAIResearchAssistant:
 
         try:
             logger.info(f"BeeAI: Answering research query: '{query}'")
-            result = await self.agent.run(prompt=query)
+            with get_tracer().span("research.answer", SERVER, {"framework": "beeai"}), deadline(self.config.research_deadline_s):
+                result = await self.agent.run(prompt=query)
             answer_text = self._extract_result(result)
 
             return {
@@ -116,6 +178,7 @@ class BeeAIResearchAssistantFallback:
         self.config = config
         self.agent = None
         self.llm = None
+        self.router = None
         self._setup_agent()
 
     def _setup_agent(self):
@@ -125,13 +188,9 @@ class BeeAIResearchAssistantFallback:
             return
 
         try:
-            # Create WatsonxChatModel directly
-            self.llm = WatsonxChatModel(
-                api_key=self.config.api_key,
-                project_id=self.config.project_id,
-                model=self.config.model_id,
-                url=self.config.url,
-            )
+            # Create the (routed) WatsonxChatModel directly
+            self.router = research_router(self.config)
+            self.llm = self.router.step_model("agent")
             memory = TokenMemory(llm=self.llm)
             self.agent = ReActAgent(
                 llm=self.llm, 
@@ -144,6 +203,17 @@ class BeeAIResearchAssistantFallback:
             logger.error(f"Error setting up BeeAI agent: {e}")
             self.agent = None
 
+    async def warm_up(self):
+        """Sends one tiny prompt to every model the router can pick, so auth and connections are ready before traffic."""
+        if not self.agent:
+            raise RuntimeError("BeeAI agent not available")
+        await asyncio.gather(*(self.router.model(route).create(messages=[UserMessage(WARM_UP_PROMPT)])
+                               for route in self.router.warm_up_routes()))
+
+    def routing_report(self) -> Dict[str, Any]:
+        """Calls, latency and tokens per agent and model route, with the savings from fast-model routing."""
+        return self.router.report() if self.router else {}
+
     async def get_research_answer(self, query: str) -> Dict[str, Any]:
         """Gets an answer to a research query using BeeAI agent."""
         if not self.agent:
@@ -151,7 +221,8 @@ class BeeAIResearchAssistantFallback:
 
         try:
             logger.info(f"BeeAI (Fallback): Answering research query: '{query}'")
-            result = await self.agent.run(prompt=query)
+            with get_tracer().span("research.answer", SERVER, {"framework": "beeai_fallback"}), deadline(self.config.research_deadline_s):
+                result = await self.agent.run(prompt=query)
             answer_text = self._extract_result(result)
 
             return {
@@ -185,7 +256,7 @@ async def main():
     print("\n" + "=" * 60)
     print("📚 BEEAI RESEARCH ASSISTANT SHOWCASE")
     print("=" * 60)
-    config = Config()
+    config = get_config()
     if not config.validate():
         print("Watsonx configuration is invalid. Please set environment variables or update config.py.")
         return
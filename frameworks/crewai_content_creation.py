@@ -5,20 +5,44 @@ File Name: frameworks/crewai_content_creation.py
 LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
 """
 
+import time
+import asyncio
 import logging
 import json
 from typing import Dict, Any
 from crewai import Agent, Task, Crew, Process, LLM
-from config.config import Config
+from config.config import Config, get_config
+from utils.deadlines import deadline
+from utils.model_router import ModelRouter, WARM_UP_PROMPT
+from utils.rate_limiter import estimate_tokens, get_shared_rate_limiter
+from utils.tracing import AGENT, LLM as LLM_SPAN, SERVER, get_tracer
 
 
 logger = logging.getLogger(__name__)
 
+
+class ManagedLLM(LLM):
+    """CrewAI LLM whose calls go through the shared AdaptiveRateLimiter."""
+    route_recorder = None
+
+    def call(self, messages, *args, **kwargs):
+        parent_call = super().call
+        prompt = messages if isinstance(messages, str) else [message.get("content", "") for message in messages]
+        started_at = time.perf_counter()
+        with get_tracer().span("crewai.llm", LLM_SPAN, {"model": self.model}):
+            response = get_shared_rate_limiter().call(
+                lambda: parent_call(messages, *args, **kwargs), estimated_tokens=estimate_tokens(prompt), name="crewai",
+            )
+        if self.route_recorder:
+            self.route_recorder(time.perf_counter() - started_at, estimate_tokens(prompt) + estimate_tokens(response))
+        return response
+
 class CrewAIContentCreation:
     """CrewAI-based content creation team."""
     def __init__(self, config: Config):
         self.config = config
         self.llm = None
+        self.router = None
         self._setup_crew()
 
     def _setup_crew(self):
@@ -28,14 +52,15 @@ class CrewAIContentCreation:
             return
 
         try:
-            
-            self.llm = LLM(
-                model=f"watsonx/{self.config.model_id}",
+            # Each agent gets the model routed to it (strong = Config.model_id), see utils/model_router.py
+            self.router = ModelRouter.from_config(self.config, "content", lambda model_id: ManagedLLM(
+                model=f"watsonx/{model_id}",
                 api_base=self.config.url,
                 api_key=self.config.api_key,
                 project_id=self.config.project_id,
                 temperature=0.2,
-            )
+            ), low_stakes_steps=("editor",))
+            self.llm = self.router.step_model("writer")
 
             self.writer = Agent(
                 role='Content Writer',
@@ -49,7 +74,7 @@ class CrewAIContentCreation:
                 role='Content Editor',
                 goal='Review, refine, and optimize drafted content for clarity, grammar, and SEO',
                 backstory='Detail-oriented editor with a sharp eye for errors and a strong understanding of content best practices.',
-                llm=self.llm,
+                llm=self.router.step_model("editor"),
                 verbose=True,
                 allow_delegation=False
             )
@@ -58,6 +83,18 @@ class CrewAIContentCreation:
             logger.error(f"Error setting up CrewAI: {e}")
             self.llm = None
 
+    async def warm_up(self):
+        """Sends one tiny prompt to every model the router can pick, so auth and connections are ready before traffic."""
+        if not self.llm:
+            raise RuntimeError("CrewAI not available or not properly initialized")
+        # LLM.call blocks, so each model is called from a worker thread
+        await asyncio.gather(*(asyncio.to_thread(self.router.model(route).call, WARM_UP_PROMPT)
+                               for route in self.router.warm_up_routes()))
+
+    def routing_report(self) -> Dict[str, Any]:
+        """Calls, latency and tokens per agent and model route, with the savings from fast-model routing."""
+        return self.router.report() if self.router else {}
+
     def generate_blog_post(self, topic: str, word_count_target: int = 500) -> Dict[str, Any]:
         """Generates a blog post using the CrewAI team."""
         if not self.llm:
@@ -89,15 +126,36 @@ class CrewAIContentCreation:
                 expected_output="A polished, final version of the blog post, ready for publication."
             )
 
+            # CrewAI reports finished agent steps and tasks through callbacks; each one closes a span that
+            # started when the previous step (or task) finished. The root span is passed explicitly because
+            # CrewAI may invoke callbacks outside the calling context.
+            tracer = get_tracer()
+            root_span = tracer.span("content.generate_blog_post", SERVER, {"topic": topic})
+            marks = {"step": time.time_ns(), "task": time.time_ns()}
+
+            def on_step(step_output):
+                now_ns = time.time_ns()
+                tracer.record("crewai.agent_step", marks["step"], now_ns, AGENT, {"step_type": type(step_output).__name__}, parent=root_span)
+                marks["step"] = now_ns
+
+            def on_task(task_output):
+                now_ns = time.time_ns()
+                tracer.record("crewai.task", marks["task"], now_ns, AGENT, {"agent": getattr(task_output, "agent", None)}, parent=root_span)
+                marks["task"] = marks["step"] = now_ns
+
             crew = Crew(
                 agents=[self.writer, self.editor],
                 tasks=[draft_task, edit_task],
                 verbose=True,
-                process=Process.sequential
+                process=Process.sequential,
+                step_callback=on_step,
+                task_callback=on_task
             )
 
             logger.info(f"CrewAI: Generating blog post for topic '{topic}'...")
-            result = crew.kickoff()
+            with root_span, deadline(self.config.content_creation_deadline_s):
+                marks["step"] = marks["task"] = time.time_ns()
+                result = crew.kickoff()
 
             return {
                 "topic": topic,
@@ -124,7 +182,7 @@ async def main():
     print("📝 CREWAI CONTENT CREATION SHOWCASE")
     print("=" * 60)
 
-    config = Config()
+    config = get_config()
     if not config.validate():
         print("Watsonx configuration is invalid. Please set environment variables or update watsonx_config.py.")
         return
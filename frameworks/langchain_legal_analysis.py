@@ -5,41 +5,90 @@ File Name: frameworks/langchain_legal_analysis.py
 LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
 """
 
+import asyncio
 import logging
 import json
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Callable, List, Optional, AsyncIterator
 
 from langchain_ibm.chat_models import ChatWatsonx
 from langchain_ibm import WatsonxToolkit
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda, RunnableBranch
 
-from config.config import Config
+from config.config import Config, get_config
 from utils.common_utils import extract_json_from_text
+from utils.deadlines import deadline
+from utils.legal_sections import split_legal_sections, LegalDocumentIndex
+from utils.llm_gateway import managed
+from utils.model_router import ModelRouter, STRONG, WARM_UP_PROMPT, is_low_confidence, message_tokens
+from utils.prompt_budget import PromptBudget
+from utils.streaming import StreamEvent, RUN_FINISHED, stream_runnable_events
+from utils.tracing import SERVER, get_tracer
+from utils.clause_index import ClauseVectorIndex, format_similar_clauses
 
 logger = logging.getLogger(__name__)
 
+# Schedules for the three analysis steps:
+#   barrier     - risk assessment waits for both summary and clause extraction (the `full_workflow` layout)
+#   pipelined   - risk assessment starts as soon as the summary is available
+#   speculative - risk assessment runs straight off the document, in parallel with the other steps
+SCHEDULE_MODES = ("barrier", "pipelined", "speculative")
+_SCHEDULE_DEPENDENCIES = {
+    "barrier": {"risk_assessment": ["summary", "key_clauses"]},
+    "pipelined": {"risk_assessment": ["summary"]},
+    "speculative": {},
+}
+LEGAL_STREAM_NODES = ("summary", "key_clauses", "risk_assessment")
+
 class LangChainLegalWorkflow:
     """LangChain-based workflow for legal document analysis."""
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, clause_index: Optional[ClauseVectorIndex] = None,
+                 retrieval_top_k: int = 3, chat_model: Optional[BaseChatModel] = None):
         self.config = config
+        self.chat_model = chat_model
+        self.clause_index = clause_index
+        self.retrieval_top_k = retrieval_top_k
         self.llm = None
+        self.router = None
         self.full_workflow = None 
+        self.summary_chain = None
+        self.clause_chain = None
+        self.risk_chain = None
+        self.speculative_risk_chain = None
+        self.prompt_budget = PromptBudget.from_config(self.config, "legal")
+        if self.clause_index is None:
+            max_entries = self.config.clause_index_max_entries
+            self.clause_index = (ClauseVectorIndex.load(self.config.clause_index_path, max_entries=max_entries)
+                                 if self.config.clause_index_path else ClauseVectorIndex(max_entries=max_entries))
         self._setup_chain()
 
     def _setup_chain(self):
         """Setup LangChain workflow for legal document analysis."""
         try:
-            watsonx = WatsonxToolkit(
-                url=self.config.url,
-                project_id=self.config.project_id,
-                apikey=self.config.api_key
-            )
-            self.llm = ChatWatsonx(
-                watsonx_client=watsonx.watsonx_client,
-                model_id=self.config.model_id,
-                temperature=0.0,
+            # An injected chat model (e.g. the offline mock) replaces watsonx for every step
+            watsonx = None
+            if self.chat_model is None:
+                watsonx = WatsonxToolkit(
+                    url=self.config.url,
+                    project_id=self.config.project_id,
+                    apikey=self.config.api_key
+                )
+            def watsonx_chat(model_id):
+                return managed(ChatWatsonx(
+                    watsonx_client=watsonx.watsonx_client,
+                    model_id=model_id,
+                    temperature=0.0,
+                ), call_name="legal_analysis")
+
+            self.llm = self.chat_model or watsonx_chat(self.config.model_id)
+            # Each step's model comes from the router (strong = Config.model_id), see utils/model_router.py
+            self.router = ModelRouter.from_config(
+                self.config, "legal",
+                lambda model_id: self.llm if model_id == self.config.model_id or watsonx is None else watsonx_chat(model_id),
+                low_stakes_steps=("summary",)
             )
 
             # 1. Summary Chain
@@ -51,33 +100,68 @@ class LangChainLegalWorkflow:
                 """
             )
 
-            # 2. Key Clause Extraction Chain
+            # 2. Key Clause Extraction Chain (only locally pre-selected candidate sections are sent)
             clause_extraction_prompt = PromptTemplate(
                 input_variables=["document_text"],
                 template="""
-                From the following legal document, identify and extract the most important clauses related to rights, obligations, and termination conditions.
-                List them as a JSON array of strings.
-                Document: {document_text}
+                From the following sections of a legal document, identify and extract the most important clauses related to rights, obligations, and termination conditions.
+                List them as a JSON array of strings, quoting the clause text exactly as it appears.
+                Document Sections: {document_text}
                 Return only a JSON array, e.g., ["clause1", "clause2", "clause3"].
                 """
             )
             clause_parser = JsonOutputParser()
+            # Parse the complete response only: streamed partial JSON arrays would otherwise be concatenated
+            parse_clauses = RunnableLambda(lambda message: clause_parser.invoke(message))
 
             # 3. Risk Assessment Chain
             risk_assessment_prompt = PromptTemplate(
-                input_variables=["document_text", "summary"],
+                input_variables=["document_text", "summary", "similar_clauses"],
                 template="""
                 Given the following legal document and its summary, assess potential legal risks or ambiguous points.
                 Provide your assessment in JSON format with a risk level (Low, Medium, High) and bullet points of specific risks.
                 Document Summary: {summary}
+                Similar clauses from previously assessed documents, with those documents' risk levels (for reference only): {similar_clauses}
                 Full Document (for context): {document_text}
                 Return only valid JSON: {{ "risk_level": "Low/Medium/High", "identified_risks": ["risk1", "risk2"] }}
                 """
             )
             risk_parser = JsonOutputParser()
+
+            # 3b. Speculative Risk Assessment Chain (document only, no dependency on the summary)
+            speculative_risk_prompt = PromptTemplate(
+                input_variables=["document_text", "similar_clauses"],
+                template="""
+                Given the following legal document, assess potential legal risks or ambiguous points.
+                Provide your assessment in JSON format with a risk level (Low, Medium, High) and bullet points of specific risks.
+                Similar clauses from previously assessed documents, with those documents' risk levels (for reference only): {similar_clauses}
+                Document: {document_text}
+                Return only valid JSON: {{ "risk_level": "Low/Medium/High", "identified_risks": ["risk1", "risk2"] }}
+                """
+            )
+
+            summary_llm = self._routed_llm("summary", lambda message: not is_low_confidence(message.content))
+            clause_llm = self._routed_llm("key_clauses", lambda message: isinstance(self._try_parse(clause_parser, message), list))
+            risk_llm = self._routed_llm("risk_assessment", lambda message: isinstance(self._try_parse(risk_parser, message), dict))
+
+            self.summary_chain = (self._budgeted("summary", summary_prompt) | summary_prompt | summary_llm).with_config(run_name="summary")
+            self.clause_chain = (RunnableLambda(self._prepare_clause_input) | self._budgeted("key_clauses", clause_extraction_prompt)
+                                 | clause_extraction_prompt | clause_llm | parse_clauses).with_config(run_name="key_clauses")
+            # Risk steps skip the LLM for a document assessed before and otherwise retrieve similar known clauses
+            # as context. A new assessment is added to the index together with the document's clauses.
+            def with_clause_retrieval(step, prompt):
+                assess = RunnablePassthrough.assign(assessment=self._budgeted(step, prompt) | prompt | risk_llm | risk_parser)
+                return (RunnableLambda(self._prepare_risk_input) | RunnableBranch(
+                    (lambda x: x["reused_assessment"] is not None, lambda x: x["reused_assessment"]),
+                    assess | RunnableLambda(self._remember_assessment)
+                )).with_config(run_name="risk_assessment")
+
+            self.risk_chain = with_clause_retrieval("risk_assessment", risk_assessment_prompt)
+            self.speculative_risk_chain = with_clause_retrieval("risk_assessment_speculative", speculative_risk_prompt)
+
             initial_analysis_parallel = RunnableParallel(
-                summary=summary_prompt | self.llm,
-                key_clauses=clause_extraction_prompt | self.llm | clause_parser
+                summary=self.summary_chain,
+                key_clauses=self.clause_chain
             )
 
             
@@ -91,9 +175,7 @@ class LangChainLegalWorkflow:
                         "document_text": lambda x: x["document_text"],
                         "summary": lambda x: x["initial_analysis"]["summary"].content 
                     }
-                    | risk_assessment_prompt
-                    | self.llm
-                    | risk_parser
+                    | self.risk_chain
                 )
             )
 
@@ -106,6 +188,67 @@ class LangChainLegalWorkflow:
             logger.error(f"Error setting up LangChain legal workflow: {e}")
             self.full_workflow = None
 
+    @staticmethod
+    def _try_parse(parser, message) -> Any:
+        try:
+            return parser.invoke(message)
+        except Exception:
+            return None
+
+    def _budgeted(self, step: str, prompt: PromptTemplate) -> RunnableLambda:
+        """Fits a prompt's inputs to the step's token budget; the document, summary and similar clauses can be trimmed."""
+        def fit(step_input):
+            fields = step_input if isinstance(step_input, dict) else {prompt.input_variables[0]: step_input}
+            fitted = self.prompt_budget.fit(step, prompt.template, {name: fields[name] for name in prompt.input_variables},
+                                            trimmable=("document_text", "summary", "similar_clauses"))
+            return {**fields, **fitted}
+        return RunnableLambda(fit).with_config(run_name="prompt_budget")
+
+    def _routed_llm(self, step: str, accept: Callable[[Any], bool]) -> RunnableLambda:
+        """
+        The chat model for a chain step, chosen by the router from the rendered prompt. A fast-model answer
+        that `accept` rejects (parse failure or low confidence) is escalated to the strong model.
+        """
+        def call(prompt_value, config):
+            text = prompt_value.to_string()
+            route = self.router.route(step, text)
+            while True:
+                started_at = time.perf_counter()
+                message = self.router.model(route).invoke(prompt_value, config)
+                self.router.record(step, route, time.perf_counter() - started_at, message_tokens(message, text))
+                if route == STRONG or accept(message):
+                    return message
+                self.router.escalated(step, "answer rejected")
+                route = STRONG
+
+        async def acall(prompt_value, config):
+            text = prompt_value.to_string()
+            route = self.router.route(step, text)
+            while True:
+                started_at = time.perf_counter()
+                message = await self.router.model(route).ainvoke(prompt_value, config)
+                self.router.record(step, route, time.perf_counter() - started_at, message_tokens(message, text))
+                if route == STRONG or accept(message):
+                    return message
+                self.router.escalated(step, "answer rejected")
+                route = STRONG
+
+        return RunnableLambda(call, afunc=acall, name=f"{step}_model")
+
+    async def warm_up(self):
+        """Sends one tiny prompt to every model the router can pick, so auth and connections are ready before traffic."""
+        if not self.full_workflow:
+            raise RuntimeError("LangChain workflow not initialized")
+        await asyncio.gather(*(self.router.model(route).ainvoke(WARM_UP_PROMPT) for route in self.router.warm_up_routes()))
+
+    def routing_report(self) -> Dict[str, Any]:
+        """Calls, latency and tokens per step and model route, with the savings from fast-model routing."""
+        return self.router.report() if self.router else {}
+
+    def prompt_report(self) -> Dict[str, Any]:
+        """Estimated prompt tokens, overflows and trims per chain step (see utils/prompt_budget.py)."""
+        return self.prompt_budget.report()
+
     def analyze_legal_document(self, document_content: str) -> Dict[str, Any]:
         """Analyzes a legal document using the LangChain workflow."""
         if not self.full_workflow:
@@ -113,26 +256,283 @@ class LangChainLegalWorkflow:
 
         try:
             logger.info("LangChain: Starting legal document analysis...")
-            result = self.full_workflow.invoke(document_content)
-            summary_content = result["initial_analysis"]["summary"].content if hasattr(result["initial_analysis"]["summary"], 'content') else str(result["initial_analysis"]["summary"])
+            with get_tracer().span("legal.analyze_document", SERVER, {"document_chars": len(document_content)}), \
+                    deadline(self.config.legal_analysis_deadline_s):
+                result = self.full_workflow.invoke(document_content)
+            return self._format_result(result, document_content)
+        except Exception as e:
+            logger.error(f"LangChain legal document analysis failed: {e}")
+            return {"error": str(e), "framework": "langchain"}
 
-            key_clauses = result["initial_analysis"]["key_clauses"]
-            if not isinstance(key_clauses, list):
-                key_clauses = extract_json_from_text(str(key_clauses))
-                if not isinstance(key_clauses, list):
-                     key_clauses = [str(key_clauses)] if key_clauses else []
-
-            return {
-                "document_summary": summary_content,
-                "key_clauses_extracted": key_clauses,
-                "risk_assessment": result["risk_assessment"],
-                "framework": "langchain",
-                "status": "completed"
-            }
+    async def aanalyze_legal_document(self, document_content: str) -> Dict[str, Any]:
+        """Asynchronously analyzes a legal document using the LangChain workflow."""
+        if not self.full_workflow:
+            return {"error": "LangChain not available or not properly initialized", "framework": "langchain"}
+
+        try:
+            logger.info("LangChain: Starting async legal document analysis...")
+            with get_tracer().span("legal.analyze_document", SERVER, {"document_chars": len(document_content)}), \
+                    deadline(self.config.legal_analysis_deadline_s):
+                result = await self.full_workflow.ainvoke(document_content)
+            return self._format_result(result, document_content)
         except Exception as e:
             logger.error(f"LangChain legal document analysis failed: {e}")
             return {"error": str(e), "framework": "langchain"}
 
+    async def analyze_legal_documents(self, documents: List[str], max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        Analyzes many legal documents concurrently with at most `max_concurrency` in flight.
+        Results are returned in input order; a failing document yields an error entry
+        without affecting the others.
+        """
+        if not self.full_workflow:
+            return [{"error": "LangChain not available or not properly initialized", "framework": "langchain"} for _ in documents]
+        if not documents:
+            return []
+
+        logger.info(f"LangChain: Starting batch analysis of {len(documents)} documents (max_concurrency={max_concurrency})...")
+        raw_results = await self.full_workflow.abatch(
+            list(documents),
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True
+        )
+
+        results = []
+        for index, (document_content, raw) in enumerate(zip(documents, raw_results)):
+            if isinstance(raw, Exception):
+                logger.error(f"LangChain legal document analysis failed for document {index}: {raw}")
+                results.append({"error": str(raw), "framework": "langchain"})
+                continue
+            try:
+                results.append(self._format_result(raw, document_content))
+            except Exception as e:
+                logger.error(f"LangChain result formatting failed for document {index}: {e}")
+                results.append({"error": str(e), "framework": "langchain"})
+
+        if self.clause_index.path:
+            self.save_clause_index()
+        return results
+
+    async def stream_legal_analysis(self, document_content: str) -> AsyncIterator[StreamEvent]:
+        """
+        Streams the analysis as typed events: node_started / token / node_finished for the summary,
+        key_clauses and risk_assessment steps, then run_finished with the full result and time-to-first-token.
+        """
+        if not self.full_workflow:
+            yield StreamEvent(RUN_FINISHED, data={"error": "LangChain not available or not properly initialized", "framework": "langchain"})
+            return
+
+        try:
+            logger.info("LangChain: Streaming legal document analysis...")
+            with get_tracer().span("legal.analyze_document", SERVER, {"document_chars": len(document_content)}), \
+                    deadline(self.config.legal_analysis_deadline_s):
+                async for event in stream_runnable_events(
+                    self.full_workflow,
+                    document_content,
+                    LEGAL_STREAM_NODES,
+                    lambda _, outputs: self._format_result({
+                        "initial_analysis": {"summary": outputs.get("summary", ""), "key_clauses": outputs.get("key_clauses", [])},
+                        "risk_assessment": outputs.get("risk_assessment", {})
+                    }, document_content)
+                ):
+                    yield event
+        except Exception as e:
+            logger.error(f"LangChain legal document analysis stream failed: {e}")
+            yield StreamEvent(RUN_FINISHED, data={"error": str(e), "framework": "langchain"})
+
+    async def aanalyze_with_schedule(self, document_content: str, mode: str = "pipelined") -> Dict[str, Any]:
+        """
+        Analyzes a legal document with an explicit step schedule (see SCHEDULE_MODES) and
+        reports per-step timings together with the end-to-end critical path under "schedule".
+        """
+        if not self.full_workflow:
+            return {"error": "LangChain not available or not properly initialized", "framework": "langchain"}
+        if mode not in SCHEDULE_MODES:
+            return {"error": f"Unknown schedule mode '{mode}'. Expected one of {list(SCHEDULE_MODES)}.", "framework": "langchain"}
+
+        timings: Dict[str, Dict[str, float]] = {}
+        started_at = time.perf_counter()
+
+        async def timed(step: str, runnable, step_input: Dict[str, Any]):
+            start = time.perf_counter() - started_at
+            try:
+                return await runnable.ainvoke(step_input)
+            finally:
+                timings[step] = {"start_s": start, "end_s": time.perf_counter() - started_at}
+
+        document_input = {"document_text": document_content}
+
+        async def run_risk_assessment():
+            if mode == "speculative":
+                return await timed("risk_assessment", self.speculative_risk_chain, document_input)
+            if mode == "barrier":
+                await asyncio.gather(summary_task, clause_task)
+            summary = await summary_task
+            summary_text = summary.content if hasattr(summary, 'content') else str(summary)
+            return await timed("risk_assessment", self.risk_chain, {"document_text": document_content, "summary": summary_text})
+
+        # Tasks copy the context they are created in, so all three steps share the document's deadline and span
+        with get_tracer().span("legal.analyze_with_schedule", SERVER, {"mode": mode}) as span:
+            with deadline(self.config.legal_analysis_deadline_s):
+                summary_task = asyncio.create_task(timed("summary", self.summary_chain, document_input))
+                clause_task = asyncio.create_task(timed("key_clauses", self.clause_chain, document_input))
+                risk_task = asyncio.create_task(run_risk_assessment())
+            tasks = [summary_task, clause_task, risk_task]
+
+            try:
+                logger.info(f"LangChain: Starting legal document analysis with '{mode}' schedule...")
+                summary, key_clauses, risk_assessment = await asyncio.gather(*tasks)
+            except Exception as e:
+                for task in tasks:
+                    task.cancel()
+                span.record_error(e)
+                logger.error(f"LangChain legal document analysis failed ({mode} schedule): {e}")
+                return {"error": str(e), "framework": "langchain"}
+
+        result = self._format_result({
+            "initial_analysis": {"summary": summary, "key_clauses": key_clauses},
+            "risk_assessment": risk_assessment
+        }, document_content)
+        result["schedule"] = self._schedule_report(mode, timings, time.perf_counter() - started_at)
+        return result
+
+    async def aprofile_schedules(self, document_content: str, modes=SCHEDULE_MODES) -> Dict[str, Any]:
+        """Runs the document under each schedule and reports the lowest-latency arrangement."""
+        reports = {}
+        for mode in modes:
+            result = await self.aanalyze_with_schedule(document_content, mode=mode)
+            reports[mode] = result.get("schedule", {"error": result.get("error")})
+
+        timed_modes = [mode for mode, report in reports.items() if "end_to_end_s" in report]
+        fastest = min(timed_modes, key=lambda mode: reports[mode]["end_to_end_s"]) if timed_modes else None
+        return {"schedules": reports, "fastest_mode": fastest, "framework": "langchain"}
+
+    @staticmethod
+    def _schedule_report(mode: str, timings: Dict[str, Dict[str, float]], end_to_end: float) -> Dict[str, Any]:
+        """Builds per-step timings and walks the dependency graph back from the last step to find the critical path."""
+        dependencies = _SCHEDULE_DEPENDENCIES[mode]
+        steps = {
+            step: {
+                "start_s": round(timing["start_s"], 4),
+                "end_s": round(timing["end_s"], 4),
+                "duration_s": round(timing["end_s"] - timing["start_s"], 4),
+            }
+            for step, timing in timings.items()
+        }
+
+        path = []
+        current = max(timings, key=lambda step: timings[step]["end_s"]) if timings else None
+        while current:
+            path.append(current)
+            parents = [parent for parent in dependencies.get(current, []) if parent in timings]
+            current = max(parents, key=lambda parent: timings[parent]["end_s"]) if parents else None
+        path.reverse()
+
+        critical_path = []
+        previous_end = 0.0
+        for step in path:
+            critical_path.append({
+                "step": step,
+                "waited_s": round(max(0.0, timings[step]["start_s"] - previous_end), 4),
+                "duration_s": steps[step]["duration_s"],
+            })
+            previous_end = timings[step]["end_s"]
+
+        return {
+            "mode": mode,
+            "steps": steps,
+            "critical_path": critical_path,
+            "end_to_end_s": round(end_to_end, 4),
+        }
+
+    @staticmethod
+    def index_document(document_content: str) -> LegalDocumentIndex:
+        """Builds the local section/clause index used to pre-select clause candidates and report offsets."""
+        return split_legal_sections(document_content)
+
+    def _prepare_clause_input(self, step_input) -> Dict[str, str]:
+        """Replaces the full document with its locally detected rights/obligations/termination sections."""
+        document_content = step_input["document_text"] if isinstance(step_input, dict) else str(step_input)
+        candidates = self.index_document(document_content).render_candidates()
+        logger.debug(f"LangChain: Clause extraction prompt reduced from {len(document_content)} to {len(candidates)} characters.")
+        return {"document_text": candidates}
+
+    def save_clause_index(self):
+        """Persists the clause index so later runs can reuse earlier assessments."""
+        try:
+            self.clause_index.save()
+            logger.info(f"LangChain: Saved clause index with {len(self.clause_index)} clauses.")
+        except Exception as e:
+            logger.error(f"Failed to save clause index: {e}")
+
+    def _clause_texts(self, document_content: str) -> List[str]:
+        """Numbered section texts used as retrieval queries and index entries (the whole document if unstructured)."""
+        document_index = self.index_document(document_content)
+        texts = [document_content[section.start:section.end] for section in document_index.sections if section.number]
+        return texts or ([document_content] if document_content.strip() else [])
+
+    def _prepare_risk_input(self, step_input: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reuses the stored assessment of a document that was assessed before. Any other document, however
+        similar, gets an LLM assessment, with the top-k most similar known clauses as compact context.
+        """
+        step_input = dict(step_input)
+        document = step_input["document_text"]
+        stored = self.clause_index.document_assessment(document) if document.strip() else None
+        if stored is not None:
+            logger.info("LangChain: Document was assessed before; skipping LLM risk assessment.")
+            step_input["reused_assessment"] = {**stored, "source": "clause_index"}
+            return step_input
+
+        best: Dict[str, Any] = {}
+        for clause_matches in self.clause_index.search(self._clause_texts(document), top_k=self.retrieval_top_k):
+            for score, record in clause_matches:
+                if score > best.get(record["digest"], (0.0, None))[0]:
+                    best[record["digest"]] = (score, record)
+        top_matches = sorted(best.values(), key=lambda match: match[0], reverse=True)[:self.retrieval_top_k]
+        step_input["similar_clauses"] = format_similar_clauses(top_matches)
+        step_input["reused_assessment"] = None
+        return step_input
+
+    def _remember_assessment(self, step_input: Dict[str, Any]) -> Any:
+        """Adds a document's LLM risk assessment and its clauses to the index, and returns the assessment."""
+        risk_assessment = step_input["assessment"]
+        if isinstance(risk_assessment, dict):
+            document = step_input["document_text"]
+            identified_risks = risk_assessment.get("identified_risks", [])
+            self.clause_index.add_document(
+                document,
+                self._clause_texts(document),
+                str(risk_assessment.get("risk_level", "Unknown")),
+                [str(risk) for risk in identified_risks] if isinstance(identified_risks, list) else [str(identified_risks)]
+            )
+        return risk_assessment
+
+    def _format_result(self, result: Dict[str, Any], document_content: str) -> Dict[str, Any]:
+        """Converts raw workflow output into the public analysis result."""
+        summary_content = result["initial_analysis"]["summary"].content if hasattr(result["initial_analysis"]["summary"], 'content') else str(result["initial_analysis"]["summary"])
+
+        key_clauses = result["initial_analysis"]["key_clauses"]
+        if not isinstance(key_clauses, list):
+            key_clauses = extract_json_from_text(str(key_clauses))
+            if not isinstance(key_clauses, list):
+                 key_clauses = [str(key_clauses)] if key_clauses else []
+
+        # Attach document offsets so clauses can be highlighted without re-scanning the text
+        document_index = self.index_document(document_content)
+        key_clauses = [
+            document_index.locate(clause if isinstance(clause, str) else json.dumps(clause))
+            for clause in key_clauses
+        ]
+
+        return {
+            "document_summary": summary_content,
+            "key_clauses_extracted": key_clauses,
+            "risk_assessment": result["risk_assessment"],
+            "framework": "langchain",
+            "status": "completed"
+        }
+
 def get_test_legal_document(scenario: str) -> Dict[str, str]:
     """Provides sample legal document content for testing."""
     if scenario == "simple_contract":
@@ -213,24 +613,20 @@ async def main():
     print("⚖️ LANGCHAIN LEGAL DOCUMENT ANALYSIS SHOWCASE")
     print("=" * 60)
 
-    config = Config() 
+    config = get_config()
     if not config.validate():
         print("Watsonx configuration is invalid. Please set environment variables or update watsonx_config.py.")
         return
 
     analyzer = LangChainLegalWorkflow(config)
 
-    # Case 1: Simple Service Agreement
-    simple_doc_data = get_test_legal_document("simple_contract")
-    print(f"\nAnalyzing: {simple_doc_data['name']}")
-    simple_result = analyzer.analyze_legal_document(simple_doc_data["content"])
-    print(json.dumps(simple_result, indent=2, default=str)) # Use default=str for any non-JSON serializable objects
-
-    # Case 2: Complex Non-Disclosure Agreement
-    complex_doc_data = get_test_legal_document("complex_nda")
-    print(f"\nAnalyzing: {complex_doc_data['name']}")
-    complex_result = analyzer.analyze_legal_document(complex_doc_data["content"])
-    print(json.dumps(complex_result, indent=2, default=str))
+    # Case 1 & 2: Simple Service Agreement and Complex Non-Disclosure Agreement, analyzed concurrently
+    documents = [get_test_legal_document("simple_contract"), get_test_legal_document("complex_nda")]
+    print(f"\nAnalyzing: {', '.join(doc['name'] for doc in documents)}")
+    results = await analyzer.analyze_legal_documents([doc["content"] for doc in documents], max_concurrency=2)
+    for doc, result in zip(documents, results):
+        print(f"\nResult for: {doc['name']}")
+        print(json.dumps(result, indent=2, default=str)) # Use default=str for any non-JSON serializable objects
 
 if __name__ == "__main__":
     import asyncio
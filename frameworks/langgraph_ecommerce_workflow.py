@@ -5,196 +5,1042 @@ File Name: frameworks/langgraph_ecommerce_workflow.py
 LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
 """
 
+import asyncio
 import logging
 import json
-from typing import Dict, Any, TypedDict
+import time
+import uuid
+import contextvars
+import zlib
+import sqlite3
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Any, TypedDict, AsyncIterator, Callable, List, Optional, Annotated
 from datetime import datetime
 
+import aiosqlite
+
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.graph import StateGraph, END, START
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langchain_ibm import WatsonxToolkit
 from langchain_ibm.chat_models import ChatWatsonx
 
-from config.config import Config
-from utils.common_utils import extract_json_from_text
+from config.config import Config, get_config
+from utils.common_utils import extract_json_from_text, extract_json_array_from_text
+from utils.deadlines import deadline
+from utils.fraud_scoring import FraudPreScorer
+from utils.inventory import InventoryIndex
+from utils.llm_gateway import ManagedChatModel, managed
+from utils.metrics import WorkflowMetrics
+from utils.micro_batcher import AsyncMicroBatcher
+from utils.model_router import ModelRouter, STRONG, WARM_UP_PROMPT, is_low_confidence, message_tokens
+from utils.order_payloads import OrderPayload, OrderPayloadStore, merge_metadata, payload_db_path, RESET_METADATA
+from utils.prompt_budget import PromptBudget
+from utils.shipping_templates import ShippingMessageRenderer
+from utils.tracing import SERVER, get_tracer
+from utils.streaming import StreamEvent, RUN_FINISHED, stream_runnable_events
 
 logger = logging.getLogger(__name__)
 
+ORDER_GRAPH_NODES = ("validate_order", "check_inventory", "confirm_shipping")
+# inventory_first - the cheap local inventory check gates the LLM validation
+# sequential      - original layout: validate_order -> check_inventory -> confirm_shipping
+# In both, in-stock orders ship whatever the validation says, unless ORDER_REQUIRE_VALID_TO_SHIP is set
+GRAPH_TOPOLOGIES = ("inventory_first", "sequential")
+# template - confirmations are rendered locally; LLM personalization is optional and runs after the order ships
+# llm      - original behaviour: the LLM writes every confirmation on the critical path
+SHIPPING_REPORT_MODES = ("template", "llm")
+# summary  - order id, processing status and final report
+# standard - summary plus the per-step statuses and merged metadata
+# full     - summary plus the complete final state (`detailed_state`), including items and customer info
+RESULT_DETAIL_LEVELS = ("summary", "standard", "full")
+# Steps the auto routing policy always sends to the fast model
+LOW_STAKES_STEPS = ("confirm_shipping", "confirm_shipping_speculative", "personalize_shipping")
+# How long a checkpoint write waits for another connection's write lock before failing the order
+CHECKPOINT_BUSY_TIMEOUT_S = 30.0
+
 class OrderState(TypedDict):
-    """Represents the state of an e-commerce order."""
+    """
+    Represents the state of an e-commerce order. Items and customer info are stored once in the
+    OrderPayloadStore and referenced through `order_ref`, so they are not copied into every checkpoint.
+    """
     order_id: str
-    items: list
-    customer_info: dict
+    order_ref: str
     validation_status: str
     inventory_status: str
     shipping_status: str
     processed_report: str
-    metadata: dict
+    metadata: Annotated[dict, merge_metadata]
+    fraud_prescore: dict
 
 class LangGraphEcommerceWorkflow:
     """LangGraph-based e-commerce order processing workflow."""
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, chat_model: Optional[BaseChatModel] = None, topology: str = "inventory_first",
+                 inventory: Optional[InventoryIndex] = None, fraud_scorer: Optional[FraudPreScorer] = None,
+                 validation_batch_size: int = 1, validation_batch_wait_ms: float = 20.0,
+                 checkpoint_db: Optional[str] = None, shipping_report_mode: Optional[str] = None,
+                 personalization_rate: Optional[float] = None, shipping_renderer: Optional[ShippingMessageRenderer] = None,
+                 speculative_shipping: bool = False, speculation_max_fraud_score: float = 0.4,
+                 speculation_waste_budget: float = 0.25, result_detail_level: str = "full",
+                 fast_chat_model: Optional[BaseChatModel] = None, require_valid_to_ship: Optional[bool] = None):
+        if topology not in GRAPH_TOPOLOGIES:
+            raise ValueError(f"Unknown graph topology '{topology}'. Expected one of {list(GRAPH_TOPOLOGIES)}.")
+        shipping_report_mode = shipping_report_mode or config.shipping_report_mode
+        if shipping_report_mode not in SHIPPING_REPORT_MODES:
+            raise ValueError(f"Unknown shipping report mode '{shipping_report_mode}'. Expected one of {list(SHIPPING_REPORT_MODES)}.")
+        if result_detail_level not in RESULT_DETAIL_LEVELS:
+            raise ValueError(f"Unknown result detail level '{result_detail_level}'. Expected one of {list(RESULT_DETAIL_LEVELS)}.")
         self.config = config
-        self.chat = None
+        self.chat = chat_model
+        self.fast_chat = fast_chat_model
+        self._watsonx = None
+        self.router = None
+        self.topology = topology
+        self.require_valid_to_ship = config.order_require_valid_to_ship if require_valid_to_ship is None else require_valid_to_ship
+        self.inventory = inventory
+        self.fraud_scorer = fraud_scorer
+        if self.fraud_scorer is None and self.config.fraud_prescoring_enabled:
+            self.fraud_scorer = FraudPreScorer.from_config(self.config)
+        self.metrics = WorkflowMetrics()
+        # Payloads are embedded as compact JSON and each prompt is kept within its token budget
+        self.prompt_budget = PromptBudget.from_config(self.config, "ecommerce")
+        # With a batch size above 1, async validations are packed into one LLM prompt per micro-batch
+        self._validation_batcher = None
+        if validation_batch_size > 1:
+            self._validation_batcher = AsyncMicroBatcher(
+                self._validate_order_batch,
+                max_batch_size=validation_batch_size,
+                max_wait_ms=validation_batch_wait_ms,
+                metrics=self.metrics,
+                name="validation_batch"
+            )
+        # State is checkpointed to SQLite after every node, keyed by order_id, so interrupted orders can be resumed
+        self.checkpoint_db = checkpoint_db or self.config.order_checkpoint_db
+        self.checkpointer = None
+        self.payloads = OrderPayloadStore(payload_db_path(self.checkpoint_db))
+        self.result_detail_level = result_detail_level
+        self.shipping_report_mode = shipping_report_mode
+        self.shipping_renderer = shipping_renderer or ShippingMessageRenderer()
+        self.personalization_rate = self.config.shipping_personalization_rate if personalization_rate is None else personalization_rate
+        self.personalized_reports: "OrderedDict[str, str]" = OrderedDict()
+        self._personalization_pool = None
+        self._personalization_tasks = set()
+        # Speculative shipping: the LLM shipping report starts alongside the async LLM validation for likely-valid
+        # orders and is cancelled if the order does not ship. Only meaningful when the report comes from the LLM.
+        self.speculative_shipping = speculative_shipping and self.shipping_report_mode == "llm"
+        if speculative_shipping and not self.speculative_shipping:
+            logger.info("Speculative shipping is ignored in template mode: no LLM call sits on the shipping critical path.")
+        self.speculation_max_fraud_score = speculation_max_fraud_score
+        self.speculation_waste_budget = speculation_waste_budget
+        self._speculations: Dict[str, Any] = {}
+        self._validation_outcomes = deque(maxlen=100)
         self.compiled_graph = None
         self._setup_graph()
 
     def _setup_graph(self):
         """Setup LangGraph workflow for order processing."""
         try:
-            watsonx = WatsonxToolkit(
-                url=self.config.url,
-                project_id=self.config.project_id,
-                apikey=self.config.api_key
-            )
-            self.chat = ChatWatsonx(
-                watsonx_client=watsonx.watsonx_client,
-                model_id=self.config.model_id,
-                temperature=0.1,
-            )
+            if self.chat is None:
+                self._watsonx = WatsonxToolkit(
+                    url=self.config.url,
+                    project_id=self.config.project_id,
+                    apikey=self.config.api_key
+                )
+                self.chat = self._watsonx_chat(self.config.model_id)
+            # Each LLM step is routed to the strong (Config.model_id) or fast model, see utils/model_router.py
+            self.router = ModelRouter.from_config(self.config, "ecommerce", self._chat_model_for, low_stakes_steps=LOW_STAKES_STEPS)
+            if self.fast_chat is not None and not self.router.fast_model_id:
+                self.router.fast_model_id = "injected-fast-model"
+
+            # Each node has a sync and an async implementation so both invoke() and ainvoke() avoid blocking calls
+            self.graph = StateGraph(OrderState)
+            self.graph.add_node("validate_order", RunnableLambda(self._validate_order_node, afunc=self._avalidate_order_node, name="validate_order"))
+            self.graph.add_node("check_inventory", RunnableLambda(self._check_inventory_node, afunc=self._acheck_inventory_node, name="check_inventory"))
+            self.graph.add_node("confirm_shipping", RunnableLambda(self._confirm_shipping_node, afunc=self._aconfirm_shipping_node, name="confirm_shipping"))
+
+            if self.topology == "sequential":
+                self.graph.add_edge(START, "validate_order")
+                self.graph.add_conditional_edges(
+                    "validate_order",
+                    lambda state: "check_inventory" if self._may_ship(state) else END,
+                    {
+                        "check_inventory": "check_inventory",
+                        END: END
+                    }
+                )
+                self.graph.add_conditional_edges(
+                    "check_inventory",
+                    lambda state: "confirm_shipping" if state["inventory_status"] == "in_stock" else END,
+                    {
+                        "confirm_shipping": "confirm_shipping",
+                        END: END 
+                    }
+                )
+            else:
+                self.graph.add_edge(START, "check_inventory")
+                self.graph.add_conditional_edges(
+                    "check_inventory",
+                    self._route_after_inventory,
+                    {
+                        "validate_order": "validate_order",
+                        END: END
+                    }
+                )
+                self.graph.add_conditional_edges(
+                    "validate_order",
+                    self._route_after_validation,
+                    {
+                        "confirm_shipping": "confirm_shipping",
+                        END: END
+                    }
+                )
+            self.graph.add_edge("confirm_shipping", END)
+
+            if self.checkpoint_db:
+                self.checkpointer = SqliteSaver(sqlite3.connect(self.checkpoint_db, timeout=CHECKPOINT_BUSY_TIMEOUT_S, check_same_thread=False))
+                logger.info(f"LangGraph order checkpoints are stored in {self.checkpoint_db}.")
+            self.compiled_graph = self.graph.compile(checkpointer=self.checkpointer)
+            logger.info("LangGraph e-commerce workflow initialized successfully.")
+
+        except ImportError as e:
+            logger.error(f"LangGraph dependencies not installed: {e}. Please install 'langchain-ibm', 'langgraph', 'langchain-core', 'typing-extensions'.")
+            self.graph = None
+            self.compiled_graph = None
+        except Exception as e:
+            logger.error(f"Error setting up LangGraph: {e}")
+            self.graph = None
+            self.compiled_graph = None
+
+    # --- checkpointing ---
+
+    @asynccontextmanager
+    async def _agraph(self):
+        """
+        The compiled graph for async runs. The sync SqliteSaver has no async API, so with checkpointing enabled
+        the graph is compiled against an AsyncSqliteSaver on the same database, whose connection is closed afterwards.
+        Concurrent runs each hold a connection, so it waits up to CHECKPOINT_BUSY_TIMEOUT_S for the write lock.
+        """
+        if self.checkpointer is None or not self.compiled_graph:
+            yield self.compiled_graph
+            return
+        async with aiosqlite.connect(self.checkpoint_db, timeout=CHECKPOINT_BUSY_TIMEOUT_S) as conn:
+            yield self.graph.compile(checkpointer=AsyncSqliteSaver(conn))
+
+    def _run_config(self, order_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Graph run config; with checkpointing the order_id is the thread id."""
+        if self.checkpointer is None:
+            return None
+        return {"configurable": {"thread_id": str(order_id) if order_id else f"order-{uuid.uuid4().hex}"}}
+
+    @staticmethod
+    def _failed_step(values: Dict[str, Any]) -> Optional[str]:
+        """The node whose LLM call failed in a finished run, if any; those runs are worth resuming."""
+        if values.get("shipping_status") == "confirmed_with_error":
+            return "confirm_shipping"
+        if str(values.get("metadata", {}).get("error", "")).startswith("LLM validation error"):
+            return "validate_order"
+        return None
+
+    def _checkpoint_before(self, config: Dict[str, Any], step: str):
+        """The most recent checkpoint whose next node is `step`."""
+        for snapshot in self.compiled_graph.get_state_history(config):
+            if step in snapshot.next:
+                return snapshot
+        return None
+
+    def _resume_point(self, order_id: str):
+        """
+        Returns (checkpoint snapshot, node to resume at) for an incomplete order, or (latest snapshot, None)
+        when the order finished. Orders that crashed mid-run resume at their pending node; orders whose
+        LLM call failed are replayed from the checkpoint taken just before that node.
+        """
+        config = self._run_config(order_id)
+        snapshot = self.compiled_graph.get_state(config)
+        if not snapshot.values:
+            return None, None
+        if snapshot.next:
+            return snapshot, snapshot.next[0]
+        step = self._failed_step(snapshot.values)
+        if step:
+            before = self._checkpoint_before(config, step)
+            if before is not None:
+                return before, step
+        return snapshot, None
+
+    def _restore_reservation(self, order_id: str, snapshot):
+        """
+        Reservations live in memory, so after a restart they are re-acquired before resuming past check_inventory,
+        unless the order's stock was already committed. If the stock is gone by now, the order is replayed from check_inventory instead.
+        """
+        values = snapshot.values
+        if self.inventory is None or values.get("inventory_status") != "in_stock" or self.inventory.is_committed(order_id):
+            return snapshot
+        if self.inventory.reserve(order_id, self._payload(values).items)["reserved"]:
+            return snapshot
+        logger.warning(f"Order {order_id}: Reserved items are no longer available, resuming from check_inventory.")
+        return self._checkpoint_before(self._run_config(order_id), "check_inventory") or snapshot
+
+    def resume_order(self, order_id: str, detail_level: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resumes an order from its last checkpoint, re-executing only the nodes that had not finished
+        (or whose LLM call failed). Finished orders are returned as they are, with `resumed` set to False; their
+        payload is no longer stored, so a full-detail result carries no items or customer info.
+        """
+        if not self.compiled_graph:
+            return {"error": "LangGraph not available", "framework": "langgraph"}
+        if self.checkpointer is None:
+            return {"error": "Checkpointing is not enabled. Set LANGGRAPH_CHECKPOINT_DB or pass checkpoint_db.", "framework": "langgraph"}
+
+        try:
+            snapshot, step = self._resume_point(order_id)
+            if snapshot is None:
+                return {"error": f"No checkpoint found for order {order_id}", "framework": "langgraph"}
+            if step is None:
+                return {**self._format_result(snapshot.values, detail_level), "resumed": False}
+
+            snapshot = self._restore_reservation(order_id, snapshot)
+            step = snapshot.next[0] if snapshot.next else step
+            logger.info(f"LangGraph: Resuming order {order_id} at {step}...")
+            self.metrics.increment("checkpoint.resumed")
+            self.metrics.increment(f"checkpoint.resumed_at.{step}")
+            with get_tracer().span("ecommerce.resume_order", SERVER, {"order_id": order_id, "resumed_at": step}), \
+                    deadline(self.config.order_deadline_s):
+                result = self.compiled_graph.invoke(None, snapshot.config)
+            formatted = {**self._format_result(result, detail_level), "resumed": True, "resumed_at": step}
+            self._discard_payload(result.get("order_ref"), finished=True)
+            return formatted
+        except Exception as e:
+            logger.error(f"LangGraph resume failed for order {order_id}: {e}")
+            self._abandon_order(order_id)
+            return {"error": str(e), "framework": "langgraph"}
+
+    def incomplete_orders(self) -> List[str]:
+        """Order ids with a checkpoint that did not run to completion."""
+        if not self.compiled_graph or self.checkpointer is None:
+            return []
+        order_ids = dict.fromkeys(
+            checkpoint.config["configurable"]["thread_id"] for checkpoint in self.checkpointer.list(None)
+        )
+        return [order_id for order_id in order_ids if self._resume_point(order_id)[1] is not None]
+
+    def resume_incomplete_orders(self) -> List[Dict[str, Any]]:
+        """Resumes every incomplete order found in the checkpoint database, e.g. after a restart."""
+        order_ids = self.incomplete_orders()
+        logger.info(f"LangGraph: Resuming {len(order_ids)} incomplete orders...")
+        results = []
+        for order_id in order_ids:
+            result = self.resume_order(order_id)
+            result["order_id"] = order_id
+            results.append(result)
+        return results
+
+    # --- routing and LLM calls ---
+
+    def _route_after_inventory(self, state: OrderState) -> str:
+        """Skips the LLM validation (and shipping) entirely when items are out of stock."""
+        if state["inventory_status"] == "in_stock":
+            return "validate_order"
+        self.metrics.increment("llm_calls_avoided.validate_order")
+        return END
+
+    def _route_after_validation(self, state: OrderState) -> str:
+        """Ships the validated order, unless require_valid_to_ship is set and it did not pass validation."""
+        if self._may_ship(state):
+            return "confirm_shipping"
+        # Not an avoided LLM call: llm_calls_avoided.confirm_shipping is counted where a report is rendered without one
+        self.metrics.increment("shipping.withheld")
+        return END
+
+    def _may_ship(self, state: Dict[str, Any]) -> bool:
+        """Whether a validated order may go on to shipping. Without require_valid_to_ship every order may."""
+        return not self.require_valid_to_ship or state.get("validation_status") == "valid"
+
+    def _watsonx_chat(self, model_id: str) -> BaseChatModel:
+        return managed(ChatWatsonx(
+            watsonx_client=self._watsonx.watsonx_client,
+            model_id=model_id,
+            temperature=0.1,
+        ), call_name="ecommerce_workflow")
 
-            def validate_order_node(state: OrderState) -> Dict[str, Any]:
-                """Validates the order details."""
-                order_id = state.get("order_id")
-                items = state.get("items", [])
-                customer_info = state.get("customer_info", {})
+    def _chat_model_for(self, model_id: Optional[str]) -> BaseChatModel:
+        """Model factory for the router; injected chat models are used as they are."""
+        if model_id == self.router.strong_model_id:
+            return self.chat
+        if self.fast_chat is not None and model_id == self.router.fast_model_id:
+            return self.fast_chat
+        if self._watsonx is None:
+            logger.warning(f"No chat model for '{model_id}' next to the injected chat model; using the injected one.")
+            return self.chat
+        return self._watsonx_chat(model_id)
 
-                if not order_id or not items or not customer_info:
-                    logger.warning(f"Order {order_id}: Missing crucial information for validation.")
-                    return {"validation_status": "failed", "metadata": {"error": "Missing order details"}}
+    def _record_llm_call(self, step: str, route: str, started_at: float, prompt: str, message=None):
+        latency = time.perf_counter() - started_at
+        self.metrics.increment(f"llm_calls.{step}")
+        self.metrics.observe(f"llm_latency_s.{step}", latency)
+        if message is not None:
+            self.router.record(step, route, latency, message_tokens(message, prompt))
 
-                validation_prompt = f"""
+    def _invoke_llm(self, step: str, prompt: str, accept: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Calls the routed chat model for a graph step and records call count and latency. An answer from a
+        non-strong route that `accept` rejects is escalated to the strong model.
+        """
+        route = self.router.route(step, prompt)
+        while True:
+            started_at, message = time.perf_counter(), None
+            try:
+                message = self.router.model(route).invoke(prompt)
+            finally:
+                self._record_llm_call(step, route, started_at, prompt, message)
+            if route == STRONG or accept is None or accept(message.content):
+                return message.content
+            self.router.escalated(step, "answer rejected")
+            route = STRONG
+
+    async def _ainvoke_llm(self, step: str, prompt: str, accept: Optional[Callable[[str], bool]] = None) -> str:
+        """Async variant of `_invoke_llm`."""
+        route = self.router.route(step, prompt)
+        while True:
+            started_at, message = time.perf_counter(), None
+            try:
+                message = await self.router.model(route).ainvoke(prompt)
+            finally:
+                self._record_llm_call(step, route, started_at, prompt, message)
+            if route == STRONG or accept is None or accept(message.content):
+                return message.content
+            self.router.escalated(step, "answer rejected")
+            route = STRONG
+
+    async def warm_up(self):
+        """Sends one tiny prompt to every model the router can pick, so auth and connections are ready before traffic."""
+        if not self.compiled_graph:
+            raise RuntimeError("LangGraph workflow not initialized")
+        await asyncio.gather(*(self.router.model(route).ainvoke(WARM_UP_PROMPT) for route in self.router.warm_up_routes()))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Graph-level metrics: LLM calls made and avoided per step, and the LLM latency avoided."""
+        snapshot = self.metrics.snapshot()
+        counters = snapshot["counters"]
+        latency_avoided = 0.0
+        for step in ("validate_order", "confirm_shipping"):
+            latency_avoided += counters.get(f"llm_calls_avoided.{step}", 0) * self.metrics.mean(f"llm_latency_s.{step}")
+        snapshot["topology"] = self.topology
+        snapshot["llm_calls_total"] = sum(value for name, value in counters.items() if name.startswith("llm_calls."))
+        snapshot["llm_calls_avoided_total"] = sum(value for name, value in counters.items() if name.startswith("llm_calls_avoided."))
+        snapshot["llm_latency_avoided_s"] = round(latency_avoided, 4)
+        snapshot["shipping_report_mode"] = self.shipping_report_mode
+        if isinstance(self.chat, ManagedChatModel):
+            snapshot["rate_limiter"] = self.chat._limiter.stats()
+        snapshot["routing"] = self.router.report()
+        snapshot["prompts"] = self.prompt_budget.report()
+
+        scored = sum(counters.get(f"prescore.{decision}", 0) for decision in ("approve", "flag", "llm"))
+        snapshot["prescore"] = {
+            "auto_approved": counters.get("prescore.approve", 0),
+            "auto_flagged": counters.get("prescore.flag", 0),
+            "sent_to_llm": counters.get("prescore.llm", 0),
+            "malformed": counters.get("prescore.invalid", 0),
+            "llm_fraction_avoided": round((scored - counters.get("prescore.llm", 0)) / scored, 4) if scored else 0.0,
+        }
+        if self.speculative_shipping:
+            hits, wasted = counters.get("speculation.hits", 0), counters.get("speculation.wasted", 0)
+            saved = snapshot["observations"].get("speculation.latency_saved_s", {})
+            snapshot["speculation"] = {
+                "started": counters.get("speculation.started", 0),
+                "hits": hits,
+                "wasted": wasted,
+                "hit_rate": round(hits / (hits + wasted), 4) if hits + wasted else 0.0,
+                "skipped_over_budget": counters.get("speculation.skipped_budget", 0),
+                "latency_saved_s_total": round(saved.get("mean", 0) * saved.get("count", 0), 4) if saved else 0.0,
+                "latency_saved_s_mean": saved.get("mean") if saved else None,
+            }
+        return snapshot
+
+    # --- validate_order ---
+
+    def _payload(self, state: Dict[str, Any]) -> OrderPayload:
+        """The items and customer info referenced by a state."""
+        return self.payloads.get(state.get("order_ref"))
+
+    def _validation_prompt(self, state: OrderState) -> str:
+        payload = self._payload(state)
+        return self.prompt_budget.render("validate_order", """
                 Analyze the following order for potential fraud or inconsistencies:
                 Order ID: {order_id}
-                Items: {json.dumps(items)}
-                Customer Info: {json.dumps(customer_info)}
+                Items: {items}
+                Customer Info: {customer_info}
 
                 Based on typical e-commerce fraud patterns, is this order "valid" or "suspicious"?
                 Return a JSON object: {{"status": "valid/suspicious", "reason": "short explanation"}}
-                """
-                try:
-                    response = self.chat.invoke(validation_prompt).content
-                    validation_result = extract_json_from_text(response)
-                    status = validation_result.get("status", "suspicious")
-                    reason = validation_result.get("reason", "No specific reason provided.")
-                    logger.info(f"Order {order_id}: Validation status - {status} ({reason})")
-                    return {"validation_status": status, "metadata": {"validation_reason": reason}}
-                except Exception as e:
-                    logger.error(f"LLM validation failed for order {order_id}: {e}")
-                    return {"validation_status": "failed", "metadata": {"error": f"LLM validation error: {e}"}}
-
-            def check_inventory_node(state: OrderState) -> Dict[str, Any]:
-                """Checks inventory for order items."""
-                order_id = state.get("order_id")
-                items = state.get("items", [])
-                all_items_available = True
-                unavailable_items = []
-                for item in items:
-                    if "unavailable" in item.get("name", "").lower(): # Example for simulation
-                        all_items_available = False
-                        unavailable_items.append(item.get("name"))
-
-                if not all_items_available:
-                    logger.warning(f"Order {order_id}: Some items are out of stock: {', '.join(unavailable_items)}")
-                    return {"inventory_status": "out_of_stock", "metadata": {"unavailable_items": unavailable_items}}
-                else:
-                    logger.info(f"Order {order_id}: All items in stock.")
-                    return {"inventory_status": "in_stock"}
+                """, trimmable=("items", "customer_info"), order_id=state.get("order_id"), items=payload.items,
+                customer_info=payload.customer_info)
+
+    def _precheck_validation(self, state: OrderState) -> Optional[Dict[str, Any]]:
+        """Returns a final validation update when the LLM is not needed, otherwise None."""
+        order_id = state.get("order_id")
+        payload = self._payload(state)
+        if not order_id or not payload.items or not payload.customer_info:
+            logger.warning(f"Order {order_id}: Missing crucial information for validation.")
+            return {"validation_status": "failed", "metadata": {"error": "Missing order details"}}
+
+        prescore = state.get("fraud_prescore") or {}
+        decision = prescore.get("decision")
+        if decision in ("approve", "flag"):
+            status = "valid" if decision == "approve" else "suspicious"
+            reason = f"{'Auto-approved' if decision == 'approve' else 'Auto-flagged'} by local fraud pre-scoring (score {prescore.get('score')})."
+            self.metrics.increment(f"prescore.{decision}")
+            self.metrics.increment("llm_calls_avoided.validate_order")
+            logger.info(f"Order {order_id}: Validation status - {status} ({reason})")
+            return {"validation_status": status, "metadata": {"validation_reason": reason}}
+        if decision == "llm":
+            self.metrics.increment("prescore.llm")
+        if prescore.get("invalid"):
+            self.metrics.increment("prescore.invalid")
+            logger.warning(f"Order {order_id}: Malformed {', '.join(prescore['invalid'])}, left to the LLM validation.")
+        return None
+
+    @staticmethod
+    def _validation_answer_ok(response: str) -> bool:
+        """Whether a validation answer parses to a definite status (otherwise a fast-model answer is escalated)."""
+        return extract_json_from_text(response).get("status") in ("valid", "suspicious") and not is_low_confidence(response)
+
+    @staticmethod
+    def _parse_validation(order_id: str, response: str) -> Dict[str, Any]:
+        validation_result = extract_json_from_text(response)
+        status = validation_result.get("status", "suspicious")
+        reason = validation_result.get("reason", "No specific reason provided.")
+        logger.info(f"Order {order_id}: Validation status - {status} ({reason})")
+        return {"validation_status": status, "metadata": {"validation_reason": reason}}
+
+    def _validate_order_node(self, state: OrderState) -> Dict[str, Any]:
+        """Validates the order details."""
+        precheck = self._precheck_validation(state)
+        if precheck:
+            return self._release_if_rejected(state.get("order_id"), precheck)
+        order_id = state.get("order_id")
+        try:
+            response = self._invoke_llm("validate_order", self._validation_prompt(state), accept=self._validation_answer_ok)
+            return self._release_if_rejected(order_id, self._parse_validation(order_id, response))
+        except Exception as e:
+            logger.error(f"LLM validation failed for order {order_id}: {e}")
+            return self._release_if_rejected(order_id, {"validation_status": "failed", "metadata": {"error": f"LLM validation error: {e}"}})
+
+    async def _avalidate_order_node(self, state: OrderState) -> Dict[str, Any]:
+        """Validates the order details without blocking the event loop, packed with other orders when batching is enabled."""
+        precheck = self._precheck_validation(state)
+        if precheck:
+            return self._release_if_rejected(state.get("order_id"), precheck)
+        order_id = state.get("order_id")
+        self._start_speculation(state)
+        if self._validation_batcher is None:
+            update = await self._avalidate_with_llm(state)
+        else:
+            try:
+                update = await self._validation_batcher.submit(state)
+            except Exception as e:
+                logger.error(f"Batched LLM validation failed for order {order_id}: {e}")
+                update = {"validation_status": "failed", "metadata": {"error": f"LLM validation error: {e}"}}
+        if self.speculative_shipping:
+            self._validation_outcomes.append(self._may_ship(update))
+        if not self._may_ship(update):
+            await self._discard_speculation(order_id, "validation")
+        return self._release_if_rejected(order_id, update)
+
+    async def _avalidate_with_llm(self, state: OrderState) -> Dict[str, Any]:
+        """Validates a single order with its own LLM call."""
+        order_id = state.get("order_id")
+        try:
+            response = await self._ainvoke_llm("validate_order", self._validation_prompt(state), accept=self._validation_answer_ok)
+            return self._parse_validation(order_id, response)
+        except Exception as e:
+            logger.error(f"LLM validation failed for order {order_id}: {e}")
+            return {"validation_status": "failed", "metadata": {"error": f"LLM validation error: {e}"}}
+
+    def _packed_validation_prompt(self, states: List[OrderState]) -> str:
+        orders = []
+        for state in states:
+            payload = self._payload(state)
+            orders.append({"order_id": str(state.get("order_id")), "items": payload.items, "customer_info": payload.customer_info})
+        # Not trimmable: cutting the list would silently drop orders from the batch
+        return self.prompt_budget.render("validate_order_batch", """
+                Analyze each of the following orders for potential fraud or inconsistencies:
+                Orders: {orders}
+
+                Based on typical e-commerce fraud patterns, decide for every order whether it is "valid" or "suspicious".
+                Return only a JSON array with exactly one object per order: [{{"order_id": "...", "status": "valid/suspicious", "reason": "short explanation"}}]
+                """, orders=orders)
+
+    async def _validate_order_batch(self, states: List[OrderState]) -> List[Dict[str, Any]]:
+        """
+        Validates a micro-batch of orders with one packed LLM call and routes each answer back by order_id.
+        Orders missing from a malformed or incomplete answer fall back to individual calls.
+        """
+        if len(states) == 1:
+            return [await self._avalidate_with_llm(states[0])]
+
+        answers = {}
+        try:
+            response = await self._ainvoke_llm("validate_order_batch", self._packed_validation_prompt(states),
+                                               accept=lambda answer: bool(extract_json_array_from_text(answer)))
+            for entry in extract_json_array_from_text(response):
+                if isinstance(entry, dict) and entry.get("status") in ("valid", "suspicious") and entry.get("order_id") is not None:
+                    answers[str(entry["order_id"])] = entry
+        except Exception as e:
+            logger.warning(f"Packed LLM validation of {len(states)} orders failed, falling back to individual calls: {e}")
+
+        missing = [state for state in states if str(state.get("order_id")) not in answers]
+        if missing:
+            self.metrics.increment("validation_batch.fallback_orders", len(missing))
+        fallback = dict(zip(
+            (str(state.get("order_id")) for state in missing),
+            await asyncio.gather(*(self._avalidate_with_llm(state) for state in missing))
+        ))
+
+        updates = []
+        for state in states:
+            order_id = str(state.get("order_id"))
+            if order_id in fallback:
+                updates.append(fallback[order_id])
+            else:
+                updates.append(self._parse_validation(order_id, json.dumps(answers[order_id])))
+        return updates
+
+    # --- check_inventory ---
+
+    def _release_if_rejected(self, order_id: str, update: Dict[str, Any]) -> Dict[str, Any]:
+        """Gives reserved stock back when an order that may not ship fails validation after its items were reserved."""
+        if self.inventory is not None and self.topology == "inventory_first" and not self._may_ship(update):
+            self.inventory.release(order_id)
+        return update
+
+    def _abandon_order(self, order_id: str):
+        """Releases any stock held by an order whose graph run raised."""
+        if self.inventory is not None and order_id:
+            self.inventory.release(order_id)
+
+    async def _aabandon_order(self, order_id: str):
+        """Async variant of `_abandon_order` that also stops the order's speculative shipping report."""
+        await self._discard_speculation(order_id, "error")
+        self._abandon_order(order_id)
+
+    def _check_inventory_node(self, state: OrderState) -> Dict[str, Any]:
+        """Checks inventory for order items, reserving all of them in one atomic call when an inventory index is configured."""
+        order_id = state.get("order_id")
+        items = self._payload(state).items
+        if self.inventory is not None:
+            reservation = self.inventory.reserve(order_id, items)
+            if not reservation["reserved"]:
+                logger.warning(f"Order {order_id}: Some items are out of stock: {', '.join(map(str, reservation['unavailable_items']))}")
+                metadata = {"unavailable_items": reservation["unavailable_items"]}
+                if reservation.get("invalid_items"):
+                    metadata["invalid_items"] = reservation["invalid_items"]
+                return {"inventory_status": "out_of_stock", "metadata": metadata}
+            logger.info(f"Order {order_id}: All items in stock and reserved.")
+            return {"inventory_status": "in_stock"}
+
+        all_items_available = True
+        unavailable_items = []
+        for item in items:
+            if "unavailable" in item.get("name", "").lower(): # Example for simulation
+                all_items_available = False
+                unavailable_items.append(item.get("name"))
+
+        if not all_items_available:
+            logger.warning(f"Order {order_id}: Some items are out of stock: {', '.join(unavailable_items)}")
+            return {"inventory_status": "out_of_stock", "metadata": {"unavailable_items": unavailable_items}}
+        else:
+            logger.info(f"Order {order_id}: All items in stock.")
+            return {"inventory_status": "in_stock"}
+
+    async def _acheck_inventory_node(self, state: OrderState) -> Dict[str, Any]:
+        """Inventory checks are local and fast, so the async variant runs them inline instead of in a thread."""
+        update = self._check_inventory_node(state)
+        if update["inventory_status"] != "in_stock":
+            await self._discard_speculation(state.get("order_id"), "inventory")
+        return update
+
+    # --- speculative shipping ---
+
+    def _speculation_within_budget(self) -> bool:
+        """
+        A speculative report is wasted whenever the LLM validation rejects the order, so speculation pauses while
+        more than `speculation_waste_budget` of the recent LLM validations failed. The window keeps updating while
+        paused, so speculation resumes as soon as the pass rate recovers.
+        """
+        if len(self._validation_outcomes) < 10:
+            return True
+        return self._validation_outcomes.count(False) / len(self._validation_outcomes) <= self.speculation_waste_budget
 
-            def confirm_shipping_node(state: OrderState) -> Dict[str, Any]:
-                """Confirms shipping details and generates a report."""
-                order_id = state.get("order_id")
-                items = state.get("items", [])
-                customer_info = state.get("customer_info", {})
+    def _start_speculation(self, state: OrderState):
+        """Starts the shipping report LLM call next to the LLM validation of a likely-valid order."""
+        if not self.speculative_shipping:
+            return
+        order_id = state.get("order_id")
+        prescore = state.get("fraud_prescore") or {}
+        score = prescore.get("score")
+        if not order_id or order_id in self._speculations or prescore.get("invalid") \
+                or (score is not None and score > self.speculation_max_fraud_score):
+            return
+        if not self._speculation_within_budget():
+            self.metrics.increment("speculation.skipped_budget")
+            return
+        self.metrics.increment("speculation.started")
+        task = asyncio.get_running_loop().create_task(
+            self._ainvoke_llm("confirm_shipping_speculative", self._shipping_prompt(state, "shipped"), accept=self._shipping_answer_ok)
+        )
+        self._speculations[order_id] = (task, time.perf_counter())
 
-                shipping_status = "shipped"
-                shipping_notes = f"Order {order_id} containing {len(items)} items for {customer_info.get('name')} at {customer_info.get('address')} has been processed and shipped."
+    async def _discard_speculation(self, order_id: str, reason: str):
+        """
+        Cancels a speculative shipping report for an order that will not ship, and waits for the cancelled
+        call to unwind so its rate limiter slot is free again when this returns.
+        """
+        speculation = self._speculations.pop(order_id, None) if order_id else None
+        if speculation is None:
+            return
+        task, _ = speculation
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self.metrics.increment("speculation.wasted")
+        self.metrics.increment(f"speculation.wasted.{reason}")
 
-                report_prompt = f"""
+    async def _take_speculation(self, order_id: str) -> Optional[str]:
+        """Returns the speculative shipping report for an order, or None if there is none or it failed."""
+        speculation = self._speculations.pop(order_id, None) if order_id else None
+        if speculation is None:
+            return None
+        task, started_at = speculation
+        needed_at = time.perf_counter()
+        try:
+            report = await task
+        except Exception as e:
+            logger.warning(f"Speculative shipping report failed for order {order_id}, generating it again: {e}")
+            self.metrics.increment("speculation.failed")
+            return None
+        # The report was in flight for (needed_at - started_at) before the shipping node needed it
+        finished_at = time.perf_counter()
+        self.metrics.observe("speculation.latency_saved_s", min(needed_at - started_at, finished_at - started_at))
+        self.metrics.increment("speculation.hits")
+        return report
+
+    # --- confirm_shipping ---
+
+    def _shipping_prompt(self, state: OrderState, shipping_status: str) -> str:
+        order_id = state.get("order_id")
+        payload = self._payload(state)
+        items, customer_info = payload.items, payload.customer_info
+        shipping_notes = f"Order {order_id} containing {len(items)} items for {customer_info.get('name')} at {customer_info.get('address')} has been processed and shipped."
+
+        return self.prompt_budget.render("confirm_shipping", """
                 Generate a concise, customer-friendly shipping confirmation message for the following order:
                 Order ID: {order_id}
-                Items: {json.dumps(items)}
-                Customer Name: {customer_info.get('name')}
-                Shipping Address: {customer_info.get('address')}
+                Items: {items}
+                Customer Name: {customer_name}
+                Shipping Address: {address}
                 Shipping Status: {shipping_status}
                 Notes: {shipping_notes}
 
                 Focus on clarity and confirmation.
-                """
-                try:
-                    report_message = self.chat.invoke(report_prompt).content
-                    logger.info(f"Order {order_id}: Shipping confirmed.")
-                    return {"shipping_status": shipping_status, "processed_report": report_message}
-                except Exception as e:
-                    logger.error(f"LLM report generation failed for order {order_id}: {e}")
-                    return {"shipping_status": "confirmed_with_error", "processed_report": f"Shipping confirmed for {order_id}, but report generation failed: {e}"}
+                """, trimmable=("items",), order_id=order_id, items=items, customer_name=customer_info.get('name'),
+                address=customer_info.get('address'), shipping_status=shipping_status, shipping_notes=shipping_notes)
 
-            self.graph = StateGraph(OrderState)
-            self.graph.add_node("validate_order", validate_order_node)
-            self.graph.add_node("check_inventory", check_inventory_node)
-            self.graph.add_node("confirm_shipping", confirm_shipping_node)
-
-            self.graph.add_edge(START, "validate_order")
-            self.graph.add_edge("validate_order", "check_inventory")
-
-            self.graph.add_conditional_edges(
-                "check_inventory",
-                lambda state: "confirm_shipping" if state["inventory_status"] == "in_stock" else END,
-                {
-                    "confirm_shipping": "confirm_shipping",
-                    END: END 
-                }
-            )
-            self.graph.add_edge("confirm_shipping", END)
+    @staticmethod
+    def _shipping_answer_ok(response: str) -> bool:
+        return not is_low_confidence(response)
 
-            self.compiled_graph = self.graph.compile()
-            logger.info("LangGraph e-commerce workflow initialized successfully.")
+    def _render_shipping_report(self, state: OrderState, shipping_status: str) -> str:
+        self.metrics.increment("shipping_report.template")
+        self.metrics.increment("llm_calls_avoided.confirm_shipping")
+        payload = self._payload(state)
+        return self.shipping_renderer.render(state.get("order_id"), payload.items, payload.customer_info, shipping_status)
 
-        except ImportError as e:
-            logger.error(f"LangGraph dependencies not installed: {e}. Please install 'langchain-ibm', 'langgraph', 'langchain-core', 'typing-extensions'.")
-            self.graph = None
-            self.compiled_graph = None
+    def _should_personalize(self, order_id: str) -> bool:
+        """Deterministic per-order sampling, so a resumed or retried order makes the same choice."""
+        if self.personalization_rate <= 0:
+            return False
+        return zlib.crc32(str(order_id).encode("utf-8")) % 10_000 < self.personalization_rate * 10_000
+
+    def _store_personalized_report(self, order_id: str, report: str):
+        self.personalized_reports[order_id] = report
+        while len(self.personalized_reports) > 10_000:
+            self.personalized_reports.popitem(last=False)
+
+    def _personalize(self, order_id: str, prompt: str):
+        try:
+            self._store_personalized_report(order_id, self._invoke_llm("personalize_shipping", prompt, accept=self._shipping_answer_ok))
+            self.metrics.increment("personalization.completed")
         except Exception as e:
-            logger.error(f"Error setting up LangGraph: {e}")
-            self.graph = None
-            self.compiled_graph = None
+            logger.warning(f"Shipping message personalization failed for order {order_id}: {e}")
+            self.metrics.increment("personalization.failed")
 
-    def process_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _apersonalize(self, order_id: str, prompt: str):
+        try:
+            self._store_personalized_report(order_id, await self._ainvoke_llm("personalize_shipping", prompt, accept=self._shipping_answer_ok))
+            self.metrics.increment("personalization.completed")
+        except Exception as e:
+            logger.warning(f"Shipping message personalization failed for order {order_id}: {e}")
+            self.metrics.increment("personalization.failed")
+
+    def _confirm_shipping_node(self, state: OrderState) -> Dict[str, Any]:
+        """Confirms shipping details and generates a report."""
+        order_id = state.get("order_id")
+        shipping_status = "shipped"
+        if self.inventory is not None:
+            self.inventory.commit(order_id)
+        if self.shipping_report_mode == "template":
+            report_message = self._render_shipping_report(state, shipping_status)
+            if self._should_personalize(order_id):
+                if self._personalization_pool is None:
+                    self._personalization_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="personalize")
+                self.metrics.increment("personalization.scheduled")
+                # The prompt is built now: the order's payload is released as soon as the graph run ends.
+                # The copied context keeps the personalization call in the order's trace.
+                self._personalization_pool.submit(contextvars.copy_context().run, self._personalize, order_id,
+                                                  self._shipping_prompt(state, shipping_status))
+            logger.info(f"Order {order_id}: Shipping confirmed.")
+            return {"shipping_status": shipping_status, "processed_report": report_message}
+        try:
+            report_message = self._invoke_llm("confirm_shipping", self._shipping_prompt(state, shipping_status), accept=self._shipping_answer_ok)
+            logger.info(f"Order {order_id}: Shipping confirmed.")
+            return {"shipping_status": shipping_status, "processed_report": report_message}
+        except Exception as e:
+            logger.error(f"LLM report generation failed for order {order_id}: {e}")
+            return {"shipping_status": "confirmed_with_error", "processed_report": f"Shipping confirmed for {order_id}, but report generation failed: {e}"}
+
+    async def _aconfirm_shipping_node(self, state: OrderState) -> Dict[str, Any]:
+        """Confirms shipping details and generates a report without blocking the event loop."""
+        order_id = state.get("order_id")
+        shipping_status = "shipped"
+        if self.inventory is not None:
+            self.inventory.commit(order_id)
+        if self.shipping_report_mode == "template":
+            report_message = self._render_shipping_report(state, shipping_status)
+            if self._should_personalize(order_id):
+                self.metrics.increment("personalization.scheduled")
+                task = asyncio.get_running_loop().create_task(self._apersonalize(order_id, self._shipping_prompt(state, shipping_status)))
+                self._personalization_tasks.add(task)
+                task.add_done_callback(self._personalization_tasks.discard)
+            logger.info(f"Order {order_id}: Shipping confirmed.")
+            return {"shipping_status": shipping_status, "processed_report": report_message}
+        try:
+            report_message = await self._take_speculation(order_id)
+            if report_message is None:
+                report_message = await self._ainvoke_llm("confirm_shipping", self._shipping_prompt(state, shipping_status), accept=self._shipping_answer_ok)
+            logger.info(f"Order {order_id}: Shipping confirmed.")
+            return {"shipping_status": shipping_status, "processed_report": report_message}
+        except Exception as e:
+            logger.error(f"LLM report generation failed for order {order_id}: {e}")
+            return {"shipping_status": "confirmed_with_error", "processed_report": f"Shipping confirmed for {order_id}, but report generation failed: {e}"}
+
+    async def drain_personalization(self):
+        """Waits for background personalization started on the current event loop and in the worker threads."""
+        tasks = [task for task in self._personalization_tasks if task.get_loop() is asyncio.get_running_loop()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._personalization_pool is not None:
+            pool, self._personalization_pool = self._personalization_pool, None
+            await asyncio.to_thread(pool.shutdown, wait=True)
+
+    def process_order(self, order_data: Dict[str, Any], detail_level: Optional[str] = None) -> Dict[str, Any]:
         """Processes an e-commerce order using the LangGraph workflow."""
         if not self.compiled_graph:
             return {"error": "LangGraph not available", "framework": "langgraph"}
 
+        state, finished = None, False
         try:
-            initial_state = {
-                "order_id": order_data.get("order_id"),
-                "items": order_data.get("items"),
-                "customer_info": order_data.get("customer_info"),
-                "validation_status": "",
-                "inventory_status": "",
-                "shipping_status": "",
-                "processed_report": "",
-                "metadata": {}
-            }
+            state = self._initial_states([order_data])[0]
             logger.info(f"LangGraph: Processing order {order_data.get('order_id')}...")
-            result = self.compiled_graph.invoke(initial_state)
-
-            final_report = result.get("processed_report", "Order processing completed. No specific report generated or an error occurred.")
-            status = "completed" if "error" not in result.get("metadata", {}) else "failed"
-            if result.get("validation_status") == "suspicious":
-                status = "flagged_suspicious"
-            elif result.get("inventory_status") == "out_of_stock":
-                status = "items_unavailable"
-
-            return {
-                "order_processing_status": status,
-                "final_report": final_report,
-                "detailed_state": result,
-                "framework": "langgraph",
-                "status": "completed"
-            }
+            with get_tracer().span("ecommerce.process_order", SERVER, {"order_id": order_data.get("order_id")}), \
+                    deadline(self.config.order_deadline_s):
+                result = self.compiled_graph.invoke(state, self._run_config(order_data.get("order_id")))
+            finished = True
+            return self._format_result(result, detail_level)
+        except Exception as e:
+            logger.error(f"LangGraph order processing failed for order {order_data.get('order_id')}: {e}")
+            self._abandon_order(order_data.get("order_id"))
+            return {"error": str(e), "framework": "langgraph"}
+        finally:
+            if state is not None:
+                self._discard_payload(state["order_ref"], finished)
+
+    async def aprocess_order(self, order_data: Dict[str, Any], detail_level: Optional[str] = None) -> Dict[str, Any]:
+        """Processes an e-commerce order using the async graph nodes."""
+        if not self.compiled_graph:
+            return {"error": "LangGraph not available", "framework": "langgraph"}
+
+        state, finished = None, False
+        try:
+            state = (await self._ainitial_states([order_data]))[0]
+            logger.info(f"LangGraph: Processing order {order_data.get('order_id')} (async)...")
+            with get_tracer().span("ecommerce.process_order", SERVER, {"order_id": order_data.get("order_id")}), \
+                    deadline(self.config.order_deadline_s):
+                async with self._agraph() as graph:
+                    result = await graph.ainvoke(state, self._run_config(order_data.get("order_id")))
+            finished = True
+            return self._format_result(result, detail_level)
         except Exception as e:
             logger.error(f"LangGraph order processing failed for order {order_data.get('order_id')}: {e}")
+            await self._aabandon_order(order_data.get("order_id"))
             return {"error": str(e), "framework": "langgraph"}
+        finally:
+            if state is not None:
+                await self._adiscard_payload(state["order_ref"], finished)
+
+    async def process_orders(self, orders: List[Dict[str, Any]], max_concurrency: int = 16,
+                             detail_level: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Processes many orders with at most `max_concurrency` graph runs in flight, yielding each
+        result as soon as it completes. Every result carries `order_index`, `order_id` and `latency_s`.
+        """
+        if not self.compiled_graph:
+            for index, order_data in enumerate(orders):
+                yield {"error": "LangGraph not available", "framework": "langgraph", "order_index": index, "order_id": order_data.get("order_id")}
+            return
+
+        async with self._agraph() as graph:
+            async def timed_run(job):
+                # Each order's state is built inside its own run, so a malformed order fails alone
+                order_data, prescore = job
+                started_at = time.perf_counter()
+                state, finished = None, False
+                try:
+                    state = await asyncio.to_thread(self._initial_state, order_data, prescore)
+                    with get_tracer().span("ecommerce.process_order", SERVER, {"order_id": state.get("order_id")}), \
+                            deadline(self.config.order_deadline_s):
+                        final_state = await graph.ainvoke(state, self._run_config(state.get("order_id")))
+                    finished = True
+                    result = self._format_result(final_state, detail_level)
+                    result["latency_s"] = round(time.perf_counter() - started_at, 4)
+                    return result
+                finally:
+                    if state is not None:
+                        await self._adiscard_payload(state["order_ref"], finished)
+
+            prescores = await asyncio.to_thread(self._prescore, orders)
+            logger.info(f"LangGraph: Processing {len(orders)} orders (max_concurrency={max_concurrency})...")
+            async for index, output in RunnableLambda(timed_run).abatch_as_completed(
+                list(zip(orders, prescores)),
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True
+            ):
+                if isinstance(output, Exception):
+                    logger.error(f"LangGraph order processing failed for order {orders[index].get('order_id')}: {output}")
+                    await self._aabandon_order(orders[index].get("order_id"))
+                    result = {"error": str(output), "framework": "langgraph", "latency_s": None}
+                else:
+                    result = output
+                result["order_index"] = index
+                result["order_id"] = orders[index].get("order_id")
+                yield result
+
+    async def stream_order(self, order_data: Dict[str, Any], detail_level: Optional[str] = None) -> AsyncIterator[StreamEvent]:
+        """
+        Streams order processing as typed events: node_started / token / node_finished (with the node's
+        state delta) for each graph node, then run_finished with the result and time-to-first-token.
+        """
+        if not self.compiled_graph:
+            yield StreamEvent(RUN_FINISHED, data={"error": "LangGraph not available", "framework": "langgraph"})
+            return
+
+        state, finished = None, False
+        try:
+            state = (await self._ainitial_states([order_data]))[0]
+            logger.info(f"LangGraph: Streaming order {order_data.get('order_id')}...")
+            with get_tracer().span("ecommerce.process_order", SERVER, {"order_id": order_data.get("order_id")}), \
+                    deadline(self.config.order_deadline_s):
+                async with self._agraph() as graph:
+                    async for event in stream_runnable_events(
+                        graph,
+                        state,
+                        ORDER_GRAPH_NODES,
+                        lambda final_state, _: self._format_result(final_state, detail_level),
+                        config=self._run_config(order_data.get("order_id"))
+                    ):
+                        yield event
+            finished = True
+        except Exception as e:
+            logger.error(f"LangGraph order stream failed for order {order_data.get('order_id')}: {e}")
+            await self._aabandon_order(order_data.get("order_id"))
+            yield StreamEvent(RUN_FINISHED, data={"error": str(e), "framework": "langgraph"})
+        finally:
+            if state is not None:
+                await self._adiscard_payload(state["order_ref"], finished)
+
+    def _discard_payload(self, order_ref: Optional[str], finished: bool):
+        """Drops an order's payload. A failure is only logged, so cleanup never replaces or aborts a finished result."""
+        try:
+            self.payloads.discard(order_ref, finished)
+        except Exception as e:
+            logger.warning(f"Could not discard the stored payload {order_ref}: {e}")
+
+    async def _adiscard_payload(self, order_ref: Optional[str], finished: bool):
+        """Drops an order's payload off the event loop, since deleting stored rows writes to SQLite."""
+        await asyncio.to_thread(self._discard_payload, order_ref, finished)
+
+    async def _ainitial_states(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """_initial_states off the event loop, since storing the payloads writes to SQLite."""
+        return await asyncio.to_thread(self._initial_states, orders)
+
+    def _initial_states(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Builds graph input states, pre-scoring the whole batch for fraud in one vectorized pass."""
+        return [self._initial_state(order_data, prescore) for order_data, prescore in zip(orders, self._prescore(orders))]
+
+    def _prescore(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Local fraud pre-scores for a batch of orders. If scoring fails, every order goes to the LLM instead."""
+        if not self.fraud_scorer:
+            return [{} for _ in orders]
+        try:
+            return self.fraud_scorer.score_orders(orders)
+        except Exception as e:
+            logger.warning(f"Fraud pre-scoring failed for a batch of {len(orders)} orders, validating them with the LLM: {e}")
+            return [{} for _ in orders]
+
+    def _initial_state(self, order_data: Dict[str, Any], fraud_prescore: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Builds the graph input state for an order, moving its payload into the payload store."""
+        return {
+            "order_id": order_data.get("order_id"),
+            "order_ref": self.payloads.put(order_data),
+            "validation_status": "",
+            "inventory_status": "",
+            "shipping_status": "",
+            "processed_report": "",
+            # Resets metadata merged into by an earlier run of the same checkpointed order
+            "metadata": {RESET_METADATA: True},
+            "fraud_prescore": fraud_prescore or {}
+        }
+
+    def _format_result(self, result: Dict[str, Any], detail_level: Optional[str] = None) -> Dict[str, Any]:
+        """Converts the final graph state into the public order result at the requested detail level."""
+        detail_level = detail_level or self.result_detail_level
+        metadata = result.get("metadata") or {}
+        final_report = result.get("processed_report", "Order processing completed. No specific report generated or an error occurred.")
+        status = "completed" if "error" not in metadata else "failed"
+        if result.get("validation_status") == "suspicious":
+            status = "flagged_suspicious"
+        elif result.get("inventory_status") == "out_of_stock":
+            status = "items_unavailable"
+
+        formatted = {
+            "order_id": result.get("order_id"),
+            "order_processing_status": status,
+            "final_report": final_report,
+            "framework": "langgraph",
+            "status": "completed"
+        }
+        if detail_level == "standard":
+            formatted["validation_status"] = result.get("validation_status", "")
+            formatted["inventory_status"] = result.get("inventory_status", "")
+            formatted["shipping_status"] = result.get("shipping_status", "")
+            formatted["metadata"] = metadata
+        elif detail_level == "full":
+            payload = self._payload(result)
+            formatted["detailed_state"] = {**result, "items": payload.items, "customer_info": payload.customer_info}
+        return formatted
 
 def get_test_order_data(scenario: str) -> Dict[str, Any]:
     """Provides sample order data for different scenarios."""
@@ -242,38 +1088,202 @@ def get_test_order_data(scenario: str) -> Dict[str, Any]:
     else:
         return {}
 
+def get_test_inventory(stock_level: int = 100) -> InventoryIndex:
+    """Provides a sample inventory matching the test orders; the limited edition collectible is sold out."""
+    inventory = InventoryIndex()
+    inventory.bulk_load([
+        ("P001", stock_level, "Laptop Pro"),
+        ("P002", stock_level, "Wireless Mouse"),
+        ("P003", stock_level, "High-End Graphics Card"),
+        ("P004", 0, "Limited Edition Collectible (unavailable)"),
+        ("P005", stock_level, "Keyboard"),
+    ])
+    return inventory
+
+async def benchmark_order_throughput(workflow: LangGraphEcommerceWorkflow, orders: List[Dict[str, Any]],
+                                     concurrency_levels=(1, 4, 16, 64)) -> Dict[str, Any]:
+    """Measures orders per second and per-order latency percentiles of `process_orders` at several concurrency levels."""
+    report = {}
+    for max_concurrency in concurrency_levels:
+        latencies = []
+        started_at = time.perf_counter()
+        async for result in workflow.process_orders(orders, max_concurrency=max_concurrency):
+            if result.get("latency_s") is not None:
+                latencies.append(result["latency_s"])
+        elapsed = time.perf_counter() - started_at
+        latencies.sort()
+        report[max_concurrency] = {
+            "orders": len(orders),
+            "failed": len(orders) - len(latencies),
+            "elapsed_s": round(elapsed, 3),
+            "orders_per_second": round(len(orders) / elapsed, 2) if elapsed > 0 else None,
+            "p50_latency_s": latencies[len(latencies) // 2] if latencies else None,
+            "p95_latency_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+        }
+        logger.info(f"Benchmark max_concurrency={max_concurrency}: {report[max_concurrency]['orders_per_second']} orders/s")
+    return report
+
 async def main():
     """Main function to demonstrate LangGraph e-commerce workflow."""
     print("\n" + "=" * 60)
     print("🛒 LANGGRAPH E-COMMERCE WORKFLOW SHOWCASE")
     print("=" * 60)
 
-    config = Config()
+    config = get_config()
     if not config.validate():
         print("Watsonx configuration is invalid. Please set environment variables or update watsonx_config.py.")
         return
 
-    workflow = LangGraphEcommerceWorkflow(config)
+    workflow = LangGraphEcommerceWorkflow(config, inventory=get_test_inventory())
+
+    # Run the valid, suspicious and out of stock scenarios concurrently; results print as they complete
+    orders = [get_test_order_data("valid"), get_test_order_data("suspicious"), get_test_order_data("out_of_stock")]
+    print(f"\nProcessing Orders: {', '.join(order['order_id'] for order in orders)}")
+    async for result in workflow.process_orders(orders, max_concurrency=3, detail_level="standard"):
+        print(f"\nResult for Order: {result['order_id']} ({result.get('latency_s')}s)")
+        print(json.dumps(result, indent=2))
+    await workflow.drain_personalization()
+    for order_id, report in workflow.personalized_reports.items():
+        print(f"\nPersonalized confirmation for Order: {order_id}\n{report}")
+    print("\nGraph Metrics:")
+    print(json.dumps(workflow.get_metrics(), indent=2))
+
+async def benchmark_validation_batching(orders: List[Dict[str, Any]], batch_sizes=(1, 8, 32), max_concurrency: int = 64,
+                                       llm_latency_s: float = 0.2, llm_latency_per_1k_chars_s: float = 0.01,
+                                       llm_max_concurrent_requests: int = 16) -> Dict[str, Any]:
+    """
+    Compares the per-order validation path (batch size 1) with packed validation prompts against the mock LLM,
+    which models a fixed per-request overhead and a provider that serves a limited number of requests at once.
+    Fraud pre-scoring is disabled so every order needs an LLM validation.
+    """
+    from utils.mock_llm import MockChatModel
 
-    # Run valid order scenario
-    valid_order = get_test_order_data("valid")
-    print(f"\nProcessing Valid Order: {valid_order['order_id']}")
-    valid_result = workflow.process_order(valid_order)
-    print(json.dumps(valid_result, indent=2))
+    config = Config()
+    config.fraud_prescoring_enabled = False
+    report = {}
+    for batch_size in batch_sizes:
+        workflow = LangGraphEcommerceWorkflow(
+            config,
+            chat_model=MockChatModel(latency_s=llm_latency_s, latency_per_1k_chars_s=llm_latency_per_1k_chars_s,
+                                     max_concurrent_requests=llm_max_concurrent_requests),
+            inventory=get_test_inventory(stock_level=10_000_000),
+            validation_batch_size=batch_size
+        )
+        result = await benchmark_order_throughput(workflow, orders, concurrency_levels=(max_concurrency,))
+        metrics = workflow.get_metrics()
+        report[batch_size] = {
+            **result[max_concurrency],
+            "llm_calls": metrics["llm_calls_total"],
+            "mean_batch_size": metrics["observations"].get("validation_batch.batch_size", {}).get("mean"),
+            "mean_added_queue_wait_s": metrics["observations"].get("validation_batch.queue_wait_s", {}).get("mean"),
+        }
+    baseline = report[batch_sizes[0]]["orders_per_second"] or 0
+    for batch_size in batch_sizes:
+        report[batch_size]["throughput_gain"] = round(report[batch_size]["orders_per_second"] / baseline, 2) if baseline else None
+    return report
+
+async def benchmark_result_footprint(order_count: int = 300, detail_levels=RESULT_DETAIL_LEVELS) -> Dict[str, Any]:
+    """
+    Measures the per-order footprint of results and checkpoints against the mock LLM: serialized result size
+    (indented and compact JSON), json.dumps time, memory retained by the collected results (tracemalloc)
+    and SQLite checkpoint bytes.
+    """
+    import gc
+    import os
+    import tempfile
+    import tracemalloc
+    from utils.mock_llm import MockChatModel
+
+    scenarios = ["valid", "suspicious", "out_of_stock"]
+    orders = []
+    for i in range(order_count):
+        order = get_test_order_data(scenarios[i % len(scenarios)])
+        order["order_id"] = f"SIZE_{i:05d}"
+        orders.append(order)
+
+    report = {}
+    for detail_level in detail_levels:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint_db = os.path.join(tmp_dir, "checkpoints.db")
+            workflow = LangGraphEcommerceWorkflow(
+                Config(),
+                chat_model=MockChatModel(latency_s=0.0),
+                inventory=get_test_inventory(stock_level=10_000_000),
+                checkpoint_db=checkpoint_db,
+                result_detail_level=detail_level
+            )
+            gc.collect()
+            tracemalloc.start()
+            allocated_before = tracemalloc.get_traced_memory()[0]
+            results = [result async for result in workflow.process_orders(orders)]
+            retained = tracemalloc.get_traced_memory()[0] - allocated_before
+            tracemalloc.stop()
+            if len(workflow.payloads):
+                logger.warning(f"{len(workflow.payloads)} order payloads were not released.")
+
+            gc.collect()
+            started_at = time.perf_counter()
+            indented = [json.dumps(result, indent=2, default=str) for result in results]
+            dumps_s = time.perf_counter() - started_at
+            compact = [json.dumps(result, separators=(",", ":"), default=str) for result in results]
+            with sqlite3.connect(checkpoint_db) as conn:
+                checkpoint_bytes = conn.execute("SELECT COALESCE(SUM(LENGTH(checkpoint)), 0) FROM checkpoints").fetchone()[0]
+                write_bytes = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes").fetchone()[0]
 
-    # Run suspicious order scenario
-    suspicious_order = get_test_order_data("suspicious")
-    print(f"\nProcessing Suspicious Order: {suspicious_order['order_id']}")
-    suspicious_result = workflow.process_order(suspicious_order)
-    print(json.dumps(suspicious_result, indent=2))
+        report[detail_level] = {
+            "result_bytes_indented": sum(map(len, indented)) // order_count,
+            "result_bytes_compact": sum(map(len, compact)) // order_count,
+            "json_dumps_us": round(dumps_s / order_count * 1e6, 1),
+            "retained_bytes": retained // order_count,
+            "checkpoint_bytes": checkpoint_bytes // order_count,
+            "checkpoint_write_bytes": write_bytes // order_count,
+        }
+    return report
 
-    # Run out of stock scenario
-    out_of_stock_order = get_test_order_data("out_of_stock")
-    print(f"\nProcessing Out-of-Stock Order: {out_of_stock_order['order_id']}")
-    out_of_stock_result = workflow.process_order(out_of_stock_order)
-    print(json.dumps(out_of_stock_result, indent=2))
+async def run_benchmark(order_count: int = 200, llm_latency_s: float = 0.05):
+    """Benchmarks order throughput against the offline mock LLM."""
+    from utils.mock_llm import MockChatModel
+
+    workflow = LangGraphEcommerceWorkflow(
+        Config(),
+        chat_model=MockChatModel(latency_s=llm_latency_s, jitter_s=llm_latency_s / 2),
+        inventory=get_test_inventory(stock_level=10_000_000)
+    )
+    scenarios = ["valid", "suspicious", "out_of_stock"]
+    orders = []
+    for i in range(order_count):
+        order = get_test_order_data(scenarios[i % len(scenarios)])
+        order["order_id"] = f"BENCH_{i:05d}"
+        orders.append(order)
+    report = await benchmark_order_throughput(workflow, orders)
+    report["graph_metrics"] = workflow.get_metrics()
+    print(json.dumps(report, indent=2))
 
 
 if __name__ == "__main__":
+    import sys
     import asyncio
-    asyncio.run(main())
\ No newline at end of file
+    if "--benchmark" in sys.argv:
+        logging.basicConfig(level=logging.WARNING)
+        asyncio.run(run_benchmark())
+    elif "--resume-incomplete" in sys.argv:
+        logging.basicConfig(level=logging.INFO)
+        resume_config = Config()
+        if not resume_config.order_checkpoint_db:
+            print("Set LANGGRAPH_CHECKPOINT_DB to the checkpoint database to resume incomplete orders.")
+        else:
+            resume_workflow = LangGraphEcommerceWorkflow(resume_config, inventory=get_test_inventory())
+            print(json.dumps(resume_workflow.resume_incomplete_orders(), indent=2))
+    elif "--benchmark-footprint" in sys.argv:
+        logging.basicConfig(level=logging.ERROR)
+        print(json.dumps(asyncio.run(benchmark_result_footprint()), indent=2))
+    elif "--benchmark-batching" in sys.argv:
+        logging.basicConfig(level=logging.WARNING)
+        bench_orders = []
+        for i in range(256):
+            bench_order = get_test_order_data("valid")
+            bench_order["order_id"] = f"BATCH_{i:05d}"
+            bench_orders.append(bench_order)
+        print(json.dumps(asyncio.run(benchmark_validation_batching(bench_orders)), indent=2))
+    else:
+        asyncio.run(main())
@@ -0,0 +1,383 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: service/http_service.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import json
+import time
+import signal
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config.config import Config, get_config
+from utils.metrics import WorkflowMetrics
+from utils.prompt_budget import prompt_report
+from utils.runtime import RuntimeContext
+from utils.tracing import SERVER, get_tracer
+from utils.workflow_factory import WORKFLOW_FIELDS, WorkflowHandler
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+THROUGHPUT_WINDOW_S = 60.0
+
+
+class Overloaded(Exception):
+    """Raised when a request is turned away by admission control."""
+
+    def __init__(self, reason: str, retry_after_s: float):
+        super().__init__(reason)
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    """
+    Bounds the work in the service: at most `max_in_flight` requests run, at most `max_queue` wait for a slot,
+    and a request that waits longer than `queue_timeout_s` is rejected. Rejections are immediate (HTTP 503 with
+    Retry-After), so overload shows up as fast failures instead of an ever-growing backlog.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout_s: float, metrics: WorkflowMetrics):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.metrics = metrics
+        self.in_flight = 0
+        self.queued = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    @asynccontextmanager
+    async def admit(self):
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.metrics.increment("service.rejected.queue_full")
+            raise Overloaded(f"Queue is full ({self.queued} waiting).", retry_after_s=1.0)
+        self.queued += 1
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self.metrics.increment("service.rejected.queue_timeout")
+            raise Overloaded(f"No worker became free within {self.queue_timeout_s}s.", retry_after_s=self.queue_timeout_s) from None
+        finally:
+            self.queued -= 1
+        self.metrics.observe("service.queue_wait_s", time.perf_counter() - queued_at)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+
+@dataclass
+class WorkflowEndpoint:
+    """A POST endpoint served by one framework instance."""
+    name: str
+    path: str
+    handler: WorkflowHandler
+    required_fields: Tuple[str, ...] = ()
+    instance: Any = None
+
+
+class WorkflowRegistry:
+    """
+    Maps endpoint paths to the handlers of the frameworks created at startup. A framework whose dependencies
+    are missing or whose setup failed is listed in `unavailable` and its endpoint returns 503.
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, WorkflowEndpoint] = {}
+        self.unavailable: Dict[str, Dict[str, str]] = {}
+
+    def add(self, name: str, path: str, setup: Callable[[], Tuple[Any, WorkflowHandler]], required_fields: Tuple[str, ...] = ()):
+        """`setup` returns (framework instance, async handler) or raises if the framework is not usable."""
+        try:
+            instance, handler = setup()
+            self.endpoints[path] = WorkflowEndpoint(name, path, handler, required_fields, instance)
+            logger.info(f"Workflow '{name}' is served at POST {path}.")
+        except Exception as e:
+            self.unavailable[path] = {"workflow": name, "reason": str(e)}
+            logger.warning(f"Workflow '{name}' is unavailable: {e}")
+
+    def instance(self, name: str) -> Any:
+        for endpoint in self.endpoints.values():
+            if endpoint.name == name:
+                return endpoint.instance
+        return None
+
+
+# Workflow name -> endpoint path
+SERVICE_PATHS = {
+    "ecommerce": "/orders",
+    "legal": "/legal/analyze",
+    "research": "/research",
+    "financial": "/financial/analyze",
+    "content": "/content",
+}
+
+
+def build_registry(runtime: RuntimeContext) -> WorkflowRegistry:
+    """Registers the five workflows from a started runtime; the ones that failed to start are unavailable."""
+    registry = WorkflowRegistry()
+    for name, path in SERVICE_PATHS.items():
+        registry.add(name, path, partial(runtime.require, name), WORKFLOW_FIELDS[name])
+    return registry
+
+
+class WorkflowService:
+    """
+    Minimal asyncio HTTP/1.1 JSON service (keep-alive, Content-Length bodies) in front of the workflow registry.
+    GET /health lists the available workflows and GET /metrics reports latency, throughput, admission state
+    and the startup timings.
+    """
+
+    def __init__(self, registry: WorkflowRegistry, config: Config, executor: ThreadPoolExecutor,
+                 metrics: Optional[WorkflowMetrics] = None, runtime: Optional[RuntimeContext] = None):
+        self.registry = registry
+        self.runtime = runtime
+        self.config = config
+        self.executor = executor
+        self.metrics = metrics or WorkflowMetrics()
+        self.admission = AdmissionController(config.service_max_in_flight, config.service_max_queue,
+                                             config.service_queue_timeout_s, self.metrics)
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._started_at = time.perf_counter()
+        self._completed = deque()
+        self._connections = set()
+
+    async def start(self, host: Optional[str] = None, port: Optional[int] = None) -> asyncio.AbstractServer:
+        asyncio.get_running_loop().set_default_executor(self.executor)
+        self.server = await asyncio.start_server(self._handle_connection, host or self.config.service_host,
+                                                 self.config.service_port if port is None else port)
+        self._started_at = time.perf_counter()
+        logger.info(f"Workflow service listening on {', '.join(str(s.getsockname()) for s in self.server.sockets)}.")
+        return self.server
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self, grace_s: float = 30.0):
+        """Stops accepting connections and lets in-flight requests finish (up to `grace_s`)."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        deadline_at = time.perf_counter() + grace_s
+        while self.admission.in_flight and time.perf_counter() < deadline_at:
+            await asyncio.sleep(0.05)
+        for writer in list(self._connections):
+            writer.close()
+        workflow = self.registry.instance("ecommerce")
+        if workflow is not None:
+            await workflow.drain_personalization()
+        self.executor.shutdown(wait=False)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError(f"Request body exceeds {MAX_BODY_BYTES} bytes.")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    @staticmethod
+    def _encode(status: int, payload: Any, keep_alive: bool, headers: Optional[Dict[str, str]] = None) -> bytes:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        lines = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines.extend(f"{key}: {value}" for key, value in (headers or {}).items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (ValueError, asyncio.LimitOverrunError) as e:
+                    writer.write(self._encode(400, {"error": f"Malformed request: {e}"}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload, extra_headers = await self._dispatch(method, path, body)
+                writer.write(self._encode(status, payload, keep_alive, extra_headers))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any, Dict[str, str]]:
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "workflows": sorted(self.registry.endpoints), "unavailable": self.registry.unavailable}, {}
+        if path == "/metrics" and method == "GET":
+            return 200, self.metrics_snapshot(), {}
+        if path in self.registry.unavailable:
+            return 503, {"error": f"Workflow unavailable: {self.registry.unavailable[path]['reason']}"}, {}
+        endpoint = self.registry.endpoints.get(path)
+        if endpoint is None:
+            return 404, {"error": f"Unknown path {path}"}, {}
+        if method != "POST":
+            return 405, {"error": "Use POST"}, {"Allow": "POST"}
+
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            return self._finish(endpoint.name, 400, {"error": f"Invalid JSON: {e}"}, 0.0)
+        missing = [field for field in endpoint.required_fields if not isinstance(payload, dict) or field not in payload]
+        if missing:
+            return self._finish(endpoint.name, 400, {"error": f"Missing fields: {', '.join(missing)}"}, 0.0)
+
+        started_at = time.perf_counter()
+        with get_tracer().span(f"POST {path}", SERVER, {"workflow": endpoint.name}) as span:
+            try:
+                async with self.admission.admit():
+                    span.set_attribute("queue_wait_ms", round((time.perf_counter() - started_at) * 1000, 3))
+                    result = await endpoint.handler(payload)
+                status = 500 if isinstance(result, dict) and "error" in result else 200
+                response = self._finish(endpoint.name, status, result, time.perf_counter() - started_at)
+            except Overloaded as e:
+                response = self._finish(endpoint.name, 503, {"error": str(e)}, time.perf_counter() - started_at,
+                                        {"Retry-After": str(max(1, round(e.retry_after_s)))})
+            except Exception as e:
+                logger.error(f"{endpoint.name} request failed: {e}")
+                span.record_error(e)
+                response = self._finish(endpoint.name, 500, {"error": str(e)}, time.perf_counter() - started_at)
+            span.set_attribute("http.status_code", response[0])
+            return response
+
+    def _finish(self, name: str, status: int, payload: Any, latency_s: float,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any, Dict[str, str]]:
+        self.metrics.increment(f"service.requests.{name}")
+        self.metrics.increment(f"service.status.{status}")
+        if status == 200:
+            self.metrics.observe(f"service.latency_s.{name}", latency_s)
+            now = time.perf_counter()
+            self._completed.append(now)
+            while self._completed and self._completed[0] < now - THROUGHPUT_WINDOW_S:
+                self._completed.popleft()
+        return status, payload, headers or {}
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """
+        Service latency per endpoint, throughput, admission state, the shared LLM rate limiter's stats, prompt
+        sizes and, when memory profiling is enabled, memory per workflow call.
+        """
+        from utils import memory_profiler, rate_limiter
+
+        snapshot = self.metrics.snapshot()
+        counters = snapshot["counters"]
+        uptime = time.perf_counter() - self._started_at
+        succeeded = counters.get("service.status.200", 0)
+        window = min(uptime, THROUGHPUT_WINDOW_S)
+        report = {
+            "uptime_s": round(uptime, 3),
+            "requests_total": sum(value for name, value in counters.items() if name.startswith("service.requests.")),
+            "throughput_rps": round(succeeded / uptime, 3) if uptime else 0.0,
+            "throughput_rps_1m": round(len(self._completed) / window, 3) if window else 0.0,
+            "in_flight": self.admission.in_flight,
+            "queued": self.admission.queued,
+            "max_in_flight": self.admission.max_in_flight,
+            "max_queue": self.admission.max_queue,
+            "thread_pool_size": self.executor._max_workers,
+            "status_codes": {name.rsplit(".", 1)[1]: value for name, value in counters.items() if name.startswith("service.status.")},
+            "rejected": {name.rsplit(".", 1)[1]: value for name, value in counters.items() if name.startswith("service.rejected.")},
+            "queue_wait_s": snapshot["observations"].get("service.queue_wait_s"),
+            "endpoints": {name[len("service.latency_s."):]: summary for name, summary in snapshot["observations"].items()
+                          if name.startswith("service.latency_s.")},
+        }
+        if rate_limiter._shared_limiter is not None:
+            report["rate_limiter"] = rate_limiter._shared_limiter.stats()
+        report["tracing"] = get_tracer(self.config).stats()
+        report["prompts"] = prompt_report()
+        if self.runtime is not None:
+            report["startup"] = self.runtime.report()
+        if memory_profiler._shared_profiler is not None:
+            report["memory"] = memory_profiler._shared_profiler.report()
+        return report
+
+
+async def start_service(config: Config, host: Optional[str] = None, port: Optional[int] = None, mock_llm: bool = False,
+                        mock_latency_s: float = 0.05, warm_up: Optional[bool] = None) -> WorkflowService:
+    """
+    Creates the thread pool and, concurrently, the frameworks (optionally warmed up), then starts listening.
+    With `mock_llm`, the LangGraph and LangChain workflows run against the offline mock chat model; AutoGen,
+    BeeAI and CrewAI need watsonx and are left unavailable.
+    """
+    executor = ThreadPoolExecutor(max_workers=config.service_thread_pool_size, thread_name_prefix="workflow")
+    # Installed before the runtime starts, so warm-up's to_thread calls already run on the sized pool
+    asyncio.get_running_loop().set_default_executor(executor)
+    mock_model = None
+    if mock_llm:
+        from utils.mock_llm import MockChatModel
+        mock_model = MockChatModel(latency_s=mock_latency_s, jitter_s=mock_latency_s / 4)
+    runtime = await RuntimeContext(config, mock_model=mock_model).start(SERVICE_PATHS, warm_up=warm_up)
+    service = WorkflowService(build_registry(runtime), config, executor, runtime=runtime)
+    await service.start(host, port)
+    return service
+
+
+async def run_service(config: Config, host: Optional[str] = None, port: Optional[int] = None, mock_llm: bool = False,
+                      mock_latency_s: float = 0.05, warm_up: Optional[bool] = None):
+    """Serves until SIGINT/SIGTERM, then shuts down gracefully."""
+    service = await start_service(config, host, port, mock_llm=mock_llm, mock_latency_s=mock_latency_s, warm_up=warm_up)
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        await stop_event.wait()
+    finally:
+        logger.info("Workflow service shutting down...")
+        await service.stop()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the five agentic workflows over HTTP.")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--mock-llm", action="store_true", help="Serve LangGraph and LangChain with the offline mock chat model")
+    parser.add_argument("--mock-latency", type=float, default=0.05, help="Mock LLM latency per call in seconds")
+    parser.add_argument("--warm-up", action="store_true", default=None,
+                        help="Send one tiny prompt to each framework's models before listening (default: STARTUP_WARM_UP)")
+    args = parser.parse_args()
+    asyncio.run(run_service(get_config(), args.host, args.port, mock_llm=args.mock_llm, mock_latency_s=args.mock_latency,
+                            warm_up=args.warm_up))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,145 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: service/load_test.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import json
+import time
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from utils.metrics import WorkflowMetrics
+
+logger = logging.getLogger(__name__)
+
+LEGAL_SAMPLE = (
+    "SERVICE AGREEMENT. This agreement is made between Acme Corp (the Client) and Widget Ltd (the Provider). "
+    "The Provider shall deliver monthly maintenance services. Payment is due within 30 days of invoice. "
+    "Either party may terminate this agreement with 60 days written notice. Liability is capped at fees paid in the prior 12 months."
+)
+
+
+class KeepAliveClient:
+    """A tiny HTTP/1.1 JSON client that reuses one connection, as a load generator worker would."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, payload: Any = None) -> Tuple[int, Any]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        try:
+            self._writer.write(head.encode("latin-1") + body)
+            await self._writer.drain()
+            response_head = await self._reader.readuntil(b"\r\n\r\n")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            raise
+        lines = response_head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers = {key.strip().lower(): value.strip() for key, value in (line.split(":", 1) for line in lines[1:] if ":" in line)}
+        data = await self._reader.readexactly(int(headers.get("content-length") or 0))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, json.loads(data) if data else None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+
+def sample_request(endpoint: str, index: int) -> Tuple[str, Dict[str, Any]]:
+    """The path and payload of the index-th request for an endpoint ("mixed" alternates orders and legal)."""
+    if endpoint == "mixed":
+        endpoint = "legal" if index % 4 == 3 else "orders"
+    if endpoint == "legal":
+        return "/legal/analyze", {"document": LEGAL_SAMPLE}
+    from frameworks.langgraph_ecommerce_workflow import get_test_order_data
+    order = get_test_order_data("valid")
+    return "/orders", {**order, "order_id": f"LOAD_{index:06d}", "detail_level": "summary"}
+
+
+async def run_load(host: str, port: int, requests: int, concurrency: int, endpoint: str = "orders") -> Dict[str, Any]:
+    """Sends `requests` requests over `concurrency` keep-alive connections and reports throughput and latency."""
+    metrics = WorkflowMetrics()
+    statuses: Counter = Counter()
+    next_index = iter(range(requests))
+
+    async def worker():
+        client = KeepAliveClient(host, port)
+        try:
+            for index in next_index:
+                path, payload = sample_request(endpoint, index)
+                started_at = time.perf_counter()
+                try:
+                    status, _ = await client.request("POST", path, payload)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    status = "connection_error"
+                statuses[status] += 1
+                if status == 200:
+                    metrics.observe("latency_s", time.perf_counter() - started_at)
+        finally:
+            await client.close()
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    client = KeepAliveClient(host, port)
+    _, server_metrics = await client.request("GET", "/metrics")
+    await client.close()
+    return {
+        "endpoint": endpoint,
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(statuses[200] / elapsed, 2) if elapsed else 0.0,
+        "latency_s": {name: round(metrics.percentile("latency_s", q), 4) for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))}
+                     if statuses[200] else {},
+        "status_codes": {str(status): count for status, count in statuses.items()},
+        "server_metrics": server_metrics,
+    }
+
+
+async def main():
+    import argparse
+    from config.config import get_config
+    from service.http_service import start_service
+
+    parser = argparse.ArgumentParser(description="Load-test the workflow HTTP service.")
+    parser.add_argument("--url", default=None, help="Target a running service (default: start one in-process with the mock LLM)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--endpoint", choices=["orders", "legal", "mixed"], default="orders")
+    parser.add_argument("--mock-latency", type=float, default=0.05, help="Mock LLM latency per call in seconds")
+    args = parser.parse_args()
+
+    service = None
+    if args.url:
+        target = urlparse(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        service = await start_service(get_config(), host="127.0.0.1", port=0, mock_llm=True, mock_latency_s=args.mock_latency)
+        host, port = "127.0.0.1", service.port
+    try:
+        report = await run_load(host, port, args.requests, args.concurrency, args.endpoint)
+    finally:
+        if service is not None:
+            await service.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,11 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/conftest.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import os
+import sys
+
+# The modules import each other as top-level packages (config, utils, frameworks), as with PYTHONPATH=.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_batch_runner.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import json
+import os
+
+import pytest
+
+from utils.batch_runner import _shard_path, plan_shards, run_batch, write_sample_orders
+
+
+def test_shards_split_on_non_blank_lines(tmp_path):
+    path = tmp_path / "input.jsonl"
+    path.write_bytes(b'{"a": 1}\n\n{"a": 2}\n{"a": 3}\n\n{"a": 4}\n')
+    shards = plan_shards(str(path), shard_size=2)
+    assert [shard.records for shard in shards] == [2, 2]
+    assert shards[0].start == 0 and shards[0].end == shards[1].start and shards[1].end == path.stat().st_size
+
+
+def test_rerun_resumes_only_unfinished_shards(tmp_path):
+    input_path, output_path, work_dir = str(tmp_path / "orders.jsonl"), str(tmp_path / "results.jsonl"), str(tmp_path / "shards")
+    write_sample_orders(input_path, 7)
+
+    first = run_batch(input_path, output_path, "ecommerce", processes=1, shard_size=3, work_dir=work_dir, mock_latency_s=0.0)
+    assert (first["shards"], first["completed_shards"], first["resumed_shards"], first["record_errors"]) == (3, 3, 0, 0)
+    with open(output_path, encoding="utf-8") as f:
+        results = [json.loads(line) for line in f]
+    assert [result["order_id"] for result in results] == [f"BATCH_{index:07d}" for index in range(7)]
+
+    # An interrupted job left shard 1 unfinished
+    os.remove(_shard_path(work_dir, 1))
+    os.remove(output_path)
+    second = run_batch(input_path, output_path, "ecommerce", processes=1, shard_size=3, work_dir=work_dir, mock_latency_s=0.0)
+    assert (second["completed_shards"], second["resumed_shards"]) == (1, 2)
+    with open(output_path, encoding="utf-8") as f:
+        assert [json.loads(line)["order_id"] for line in f] == [result["order_id"] for result in results]
+
+    with pytest.raises(ValueError):
+        run_batch(input_path, output_path, "ecommerce", processes=1, shard_size=2, work_dir=work_dir, mock_latency_s=0.0)
+    # Toggling the mock LLM is a different job, too
+    with pytest.raises(ValueError):
+        run_batch(input_path, output_path, "ecommerce", processes=1, shard_size=3, work_dir=work_dir, mock_latency_s=None)
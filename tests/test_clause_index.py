@@ -0,0 +1,90 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_clause_index.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+from config.config import Config
+from frameworks.langchain_legal_analysis import LangChainLegalWorkflow, get_test_legal_document
+from utils.clause_index import ClauseVectorIndex
+from utils.mock_llm import MockChatModel, default_mock_response
+
+TERMINATION = "Either party may terminate this Agreement with 30 days' written notice."
+PAYMENT = "The Client shall pay a fee of $5,000 upon completion of services."
+
+
+def test_readding_a_text_replaces_its_entry():
+    index = ClauseVectorIndex()
+    index.add([TERMINATION], "Low", ["Short notice period"])
+    index.add(["  either party may terminate this agreement with 30 days' WRITTEN notice. "], "High", ["No cure period"])
+    assert len(index) == 1
+    [[(score, record)]] = index.search([TERMINATION])
+    assert score > 0.99
+    assert (record["risk_level"], record["identified_risks"]) == ("High", ["No cure period"])
+
+
+def test_full_index_overwrites_the_oldest_entries():
+    index = ClauseVectorIndex(max_entries=3)
+    texts = [f"Clause {word} governs the {word} obligations of the parties." for word in ("alpha", "beta", "gamma", "delta", "epsilon")]
+    for text in texts:
+        index.add([text], "Low", [])
+    assert len(index) == 3
+    assert index._vectors.shape[0] == 3
+    kept = {record["text"] for matches in index.search(texts, top_k=3) for _, record in matches}
+    assert kept == set(texts[2:])
+
+
+def test_buffer_grows_without_restacking_and_survives_a_reload(tmp_path):
+    index = ClauseVectorIndex(max_entries=4)
+    for text in (TERMINATION, PAYMENT, "Confidential information must not be disclosed."):
+        index.add([text], "Medium", [])
+        index.search([text])
+    buffer = index._vectors
+    index.add(["Disputes are settled by arbitration in London."], "Medium", [])
+    assert index._vectors is buffer
+    index.add(["Governing law is the law of England."], "Low", [])
+    index.save(str(tmp_path))
+
+    reloaded = ClauseVectorIndex.load(str(tmp_path), max_entries=4)
+    assert len(reloaded) == 4
+    # The oldest entry is evicted first after a reload, too
+    reloaded.add(["Notices must be given in writing."], "Low", [])
+    texts = {record["text"] for matches in reloaded.search([TERMINATION, PAYMENT], top_k=4) for _, record in matches}
+    assert PAYMENT not in texts and len(texts) == 4
+
+
+def test_assessments_are_reused_only_for_the_same_document(tmp_path):
+    workflow = LangChainLegalWorkflow(Config(), chat_model=MockChatModel(latency_s=0.0))
+    contract = get_test_legal_document("simple_contract")["content"]
+    # Materially different terms in an otherwise identical text
+    changed = (contract.replace("$5,000", "$5,000,000").replace("30 days'", "1 day's")
+               .replace("Either party may", "The Service Provider may").replace("State of New York", "State of Delaware"))
+    nda = get_test_legal_document("complex_nda")["content"]
+
+    first = workflow.analyze_legal_document(contract)
+    assert first["risk_assessment"].get("source") != "clause_index"
+    assert len(workflow.clause_index) == 5
+    assert workflow.analyze_legal_document("  " + contract + "\n")["risk_assessment"]["source"] == "clause_index"
+    assert workflow.analyze_legal_document(changed)["risk_assessment"].get("source") != "clause_index"
+    assert workflow.analyze_legal_document(nda)["risk_assessment"].get("source") != "clause_index"
+
+    workflow.clause_index.save(str(tmp_path))
+    reloaded = ClauseVectorIndex.load(str(tmp_path))
+    assert reloaded.document_assessment(contract) == {k: v for k, v in first["risk_assessment"].items() if k != "source"}
+    assert reloaded.document_assessment(contract.replace("Company B", "Company C")) is None
+
+
+def test_similar_clauses_are_given_as_context():
+    prompts = []
+
+    def record_prompts(prompt):
+        prompts.append(prompt)
+        return default_mock_response(prompt)
+
+    workflow = LangChainLegalWorkflow(Config(), chat_model=MockChatModel(latency_s=0.0, responder=record_prompts))
+    contract = get_test_legal_document("simple_contract")["content"]
+    workflow.analyze_legal_document(contract)
+    prompts.clear()
+    workflow.analyze_legal_document(contract.replace("$5,000", "$5,000,000"))
+    [risk_prompt] = [prompt for prompt in prompts if "Similar clauses" in prompt]
+    assert "Either party may terminate" in risk_prompt and "similarity 1.00" in risk_prompt
@@ -0,0 +1,84 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_ecommerce_workflow.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import asyncio
+
+from config.config import Config
+from frameworks.langgraph_ecommerce_workflow import GRAPH_TOPOLOGIES, LangGraphEcommerceWorkflow, get_test_inventory, get_test_order_data
+from utils.llm_gateway import managed
+from utils.mock_llm import MockChatModel, default_mock_response
+from utils.rate_limiter import AdaptiveRateLimiter
+
+
+def suspicious_validation(prompt: str) -> str:
+    if "fraud" in prompt.lower():
+        return '{"status": "suspicious", "reason": "Unusual quantity."}'
+    return default_mock_response(prompt)
+
+
+class SlowShippingChatModel(MockChatModel):
+    """Answers validation prompts quickly and shipping prompts slowly; a cancelled call takes a moment to tear down."""
+
+    def _delay(self, messages=None) -> float:
+        prompt = " ".join(str(message.content) for message in messages or [])
+        return 0.01 if "fraud" in prompt.lower() else 1.0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        try:
+            return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.05)
+            raise
+
+
+def test_missed_speculation_leaves_the_limiter_fully_available():
+    limiter = AdaptiveRateLimiter(max_concurrency=4, initial_concurrency=4)
+    # The shipping report is still in flight when the validation comes back suspicious
+    chat = managed(SlowShippingChatModel(responder=suspicious_validation), limiter=limiter)
+    workflow = LangGraphEcommerceWorkflow(Config(), chat_model=chat, shipping_report_mode="llm",
+                                          speculative_shipping=True, speculation_max_fraud_score=1.0,
+                                          require_valid_to_ship=True)
+    workflow.fraud_scorer = None
+
+    async def run():
+        result = await workflow.aprocess_order(get_test_order_data("valid"))
+        # No sleep: the cancelled speculative call must already have returned its slot
+        return result, limiter.concurrency.in_flight
+
+    result, in_flight = asyncio.run(run())
+    assert result["order_processing_status"] == "flagged_suspicious"
+    assert in_flight == 0
+    assert workflow.metrics.counter("speculation.started") == 1
+    assert workflow.metrics.counter("speculation.wasted.validation") == 1
+
+
+def test_flagged_orders_ship_unless_valid_orders_are_required():
+    results = {}
+    for topology in GRAPH_TOPOLOGIES:
+        for require_valid in (False, True):
+            inventory = get_test_inventory(stock_level=5)
+            workflow = LangGraphEcommerceWorkflow(Config(), chat_model=MockChatModel(latency_s=0.0, responder=suspicious_validation),
+                                                  topology=topology, inventory=inventory, require_valid_to_ship=require_valid)
+            workflow.fraud_scorer = None
+            result = workflow.process_order(get_test_order_data("valid"), detail_level="standard")
+            results[topology, require_valid] = (result["validation_status"], result["shipping_status"], inventory.available("P001"))
+    for topology in GRAPH_TOPOLOGIES:
+        # As in the original graph, a flagged in-stock order still ships by default
+        assert results[topology, False] == ("suspicious", "shipped", 4)
+        assert results[topology, True] == ("suspicious", "", 5)
+
+
+def test_avoided_shipping_calls_are_counted_once_per_order():
+    workflow = LangGraphEcommerceWorkflow(Config(), chat_model=MockChatModel(latency_s=0.0, responder=suspicious_validation),
+                                          shipping_report_mode="template", require_valid_to_ship=True)
+    workflow.fraud_scorer = None
+    workflow.process_order(get_test_order_data("valid"))
+    workflow.require_valid_to_ship = False
+    workflow.process_order(get_test_order_data("valid"))
+    counters = workflow.get_metrics()["counters"]
+    # The withheld order never needed a shipping report; only the templated one replaced an LLM call
+    assert counters.get("llm_calls_avoided.confirm_shipping") == 1
+    assert counters.get("shipping.withheld") == 1
@@ -0,0 +1,42 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_framework_imports.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import ast
+import importlib
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Framework module -> the third-party package it cannot import without
+FRAMEWORK_MODULES = {
+    "frameworks.langchain_legal_analysis": "langchain_core",
+    "frameworks.langgraph_ecommerce_workflow": "langgraph",
+    "frameworks.crewai_content_creation": "crewai",
+    "frameworks.autogen_financial_analysis": "autogen_agentchat",
+    "frameworks.beeai_research_assistant": "beeai_framework",
+}
+MODULES = [*FRAMEWORK_MODULES, "service.http_service", "utils.runtime", "utils.workflow_factory"]
+
+
+@pytest.mark.parametrize("module", FRAMEWORK_MODULES)
+def test_framework_module_imports(module):
+    pytest.importorskip(FRAMEWORK_MODULES[module])
+    importlib.import_module(module)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_imports_do_not_shadow_each_other(module):
+    # Runs without the framework packages installed, e.g. tracing's LLM span kind shadowing crewai.LLM
+    with open(os.path.join(ROOT, *module.split(".")) + ".py", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    bound = {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                name = (alias.asname or alias.name).split(".")[0]
+                assert name not in bound, f"{module} line {node.lineno} rebinds {name} imported on line {bound[name]}"
+                bound[name] = node.lineno
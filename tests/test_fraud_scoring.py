@@ -0,0 +1,58 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_fraud_scoring.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import asyncio
+
+import numpy as np
+
+from config.config import Config
+from frameworks.langgraph_ecommerce_workflow import LangGraphEcommerceWorkflow, get_test_inventory, get_test_order_data
+from utils.fraud_scoring import FraudPreScorer
+from utils.mock_llm import MockChatModel
+
+
+def with_items(*items):
+    return {**get_test_order_data("valid"), "items": list(items)}
+
+
+def test_malformed_items_are_sent_to_the_llm_instead_of_raising():
+    orders = [
+        with_items({"item_id": "P001", "quantity": "two", "price": 1200}),
+        with_items({"item_id": "P001", "quantity": -3, "price": 1200}, {"item_id": "P002", "quantity": 1, "price": 25}),
+        with_items({"item_id": "P001", "quantity": 1, "price": float("nan")}),
+        with_items("P001"),
+        {**get_test_order_data("valid"), "items": "P001"},
+    ]
+    scores = FraudPreScorer().score_orders(orders)
+    assert [score["decision"] for score in scores] == ["llm"] * len(orders)
+    assert [score["invalid"] for score in scores] == [
+        ["items[0].quantity"], ["items[0].quantity"], ["items[0].price"], ["items[0]"], ["items"]
+    ]
+    assert all(np.isfinite(score["score"]) for score in scores)
+
+
+def test_numeric_strings_are_scored_like_numbers():
+    scorer = FraudPreScorer()
+    as_strings = with_items({"item_id": "P001", "quantity": "1", "price": "1200"}, {"item_id": "P002", "quantity": "2", "price": "25"})
+    assert scorer.score_orders([as_strings]) == scorer.score_orders([get_test_order_data("valid")])
+
+
+def test_one_malformed_order_does_not_fail_the_others():
+    workflow = LangGraphEcommerceWorkflow(Config(), chat_model=MockChatModel(latency_s=0.0),
+                                          inventory=get_test_inventory(stock_level=1_000))
+    malformed = {**with_items({"item_id": "P001", "quantity": "two", "price": 1200}), "order_id": "BAD"}
+    orders = [{**get_test_order_data("valid"), "order_id": f"OK_{i}"} for i in range(3)] + [malformed]
+
+    async def run():
+        return [result async for result in workflow.process_orders(orders)]
+
+    results = {result["order_id"]: result for result in asyncio.run(run())}
+    assert len(results) == 4
+    assert all(results[f"OK_{i}"]["status"] == "completed" for i in range(3))
+    # The inventory rejects the malformed quantity, so the order never ships
+    assert results["BAD"]["order_processing_status"] == "items_unavailable"
+    assert isinstance(workflow.process_order(malformed), dict)
+    assert len(workflow.payloads) == 0
@@ -0,0 +1,41 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_http_service.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import asyncio
+import threading
+
+from config.config import Config
+from service import http_service
+
+
+class _RecordingRuntime:
+    """Stands in for RuntimeContext: records which thread warm-up's to_thread calls land on."""
+    threads = []
+
+    def __init__(self, config, mock_model=None):
+        self.config = config
+
+    async def start(self, workflows=None, warm_up=None):
+        self.threads.append(await asyncio.to_thread(lambda: threading.current_thread().name))
+        return self
+
+    def require(self, name):
+        raise RuntimeError("not started in this test")
+
+    def report(self):
+        return {}
+
+
+def test_service_pool_is_the_default_executor_during_runtime_start(monkeypatch):
+    monkeypatch.setattr(http_service, "RuntimeContext", _RecordingRuntime)
+    _RecordingRuntime.threads = []
+
+    async def main():
+        service = await http_service.start_service(Config(), host="127.0.0.1", port=0)
+        await service.stop(grace_s=0)
+
+    asyncio.run(main())
+    assert _RecordingRuntime.threads and _RecordingRuntime.threads[0].startswith("workflow")
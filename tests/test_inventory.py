@@ -0,0 +1,124 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_inventory.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.inventory import InventoryIndex
+
+
+def run_concurrently(func, args_list, workers: int = 16):
+    """Runs `func` for every argument tuple on a thread pool, released together once all calls are queued."""
+    start = threading.Event()
+
+    def call(args):
+        start.wait()
+        return func(*args)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(call, args) for args in args_list]
+        start.set()
+        return [future.result() for future in futures]
+
+
+def test_reserve_is_all_or_nothing():
+    inventory = InventoryIndex()
+    inventory.bulk_load([("P001", 2, "Laptop Pro"), ("P002", 10, "Wireless Mouse")])
+    result = inventory.reserve("A", [{"item_id": "P001", "quantity": 1}, {"item_id": "P002", "quantity": 20}])
+    assert result == {"reserved": False, "unavailable_items": ["Wireless Mouse"]}
+    assert inventory.available("P001") == 2
+    assert inventory.reserve("B", [{"item_id": "P009", "name": "Unknown", "quantity": 1}])["unavailable_items"] == ["Unknown"]
+
+
+def test_concurrent_reserves_of_one_order_reserve_once():
+    inventory = InventoryIndex()
+    inventory.set_stock("P001", 100)
+    items = [{"item_id": "P001", "quantity": 3}]
+    for _ in range(20):
+        results = run_concurrently(inventory.reserve, [("A", items)] * 16)
+        assert all(result["reserved"] for result in results)
+        assert inventory.available("P001") == 97
+        assert inventory.release("A")
+        assert inventory.available("P001") == 100
+
+
+def test_concurrent_reserves_never_oversell():
+    inventory = InventoryIndex(num_stripes=4)
+    inventory.bulk_load([(f"P{index}", 10, "") for index in range(8)])
+    orders = [(f"O{index}", [{"item_id": f"P{index % 8}", "quantity": 1}, {"item_id": f"P{(index + 3) % 8}", "quantity": 1}])
+              for index in range(200)]
+    results = run_concurrently(inventory.reserve, orders)
+    reserved = [order_id for (order_id, _), result in zip(orders, results) if result["reserved"]]
+    # Each SKU is wanted by 25 orders but holds 10, and every order takes one unit of two SKUs
+    available = [inventory.available(f"P{index}") for index in range(8)]
+    assert min(available) >= 0
+    assert 80 - sum(available) == 2 * len(reserved)
+
+    committed = reserved[::2]
+    run_concurrently(inventory.commit, [(order_id,) for order_id in committed])
+    run_concurrently(inventory.release, [(order_id,) for order_id in reserved[1::2]])
+    assert sum(inventory.available(f"P{index}") for index in range(8)) == 80 - 2 * len(committed)
+    assert sum(inventory._on_hand) == 80 - 2 * len(committed)
+    assert all(inventory.is_committed(order_id) for order_id in committed)
+
+
+def test_commit_and_release_race_settles_the_order_once():
+    inventory = InventoryIndex()
+    inventory.set_stock("P001", 1000)
+    for index in range(50):
+        order_id = f"O{index}"
+        assert inventory.reserve(order_id, [{"item_id": "P001", "quantity": 1}])["reserved"]
+        outcomes = run_concurrently(lambda action: action(order_id), [(inventory.commit,), (inventory.release,)] * 4, workers=8)
+        assert outcomes.count(True) == 1
+    committed = sum(inventory.is_committed(f"O{index}") for index in range(50))
+    assert inventory.available("P001") == 1000 - committed
+
+
+def test_bulk_load_does_not_interleave_with_reservations():
+    inventory = InventoryIndex(num_stripes=2)
+    inventory.bulk_load([("P001", 1_000_000, "")])
+    items = [{"item_id": "P001", "quantity": 1}]
+
+    def reserve_and_release(index):
+        order_id = f"O{index}"
+        assert inventory.reserve(order_id, items)["reserved"]
+        assert inventory.release(order_id)
+
+    def reload(_):
+        inventory.bulk_load([("P001", 1_000_000, ""), *((f"N{index}", 1, "") for index in range(100))])
+
+    run_concurrently(lambda index: reload(index) if index % 10 == 0 else reserve_and_release(index), [(index,) for index in range(400)])
+    assert inventory.available("P001") == 1_000_000
+    assert inventory._reserved[inventory._slots["P001"]] == 0
+
+
+def test_non_positive_and_malformed_quantities_are_rejected():
+    inventory = InventoryIndex()
+    inventory.set_stock("P001", 5, "Laptop Pro")
+    for quantity in (0, -3, "two", 1.5, None, True):
+        result = inventory.reserve(f"Q{quantity}", [{"item_id": "P001", "name": "Laptop Pro", "quantity": quantity}])
+        assert result == {"reserved": False, "unavailable_items": ["Laptop Pro"], "invalid_items": ["Laptop Pro"]}
+    assert inventory.available("P001") == 5
+    assert inventory.reserve("S", [{"item_id": "P001", "quantity": "2"}])["reserved"]
+    assert inventory.available("P001") == 3
+
+
+def test_concurrent_commits_persist_the_latest_stock(tmp_path):
+    db_path = str(tmp_path / "inventory.db")
+    inventory = InventoryIndex(db_path=db_path)
+    inventory.set_stock("P001", 1_000)
+    orders = [(f"O{index}", [{"item_id": "P001", "quantity": 1}]) for index in range(300)]
+    for order_id, items in orders:
+        assert inventory.reserve(order_id, items)["reserved"]
+    # Switch threads often, so a commit is likely to be preempted between its stock change and its write
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        assert all(run_concurrently(inventory.commit, [(order_id,) for order_id, _ in orders], workers=32))
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert inventory.available("P001") == 700
+    assert InventoryIndex(db_path=db_path).available("P001") == 700
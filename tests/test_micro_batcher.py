@@ -0,0 +1,80 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_micro_batcher.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import asyncio
+
+import pytest
+
+from utils.micro_batcher import AsyncMicroBatcher
+
+
+def make_batcher(**kwargs):
+    batches = []
+
+    async def process(items):
+        batches.append(list(items))
+        await asyncio.sleep(0)
+        return [item * 10 for item in items]
+    return AsyncMicroBatcher(process, **kwargs), batches
+
+
+def test_full_batches_flush_immediately_and_results_keep_their_order():
+    batcher, batches = make_batcher(max_batch_size=4, max_wait_ms=10_000)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(item) for item in range(8)))
+
+    assert asyncio.run(run()) == [item * 10 for item in range(8)]
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert batcher.metrics.counter("batch.batches") == 2
+
+
+def test_partial_batch_flushes_after_max_wait():
+    batcher, batches = make_batcher(max_batch_size=16, max_wait_ms=10)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(item) for item in range(3))), timeout=1.0)
+
+    assert asyncio.run(run()) == [0, 10, 20]
+    assert batches == [[0, 1, 2]]
+
+
+def test_batch_failures_reach_every_caller():
+    async def wrong_length(items):
+        return items[:-1]
+
+    async def failing(items):
+        raise RuntimeError("LLM unavailable")
+
+    async def run(process):
+        batcher = AsyncMicroBatcher(process, max_batch_size=2, max_wait_ms=10)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(run(wrong_length))] == [ValueError, ValueError]
+    assert [str(result) for result in asyncio.run(run(failing))] == ["LLM unavailable"] * 2
+
+
+def test_cancelled_caller_does_not_affect_the_rest_of_its_batch():
+    batcher, batches = make_batcher(max_batch_size=3, max_wait_ms=10)
+
+    async def run():
+        cancelled = asyncio.create_task(batcher.submit(1))
+        others = [asyncio.create_task(batcher.submit(item)) for item in (2, 3)]
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await asyncio.gather(*others)
+
+    assert asyncio.run(run()) == [20, 30]
+    assert batches == [[1, 2, 3]]
+
+
+def test_batcher_can_be_reused_on_a_new_event_loop():
+    batcher, batches = make_batcher(max_batch_size=2, max_wait_ms=10)
+    for _ in range(2):
+        assert asyncio.run(batcher.submit(5)) == 50
+    assert batches == [[5], [5]]
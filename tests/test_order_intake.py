@@ -0,0 +1,90 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_order_intake.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from utils.order_intake import JsonlSpoolSource, OrderIntakeWorker, OrderSource, QueueOrderSource
+
+
+class EchoWorkflow:
+    """Stands in for the e-commerce workflow; fails orders marked `fail`."""
+
+    async def aprocess_order(self, order):
+        await asyncio.sleep(0.001)
+        if order.get("fail"):
+            raise RuntimeError("boom")
+        return {"order_processing_status": "completed"}
+
+
+def write_spool(path, lines):
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(line + "\n" for line in lines)
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_order_source_requires_get():
+    with pytest.raises(TypeError):
+        OrderSource()
+
+
+def test_spool_is_processed_once_and_resumed_from_committed_offsets(tmp_path):
+    spool, output = tmp_path / "orders.jsonl", tmp_path / "results.jsonl"
+    write_spool(spool, [json.dumps({"order_id": f"O{index}"}) for index in range(20)] + ["", "{not json", json.dumps({"order_id": "X", "fail": True})])
+
+    def run():
+        return asyncio.run(OrderIntakeWorker(EchoWorkflow(), JsonlSpoolSource(str(spool), commit_interval_s=0.0),
+                                             str(output), max_in_flight=4, stats_interval_s=60).run())
+
+    summary = run()
+    assert (summary["processed"], summary["failed"]) == (20, 2)
+    assert sorted(result["order_id"] for result in read_results(output) if "error" not in result) == sorted(f"O{index}" for index in range(20))
+    assert json.loads((tmp_path / "orders.jsonl.offsets.json").read_text()) == {"orders.jsonl": spool.stat().st_size}
+
+    # A restart reads only the lines appended since the last commit
+    write_spool(spool, [json.dumps({"order_id": "O20"})])
+    assert run()["processed"] == 1
+    assert read_results(output)[-1]["order_id"] == "O20"
+
+
+class FlakyQueueSource(QueueOrderSource):
+    """Fails to acknowledge every fifth order."""
+
+    async def ack(self, item):
+        if item.position % 5 == 0:
+            raise OSError("disk full")
+
+
+def test_write_and_ack_failures_do_not_stop_the_worker(tmp_path):
+    output = tmp_path / "results.jsonl"
+
+    async def run():
+        queue = asyncio.Queue()
+        for index in range(30):
+            queue.put_nowait({"order_id": f"O{index}"})
+        queue.put_nowait(None)
+        worker = OrderIntakeWorker(EchoWorkflow(), FlakyQueueSource(queue), str(output), max_in_flight=4, stats_interval_s=60)
+        write_result = worker._write_result
+
+        def failing_write(handle, line):
+            if '"O7"' in line:
+                raise OSError("write failed")
+            write_result(handle, line)
+
+        worker._write_result = failing_write
+        return await asyncio.wait_for(worker.run(), 10), worker
+
+    summary, worker = asyncio.run(run())
+    assert summary["processed"] == 29
+    assert summary["record_failed"] == 1 + 6
+    assert summary["lag_s"] == 0.0 and not worker._unacked
+    assert len(read_results(output)) == 29
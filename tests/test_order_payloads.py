@@ -0,0 +1,130 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_order_payloads.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import asyncio
+import sqlite3
+from typing import Annotated, TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+
+from config.config import Config
+from frameworks.langgraph_ecommerce_workflow import LangGraphEcommerceWorkflow, get_test_inventory, get_test_order_data
+from utils.mock_llm import MockChatModel
+from utils.order_payloads import RESET_METADATA, OrderPayloadStore, merge_metadata, payload_db_path
+
+ORDER = {"order_id": "A", "items": [{"item_id": "P001", "quantity": 1}], "customer_info": {"name": "Alice"}}
+
+
+def test_finished_orders_delete_their_stored_payload(tmp_path):
+    store = OrderPayloadStore(str(tmp_path / "payloads.db"))
+    finished, interrupted = store.put(ORDER), store.put(ORDER)
+    store.discard(finished, finished=True)
+    store.discard(interrupted)
+    assert len(store) == 0
+    assert store.stored() == 1
+    assert store.get(finished).order_id is None
+    # An interrupted order can still be resumed after a restart
+    assert OrderPayloadStore(str(tmp_path / "payloads.db")).get(interrupted).items == ORDER["items"]
+
+
+def test_workflow_keeps_no_payload_rows_for_completed_orders(tmp_path):
+    workflow = LangGraphEcommerceWorkflow(Config(), chat_model=MockChatModel(latency_s=0.0),
+                                          checkpoint_db=str(tmp_path / "orders.db"), result_detail_level="full")
+
+    async def run():
+        for scenario in ("valid", "suspicious", "out_of_stock"):
+            result = await workflow.aprocess_order({**get_test_order_data(scenario), "order_id": f"P_{scenario}"})
+            assert result["detailed_state"]["items"]
+        return [result async for result in workflow.process_orders([get_test_order_data("valid")] * 3)]
+
+    assert len(asyncio.run(run())) == 3
+    assert workflow.process_order(get_test_order_data("valid"))["status"] == "completed"
+    assert workflow.payloads.stored() == 0
+
+
+
+def test_finished_payload_rows_are_deleted_in_batches(tmp_path):
+    store = OrderPayloadStore(str(tmp_path / "payloads.db"), delete_batch_size=3)
+    refs = [store.put(ORDER) for _ in range(4)]
+    store.discard(refs[0], finished=True)
+    store.discard(refs[1], finished=True)
+    assert OrderPayloadStore(str(tmp_path / "payloads.db")).stored() == 4
+    # A finished order waiting for its batch no longer resolves to a payload
+    assert store.get(refs[0]).order_id is None
+    store.discard(refs[2], finished=True)
+    assert OrderPayloadStore(str(tmp_path / "payloads.db")).stored() == 1
+    pass  # (str(tmp_path / "orders.db")) == str(tmp_path / "orders.payloads.db")
+
+
+def test_concurrent_checkpointed_orders_share_the_database(tmp_path):
+    workflow = LangGraphEcommerceWorkflow(Config(), chat_model=MockChatModel(latency_s=0.0),
+                                          inventory=get_test_inventory(stock_level=1_000_000),
+                                          checkpoint_db=str(tmp_path / "orders.db"))
+    orders = [{**get_test_order_data("valid"), "order_id": f"C_{i}"} for i in range(150)]
+
+    async def run():
+        single = await asyncio.gather(*(workflow.aprocess_order(order) for order in orders[:100]))
+        batch = [result async for result in workflow.process_orders(orders[100:], max_concurrency=32)]
+        return single + batch
+
+    results = asyncio.run(run())
+    assert [result for result in results if "error" in result] == []
+    assert workflow.payloads.stored() == 0
+
+
+def test_payload_cleanup_failures_do_not_replace_results(tmp_path):
+    workflow = LangGraphEcommerceWorkflow(Config(), chat_model=MockChatModel(latency_s=0.0),
+                                          checkpoint_db=str(tmp_path / "orders.db"))
+
+    def broken_discard(order_ref, finished=False):
+        raise sqlite3.OperationalError("database is locked")
+
+    workflow.payloads.discard = broken_discard
+
+    async def run():
+        single = await workflow.aprocess_order(get_test_order_data("valid"))
+        return [single] + [result async for result in workflow.process_orders([get_test_order_data("valid")] * 3)]
+
+    results = asyncio.run(run())
+    assert len(results) == 4
+    assert all(result["status"] == "completed" for result in results)
+    assert workflow.process_order(get_test_order_data("valid"))["status"] == "completed"
+
+def test_merge_metadata_merges_updates_and_resets_on_request():
+    assert merge_metadata({"a": 1, "b": 1}, {"b": 2, "c": 3}) == {"a": 1, "b": 2, "c": 3}
+    assert merge_metadata({"a": 1}, None) == {"a": 1}
+    assert merge_metadata({"a": 1}, {}) == {"a": 1}
+    assert merge_metadata(None, None) == {}
+    assert merge_metadata(None, {"a": 1}) == {"a": 1}
+    assert merge_metadata({"error": "boom"}, {RESET_METADATA: True}) == {}
+    assert merge_metadata({"error": "boom"}, {RESET_METADATA: True, "run": 2}) == {"run": 2}
+    # A false reset flag is merged like any other key
+    assert merge_metadata({"a": 1}, {RESET_METADATA: False}) == {"a": 1, RESET_METADATA: False}
+
+
+def test_metadata_reducer_keeps_parallel_updates_and_resets_between_checkpointed_runs():
+    class State(TypedDict):
+        metadata: Annotated[dict, merge_metadata]
+
+    graph = StateGraph(State)
+    graph.add_node("start", lambda state: {"metadata": {"started": True}})
+    graph.add_node("validate", lambda state: {"metadata": {"validated": True}})
+    graph.add_node("ship", lambda state: {"metadata": {"shipped": True}})
+    graph.add_node("fail", lambda state: {"metadata": {"error": "boom"}} if "fail" in state["metadata"] else {})
+    graph.set_entry_point("start")
+    graph.add_edge("start", "validate")
+    graph.add_edge("start", "ship")
+    graph.add_edge(["validate", "ship"], "fail")
+    graph.add_edge("fail", END)
+    app = graph.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "A"}}
+
+    first = app.invoke({"metadata": {"fail": True}}, config)["metadata"]
+    assert first == {"fail": True, "started": True, "validated": True, "shipped": True, "error": "boom"}
+    # A rerun of the same thread starts from a clean slate instead of inheriting the earlier error
+    second = app.invoke({"metadata": {RESET_METADATA: True}}, config)["metadata"]
+    assert second == {"started": True, "validated": True, "shipped": True}
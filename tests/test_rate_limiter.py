@@ -0,0 +1,187 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_rate_limiter.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+from utils.rate_limiter import FATAL, THROTTLED, AdaptiveRateLimiter, AIMDConcurrencyLimiter, classify_error
+
+
+def test_cancelled_calls_return_their_slots():
+    limiter = AdaptiveRateLimiter(max_concurrency=4, initial_concurrency=4)
+
+    async def run():
+        started = asyncio.Event()
+
+        async def slow_call():
+            started.set()
+            await asyncio.sleep(10)
+
+        tasks = [asyncio.create_task(limiter.acall(slow_call, name="slow")) for _ in range(4)]
+        await started.wait()
+        await asyncio.sleep(0)
+        assert limiter.concurrency.in_flight == 4
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert limiter.concurrency.in_flight == 0
+
+        async def fast_call():
+            return "ok"
+        return await asyncio.wait_for(limiter.acall(fast_call, name="fast"), 1.0)
+
+    assert asyncio.run(run()) == "ok"
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_cancelled_waiters_do_not_release_twice():
+    concurrency = AIMDConcurrencyLimiter(initial_limit=1, max_limit=1)
+
+    async def run():
+        await concurrency.aacquire()
+        waiters = [asyncio.create_task(concurrency.aacquire()) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert concurrency.waiting == 3
+        # The slot is handed to the first waiter, which is cancelled before `_resolve` runs
+        concurrency.release()
+        waiters[0].cancel()
+        await asyncio.gather(waiters[0], return_exceptions=True)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        # The slot went on to the next waiter exactly once; the third is still queued
+        assert concurrency.in_flight == 1
+        assert waiters[1].done() and not waiters[2].done()
+        concurrency.release()
+        await waiters[2]
+        concurrency.release()
+        assert concurrency.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_limit_is_never_exceeded_under_cancellation():
+    concurrency = AIMDConcurrencyLimiter(initial_limit=2, max_limit=2)
+    peak = 0
+
+    async def worker(hold_s: float):
+        nonlocal peak
+        await concurrency.aacquire()
+        try:
+            peak = max(peak, concurrency.in_flight)
+            await asyncio.sleep(hold_s)
+        finally:
+            concurrency.release()
+
+    async def run():
+        tasks = [asyncio.create_task(worker(0.002 * (index % 3))) for index in range(60)]
+        await asyncio.sleep(0.005)
+        for task in tasks[::3]:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+    assert peak <= 2
+    assert concurrency.in_flight == 0
+
+
+def test_hedge_losers_stop_before_their_slot_is_released():
+    limiter = AdaptiveRateLimiter(max_concurrency=4, initial_concurrency=4, hedging=True,
+                                  hedge_min_samples=1, hedge_max_fraction=1.0)
+    running = 0
+    running_at_release = []
+    release = limiter.concurrency.release
+
+    def recording_release():
+        running_at_release.append(running)
+        release()
+    limiter.concurrency.release = recording_release
+
+    async def run():
+        async def quick():
+            return "warm"
+        await limiter.acall(quick, name="hedged")
+        running_at_release.clear()
+        calls = 0
+
+        async def call():
+            nonlocal calls, running
+            calls += 1
+            slow = calls == 1
+            running += 1
+            try:
+                await asyncio.sleep(1.0 if slow else 0.05)
+            finally:
+                # Cleanup after cancellation still runs in the cancelled request
+                await asyncio.sleep(0.01)
+                running -= 1
+            return "slow" if slow else "hedge"
+
+        return await limiter.acall(call, name="hedged")
+
+    assert asyncio.run(run()) == "hedge"
+    assert limiter.metrics.counter("rate_limiter.hedges") == 1
+    assert running_at_release == [0, 0]
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_timed_out_sync_calls_keep_their_slot_until_they_finish():
+    limiter = AdaptiveRateLimiter(max_concurrency=2, initial_concurrency=2, max_retries=3, base_backoff_s=0.0,
+                                  call_timeout_s=0.05)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def slow_call():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.2)
+        with lock:
+            running[0] -= 1
+
+    errors = []
+
+    def call():
+        try:
+            limiter.call(slow_call, name="slow")
+        except TimeoutError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 4
+    assert peak[0] <= 2
+    deadline = time.monotonic() + 2
+    while limiter.concurrency.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert limiter.concurrency.in_flight == 0
+    assert limiter.metrics.counter("rate_limiter.abandoned") > 0
+
+
+class HTTPError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RateLimitError(Exception):
+    pass
+
+
+@pytest.mark.parametrize("error, kind", [
+    (HTTPError("Too busy", status_code=429), THROTTLED),
+    (HTTPError("Failure during generate. Status code: 429, body: {}"), THROTTLED),
+    (RateLimitError("slow down"), THROTTLED),
+    (ValueError("Rate limit reached for requests"), THROTTLED),
+    (ValueError("Prompt of 14290 bytes is too long for model 429-b"), FATAL),
+    (ValueError("Invalid request id 8f3a429c"), FATAL),
+])
+def test_throttling_is_recognised_by_status_or_type(error, kind):
+    assert classify_error(error) == kind
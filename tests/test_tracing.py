@@ -0,0 +1,146 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: tests/test_tracing.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from config.config import Config
+from frameworks import langchain_legal_analysis, langgraph_ecommerce_workflow
+from utils.deadlines import remaining_s
+from utils.mock_llm import MockChatModel, default_mock_response
+from utils.streaming import RUN_FINISHED
+from utils.tracing import SERVER, BatchSpanProcessor, InMemorySpanExporter, Tracer, current_span
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    tracer = Tracer(BatchSpanProcessor(exporter, flush_interval_s=60))
+    yield tracer
+    tracer.shutdown()
+
+
+def exported(tracer, exporter):
+    tracer.flush()
+    return {span["name"]: span for span in exporter.spans}
+
+
+def test_spans_follow_concurrent_asyncio_tasks(tracer, exporter):
+    async def step(order_id):
+        with tracer.span(f"validate.{order_id}"):
+            await asyncio.sleep(0.01)
+            with tracer.span(f"llm.{order_id}"):
+                await asyncio.sleep(0)
+
+    async def process(order_id):
+        with tracer.span(f"order.{order_id}"):
+            await asyncio.gather(step(order_id), asyncio.create_task(step(f"{order_id}-retry")))
+
+    async def run():
+        await asyncio.gather(process("A"), process("B"))
+        assert current_span() is None
+
+    asyncio.run(run())
+    spans = exported(tracer, exporter)
+    for order_id in ("A", "B"):
+        root = spans[f"order.{order_id}"]
+        assert root["parent_id"] is None
+        for child in (order_id, f"{order_id}-retry"):
+            validate, llm = spans[f"validate.{child}"], spans[f"llm.{child}"]
+            assert (validate["parent_id"], validate["trace_id"]) == (root["span_id"], root["trace_id"])
+            assert (llm["parent_id"], llm["trace_id"]) == (validate["span_id"], root["trace_id"])
+    assert spans["order.A"]["trace_id"] != spans["order.B"]["trace_id"]
+
+
+def test_threads_inherit_the_span_only_through_copy_context(tracer, exporter):
+    def work(name):
+        with tracer.span(name):
+            pass
+
+    with tracer.span("request"):
+        threads = [threading.Thread(target=contextvars.copy_context().run, args=(work, "copied")),
+                   threading.Thread(target=work, args=("plain",))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    spans = exported(tracer, exporter)
+    assert spans["copied"]["parent_id"] == spans["request"]["span_id"]
+    assert spans["plain"]["parent_id"] is None
+    assert spans["plain"]["trace_id"] != spans["request"]["trace_id"]
+
+
+def test_sampled_out_traces_drop_their_children_in_every_task():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(BatchSpanProcessor(exporter, flush_interval_s=60), sample_rate=1e-12)
+
+    async def child():
+        with tracer.span("child"):
+            await asyncio.sleep(0)
+
+    async def run():
+        with tracer.span("root"):
+            await asyncio.gather(child(), asyncio.create_task(child()))
+
+    asyncio.run(run())
+    tracer.shutdown()
+    assert exporter.spans == []
+
+
+def test_errors_are_recorded_on_the_span_that_raised(tracer, exporter):
+    async def failing():
+        with tracer.span("failing"):
+            raise ValueError("bad order")
+
+    async def run():
+        with tracer.span("root"):
+            results = await asyncio.gather(failing(), return_exceptions=True)
+        return results
+
+    assert isinstance(asyncio.run(run())[0], ValueError)
+    spans = exported(tracer, exporter)
+    assert (spans["failing"]["status"], spans["failing"]["error"]) == ("error", "ValueError: bad order")
+    assert spans["root"]["status"] == "ok"
+
+
+def test_streamed_runs_have_a_root_span_and_a_deadline(tracer, exporter, monkeypatch):
+    calls = []
+
+    def record_context(prompt):
+        span = current_span()
+        calls.append((span.trace_id if span else None, remaining_s()))
+        return default_mock_response(prompt)
+
+    for module in (langgraph_ecommerce_workflow, langchain_legal_analysis):
+        monkeypatch.setattr(module, "get_tracer", lambda config=None: tracer)
+    chat = MockChatModel(latency_s=0.0, responder=record_context)
+    ecommerce = langgraph_ecommerce_workflow.LangGraphEcommerceWorkflow(Config(), chat_model=chat)
+    ecommerce.fraud_scorer = None
+    legal = langchain_legal_analysis.LangChainLegalWorkflow(Config(), chat_model=chat)
+
+    async def drain(stream):
+        return [event async for event in stream]
+
+    runs = {
+        "ecommerce.process_order": lambda: ecommerce.stream_order(langgraph_ecommerce_workflow.get_test_order_data("valid")),
+        "legal.analyze_document": lambda: legal.stream_legal_analysis(
+            langchain_legal_analysis.get_test_legal_document("simple_contract")["content"]),
+    }
+    for name, stream in runs.items():
+        calls.clear()
+        events = asyncio.run(drain(stream()))
+        assert events[-1].type == RUN_FINISHED and "error" not in events[-1].data
+        root = exported(tracer, exporter)[name]
+        assert (root["kind"], root["parent_id"]) == (SERVER, None)
+        assert calls and all(trace_id == root["trace_id"] and budget is not None for trace_id, budget in calls)
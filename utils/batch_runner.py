@@ -0,0 +1,297 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/batch_runner.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Per-process state set up once by the pool initializer: the framework, its handler and a persistent event loop
+_worker: Dict[str, Any] = {}
+
+
+@dataclass
+class Shard:
+    """A contiguous run of input records, addressed by byte offsets so workers read it themselves."""
+    index: int
+    start: int
+    end: int
+    records: int
+
+
+def plan_shards(input_path: str, shard_size: int) -> List[Shard]:
+    """Splits a JSONL file into shards of `shard_size` non-blank lines."""
+    shards = []
+    start = offset = records = 0
+    with open(input_path, "rb") as f:
+        for line in f:
+            offset += len(line)
+            if line.strip():
+                records += 1
+            if records == shard_size:
+                shards.append(Shard(len(shards), start, offset, records))
+                start, records = offset, 0
+    if records:
+        shards.append(Shard(len(shards), start, offset, records))
+    return shards
+
+
+def _shard_path(work_dir: str, index: int) -> str:
+    return os.path.join(work_dir, f"shard-{index:06d}.jsonl")
+
+
+def _write_atomic(path: str, lines: Iterable[str]):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(workflow: str, processes: int, mock_latency_s: Optional[float]):
+    """Pool initializer: creates the worker's framework once and reuses it for every shard it is given."""
+    from config.config import Config
+    from utils.rate_limiter import get_shared_rate_limiter
+    from utils.workflow_factory import create_workflow
+
+    config = Config()
+    # Every process has its own limiter, so each one gets an equal share of the watsonx quota
+    config.llm_requests_per_minute /= processes
+    config.llm_tokens_per_minute /= processes
+    config.llm_max_concurrency = max(1, config.llm_max_concurrency // processes)
+    get_shared_rate_limiter(config)
+
+    mock_model = None
+    if mock_latency_s is not None:
+        from utils.mock_llm import MockChatModel
+        mock_model = MockChatModel(latency_s=mock_latency_s, jitter_s=mock_latency_s / 4)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    _worker["loop"] = loop
+    try:
+        _worker["instance"], _worker["handler"] = create_workflow(workflow, config, mock_model)
+    except Exception as e:
+        _worker["setup_error"] = str(e)
+        logger.error(f"Batch worker {os.getpid()} could not set up the {workflow} workflow: {e}")
+
+
+async def _process_records(lines: List[str], concurrency: int) -> List[Dict[str, Any]]:
+    handler = _worker["handler"]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(line: str) -> Dict[str, Any]:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {"error": f"Invalid JSON: {e}"}
+        async with semaphore:
+            try:
+                return await handler(record)
+            except Exception as e:
+                return {"error": str(e)}
+
+    return await asyncio.gather(*(one(line) for line in lines))
+
+
+def _run_shard(input_path: str, work_dir: str, shard: Shard, concurrency: int) -> Dict[str, Any]:
+    """Runs one shard in a worker process and writes its results, in input order, to the shard's file."""
+    if "setup_error" in _worker:
+        raise RuntimeError(_worker["setup_error"])
+    started_at = time.perf_counter()
+    with open(input_path, "rb") as f:
+        f.seek(shard.start)
+        data = f.read(shard.end - shard.start).decode("utf-8")
+    lines = [line for line in data.splitlines() if line.strip()]
+    results = _worker["loop"].run_until_complete(_process_records(lines, concurrency))
+    _write_atomic(_shard_path(work_dir, shard.index), (json.dumps(result, default=str) + "\n" for result in results))
+    return {
+        "shard": shard.index,
+        "records": len(results),
+        "errors": sum(1 for result in results if isinstance(result, dict) and "error" in result),
+        "elapsed_s": round(time.perf_counter() - started_at, 4),
+        "pid": os.getpid(),
+    }
+
+
+def _check_manifest(work_dir: str, manifest: Dict[str, Any]):
+    """Records the job in `work_dir`, or verifies that an existing checkpoint belongs to the same job."""
+    path = os.path.join(work_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+        if existing != manifest:
+            raise ValueError(f"{work_dir} holds checkpoints of a different job (input, workflow, shard size or LLM backend changed); use a new work dir.")
+        return
+    _write_atomic(path, [json.dumps(manifest, indent=2)])
+
+
+def run_batch(input_path: str, output_path: str, workflow: str, processes: Optional[int] = None,
+              shard_size: int = 100, concurrency: int = 4, work_dir: Optional[str] = None,
+              mock_latency_s: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Runs `workflow` over every record of a JSONL file on a process pool and writes one result per record,
+    in input order, to `output_path`.
+
+    The input is cut into shards of `shard_size` records. Each worker process creates the framework once
+    and processes whole shards, `concurrency` records at a time. Each finished shard is written atomically
+    to `work_dir`, which is the checkpoint: rerunning the same job skips finished shards and only runs the
+    rest. The output is merged once every shard has finished. `mock_latency_s` runs LangGraph and LangChain
+    against the offline mock LLM.
+    """
+    processes = processes or os.cpu_count() or 1
+    work_dir = work_dir or output_path + ".shards"
+    os.makedirs(work_dir, exist_ok=True)
+    stat = os.stat(input_path)
+    _check_manifest(work_dir, {
+        "input": os.path.abspath(input_path), "input_size": stat.st_size, "input_mtime_ns": stat.st_mtime_ns,
+        "workflow": workflow, "shard_size": shard_size,
+        # Shards answered by the mock LLM must never be merged with ones answered by watsonx
+        "llm": "mock" if mock_latency_s is not None else "watsonx",
+    })
+
+    shards = plan_shards(input_path, shard_size)
+    pending = [shard for shard in shards if not os.path.exists(_shard_path(work_dir, shard.index))]
+    resumed = len(shards) - len(pending)
+    if resumed:
+        logger.info(f"Resuming: {resumed} of {len(shards)} shards were already completed.")
+
+    started_at = time.perf_counter()
+    completed, failed = [], []
+    if pending:
+        # spawn, not fork: workers must not inherit the parent's threads, locks or open clients
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(processes, len(pending)), mp_context=context, initializer=_init_worker,
+                                 initargs=(workflow, processes, mock_latency_s)) as pool:
+            futures = {pool.submit(_run_shard, input_path, work_dir, shard, concurrency): shard for shard in pending}
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    completed.append(future.result())
+                    logger.info(f"Shard {shard.index + 1}/{len(shards)} done ({len(completed) + resumed} of {len(shards)} completed).")
+                except BrokenProcessPool as e:
+                    failed.append({"shard": shard.index, "error": f"Worker process died: {e}"})
+                except Exception as e:
+                    failed.append({"shard": shard.index, "error": str(e)})
+                    logger.error(f"Shard {shard.index} failed: {e}")
+    elapsed = time.perf_counter() - started_at
+
+    processed = sum(result["records"] for result in completed)
+    report = {
+        "workflow": workflow,
+        "processes": processes,
+        "shards": len(shards),
+        "records": sum(shard.records for shard in shards),
+        "resumed_shards": resumed,
+        "completed_shards": len(completed),
+        "failed_shards": sorted(failed, key=lambda failure: failure["shard"]),
+        "record_errors": sum(result["errors"] for result in completed),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(processed / elapsed, 2) if elapsed else 0.0,
+        "worker_pids": len({result["pid"] for result in completed}),
+        "output": None,
+    }
+    if failed:
+        logger.error(f"{len(failed)} shards failed; rerun the same command to resume from {work_dir}.")
+        return report
+
+    def merged_lines():
+        for shard in shards:
+            with open(_shard_path(work_dir, shard.index), "r", encoding="utf-8") as f:
+                yield from f
+
+    _write_atomic(output_path, merged_lines())
+    report["output"] = output_path
+    return report
+
+
+def benchmark_scaling(input_path: str, workflow: str, process_counts: Iterable[int] = (1, 2, 4),
+                      shard_size: int = 50, concurrency: int = 4, mock_latency_s: Optional[float] = 0.0) -> Dict[str, Any]:
+    """
+    Runs the same job with each process count and reports throughput, speedup over one process and scaling
+    efficiency (speedup / processes). With the default zero-latency mock LLM the job is CPU-bound, so the
+    numbers show how far framework overhead scales with cores; efficiency flattens once processes exceed them.
+    Elapsed time includes starting the workers (imports and framework setup), so use enough records that
+    this start-up cost is small next to the processing time.
+    """
+    runs = {}
+    for processes in process_counts:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result = run_batch(input_path, os.path.join(tmp_dir, "output.jsonl"), workflow, processes=processes,
+                               shard_size=shard_size, concurrency=concurrency, mock_latency_s=mock_latency_s)
+        runs[processes] = result
+    baseline = runs[min(runs)]["throughput_rps"] / min(runs)
+    return {
+        "workflow": workflow,
+        "cpu_count": os.cpu_count(),
+        "records": next(iter(runs.values()))["records"],
+        "runs": [
+            {
+                "processes": processes,
+                "elapsed_s": result["elapsed_s"],
+                "throughput_rps": result["throughput_rps"],
+                "speedup": round(result["throughput_rps"] / baseline, 2) if baseline else None,
+                "efficiency": round(result["throughput_rps"] / (baseline * processes), 2) if baseline else None,
+            }
+            for processes, result in runs.items()
+        ],
+    }
+
+
+def write_sample_orders(path: str, count: int):
+    """Writes `count` copies of the valid test order with unique ids, for trying the runner offline."""
+    from frameworks.langgraph_ecommerce_workflow import get_test_order_data
+
+    order = get_test_order_data("valid")
+    _write_atomic(path, (json.dumps({**order, "order_id": f"BATCH_{index:07d}", "detail_level": "summary"}) + "\n"
+                         for index in range(count)))
+
+
+def main():
+    import argparse
+    from utils.workflow_factory import WORKFLOW_FIELDS
+
+    parser = argparse.ArgumentParser(description="Run a workflow over a JSONL file on a process pool, with resumable shards.")
+    parser.add_argument("input", help="JSONL file, one request record per line")
+    parser.add_argument("--workflow", choices=sorted(WORKFLOW_FIELDS), default="ecommerce")
+    parser.add_argument("--output", help="Merged results, one line per input record (default: <input>.results.jsonl)")
+    parser.add_argument("--work-dir", help="Shard checkpoints (default: <output>.shards)")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--shard-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="Records in flight per worker")
+    parser.add_argument("--mock-llm", action="store_true", help="Use the offline mock LLM (ecommerce and legal only)")
+    parser.add_argument("--mock-latency", type=float, default=0.0, help="Mock LLM latency per call in seconds")
+    parser.add_argument("--sample-orders", type=int, default=0, help="First write this many sample orders to the input file")
+    parser.add_argument("--scaling", help="Comma-separated process counts to benchmark instead of running the job, e.g. 1,2,4,8")
+    args = parser.parse_args()
+
+    if args.sample_orders:
+        write_sample_orders(args.input, args.sample_orders)
+    mock_latency_s = args.mock_latency if args.mock_llm else None
+    if args.scaling:
+        report = benchmark_scaling(args.input, args.workflow, [int(count) for count in args.scaling.split(",")],
+                                   shard_size=args.shard_size, concurrency=args.concurrency, mock_latency_s=mock_latency_s)
+    else:
+        report = run_batch(args.input, args.output or args.input + ".results.jsonl", args.workflow, processes=args.processes,
+                           shard_size=args.shard_size, concurrency=args.concurrency, work_dir=args.work_dir,
+                           mock_latency_s=mock_latency_s)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,239 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/clause_index.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import os
+import re
+import json
+import zlib
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    CPU-only local text embedder based on signed feature hashing of word unigrams and bigrams.
+    Needs no model download and produces L2-normalised float32 vectors.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embeds a batch of texts into an (n, dim) float32 matrix."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN_RE.findall(text.lower())
+            features = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+            for feature in features:
+                hashed = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, hashed % self.dim] += 1.0 if (hashed >> 31) & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class ClauseVectorIndex:
+    """
+    In-process vector index of the clauses of previously assessed legal documents, each with the risk
+    assessment its document received, plus the assessment of every document keyed by its exact digest.
+    Clause vectors are stored as a .npy file loaded with memory mapping; records and document assessments
+    live in JSON sidecars. In memory the vectors sit in a preallocated buffer that grows by doubling, so adds
+    and searches never restack the matrix. A clause that is added again replaces its earlier entry, and once
+    `max_entries` is reached the oldest clause (or document) is overwritten.
+    """
+    VECTORS_FILE = "vectors.npy"
+    RECORDS_FILE = "records.json"
+    DOCUMENTS_FILE = "documents.json"
+    # Records keep only the head of each text, which is all the prompt context shows
+    RECORD_TEXT_CHARS = 500
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None, path: Optional[str] = None, max_entries: int = 10_000):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.embedder = embedder or HashingEmbedder()
+        self.path = path
+        self.max_entries = max_entries
+        self._vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._size = 0
+        self._records: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._documents: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Row overwritten by the next new entry once the index is full; rows from here on are the oldest
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def load(cls, path: str, embedder: Optional[HashingEmbedder] = None, max_entries: int = 10_000) -> "ClauseVectorIndex":
+        """Loads an index from `path`, memory-mapping the vectors. Returns an empty index if none exists yet."""
+        index = cls(embedder=embedder, path=path, max_entries=max_entries)
+        documents_path = os.path.join(path, cls.DOCUMENTS_FILE)
+        if os.path.exists(documents_path):
+            with open(documents_path, "r", encoding="utf-8") as f:
+                documents = json.load(f)
+            index._documents = OrderedDict(list(documents.items())[-max_entries:])
+        vectors_path = os.path.join(path, cls.VECTORS_FILE)
+        records_path = os.path.join(path, cls.RECORDS_FILE)
+        if not (os.path.exists(vectors_path) and os.path.exists(records_path)):
+            logger.info(f"No clause index found at {path}; starting with an empty index.")
+            return index
+
+        vectors = np.load(vectors_path, mmap_mode="r")
+        with open(records_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        if vectors.shape != (len(records), index.embedder.dim):
+            logger.warning(f"Clause index at {path} has shape {vectors.shape} but {len(records)} records; ignoring it.")
+            return index
+
+        # Saved oldest first, so the newest entries are the ones kept when the file exceeds max_entries
+        keep = max(0, len(records) - max_entries)
+        index._vectors = vectors[keep:]
+        index._records = records[keep:]
+        index._size = len(index._records)
+        index._rows = {record.get("digest") or text_digest(record["text"]): row for row, record in enumerate(index._records)}
+        index._next = 0
+        logger.info(f"Loaded clause index with {index._size} clauses of {len(index._documents)} documents from {path}.")
+        return index
+
+    def save(self, path: Optional[str] = None):
+        """Persists the vectors and records to `path` (defaults to the path the index was loaded from), oldest first."""
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given for saving the clause index.")
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            order = list(range(self._next, self._size)) + list(range(self._next))
+            vectors = self._vectors[order]
+            records = [self._records[row] for row in order]
+            documents = dict(self._documents)
+        # Write to temporary files first so a reader never maps a half-written index
+        vectors_tmp = os.path.join(path, self.VECTORS_FILE + ".tmp.npy")
+        records_tmp = os.path.join(path, self.RECORDS_FILE + ".tmp")
+        documents_tmp = os.path.join(path, self.DOCUMENTS_FILE + ".tmp")
+        np.save(vectors_tmp, np.ascontiguousarray(vectors))
+        with open(records_tmp, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        with open(documents_tmp, "w", encoding="utf-8") as f:
+            json.dump(documents, f)
+        os.replace(vectors_tmp, os.path.join(path, self.VECTORS_FILE))
+        os.replace(records_tmp, os.path.join(path, self.RECORDS_FILE))
+        os.replace(documents_tmp, os.path.join(path, self.DOCUMENTS_FILE))
+        self.path = path
+
+    def add_document(self, document: str, clauses: List[str], risk_level: str, identified_risks: List[str]):
+        """Stores a document's assessment for exact reuse and indexes its clauses for retrieval."""
+        digest = text_digest(document)
+        with self._lock:
+            self._documents[digest] = {"risk_level": risk_level, "identified_risks": list(identified_risks)}
+            self._documents.move_to_end(digest)
+            while len(self._documents) > self.max_entries:
+                self._documents.popitem(last=False)
+        self.add(clauses, risk_level, identified_risks, source=digest)
+
+    def document_assessment(self, document: str) -> Optional[Dict[str, Any]]:
+        """The stored assessment of exactly this document (up to whitespace and case), if it was assessed before."""
+        with self._lock:
+            assessment = self._documents.get(text_digest(document))
+            return {"risk_level": assessment["risk_level"], "identified_risks": list(assessment["identified_risks"])} if assessment else None
+
+    def add(self, texts: List[str], risk_level: str, identified_risks: List[str], source: str = ""):
+        """Adds texts together with the risk assessment they received, replacing earlier entries for the same texts."""
+        texts = [text for text in texts if text.strip()]
+        if not texts:
+            return
+        vectors = self.embedder.embed(texts)
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                digest = text_digest(text)
+                row = self._rows.get(digest)
+                if row is None:
+                    row = self._allocate_row()
+                    self._rows[digest] = row
+                self._vectors[row] = vector
+                self._records[row] = {
+                    "text": text[:self.RECORD_TEXT_CHARS],
+                    "digest": digest,
+                    "risk_level": risk_level,
+                    "identified_risks": list(identified_risks),
+                    "source": source,
+                }
+
+    def search(self, queries: List[str], top_k: int = 3) -> List[List[Tuple[float, Dict[str, Any]]]]:
+        """Returns, for each query, up to `top_k` (cosine similarity, record) pairs, best first."""
+        if not queries:
+            return []
+        embedded = self.embedder.embed(queries)
+        # Scored under the lock: once the index is full, adds overwrite rows in place
+        with self._lock:
+            if self._size == 0:
+                return [[] for _ in queries]
+            scores = embedded @ self._vectors[:self._size].T
+            k = min(top_k, self._size)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for row, candidates in enumerate(top):
+                ordered = candidates[np.argsort(-scores[row, candidates])]
+                results.append([(float(scores[row, col]), self._records[col]) for col in ordered])
+        return results
+
+    def _allocate_row(self) -> int:
+        """Returns the row for a new entry, growing the buffer or evicting the oldest entry. Caller must hold the lock."""
+        if self._size < self.max_entries:
+            if self._size == self._vectors.shape[0] or not self._vectors.flags.writeable:
+                self._grow(min(self.max_entries, max(64, 2 * self._size)))
+            self._records.append({})
+            self._size += 1
+            return self._size - 1
+        if not self._vectors.flags.writeable:
+            self._grow(self._size)
+        row = self._next
+        self._next = (self._next + 1) % self.max_entries
+        del self._rows[self._records[row]["digest"]]
+        return row
+
+    def _grow(self, capacity: int):
+        """Copies the vectors into a new writable buffer with room for `capacity` rows. Caller must hold the lock."""
+        vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+
+
+def text_digest(text: str) -> str:
+    """Whitespace- and case-insensitive fingerprint used to recognise a text that was already indexed."""
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def format_similar_clauses(matches: List[Tuple[float, Dict[str, Any]]], max_chars: int = 200) -> str:
+    """Renders retrieved clauses and their documents' assessments as compact prompt context, one line per clause."""
+    if not matches:
+        return "None available."
+    lines = []
+    for score, record in matches:
+        text = " ".join(record["text"].split())
+        if len(text) > max_chars:
+            text = text[:max_chars].rstrip() + "..."
+        risks = "; ".join(record.get("identified_risks", [])[:3]) or "none noted"
+        lines.append(f"- [{record.get('risk_level', 'Unknown')} risk, similarity {score:.2f}] {text} -> {risks}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    index = ClauseVectorIndex()
+    index.add(["Either party may terminate this Agreement with 30 days' written notice."], "Low", ["Short notice period"])
+    index.add(["The Client shall pay a fee of $5,000 upon completion of services."], "Medium", ["No milestone payments"])
+    for matches in index.search(["Either party may terminate this Agreement upon 30 days written notice.", "Payment terms"], top_k=2):
+        print(format_similar_clauses(matches))
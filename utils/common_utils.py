@@ -7,7 +7,7 @@ LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
 import re
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +24,22 @@ def extract_json_from_text(text: str) -> Dict[str, Any]:
             logger.warning(f"Could not decode JSON from text segment: {json_match.group()} - Error: {e}")
     logger.warning("No valid JSON found in the text.")
     return {}
+
+def extract_json_array_from_text(text: str) -> List[Any]:
+    """
+    Extracts the first valid JSON array from a given text string.
+    Handles cases where the array might be embedded within other text.
+    """
+    json_match = re.search(r'\[.*\]', text, re.DOTALL)
+    if json_match:
+        try:
+            result = json.loads(json_match.group())
+            if isinstance(result, list):
+                return result
+        except json.JSONDecodeError as e:
+            logger.warning(f"Could not decode JSON array from text segment: {json_match.group()} - Error: {e}")
+    logger.warning("No valid JSON array found in the text.")
+    return []
 if __name__ == "__main__":
     test_text_1 = "Some introductory text. {\"name\": \"Alice\", \"age\": 30} and some trailing text."
     test_text_2 = "No JSON here."
@@ -33,4 +49,6 @@ if __name__ == "__main__":
     print(f"Extracted from 1: {extract_json_from_text(test_text_1)}")
     print(f"Extracted from 2: {extract_json_from_text(test_text_2)}")
     print(f"Extracted from 3: {extract_json_from_text(test_text_3)}")
-    print(f"Extracted from 4: {extract_json_from_text(test_text_4)}")
\ No newline at end of file
+    print(f"Extracted from 4: {extract_json_from_text(test_text_4)}")
+    test_text_5 = "Result: [{\"order_id\": \"ORD_001\", \"status\": \"valid\"}] done."
+    print(f"Extracted array from 5: {extract_json_array_from_text(test_text_5)}")
\ No newline at end of file
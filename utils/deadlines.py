@@ -0,0 +1,47 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/deadlines.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Absolute time.monotonic() deadline of the workflow run the current task belongs to
+_deadline: ContextVar[Optional[float]] = ContextVar("workflow_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a workflow's end-to-end budget runs out before an LLM call could complete."""
+
+
+@contextmanager
+def deadline(budget_s: Optional[float]):
+    """
+    Gives the enclosed work (and every task it starts) `budget_s` seconds end to end. Nested scopes can only
+    shorten the deadline; a falsy budget leaves the current deadline unchanged.
+    """
+    if not budget_s:
+        yield
+        return
+    current = _deadline.get()
+    token = _deadline.set(min(current, time.monotonic() + budget_s) if current is not None else time.monotonic() + budget_s)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_s() -> Optional[float]:
+    """Seconds left before the current deadline, or None when no deadline is set."""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def check_deadline(what: str = "LLM call"):
+    """Raises DeadlineExceeded if the current deadline has already passed."""
+    left = remaining_s()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Workflow deadline exceeded before {what} ({-left:.2f}s over budget).")
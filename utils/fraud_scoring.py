@@ -0,0 +1,177 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/fraud_scoring.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import math
+import re
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS_EMAIL_DOMAINS = {
+    "protonmail.com", "proton.me", "tutanota.com", "guerrillamail.com", "mailinator.com",
+    "temp-mail.org", "10minutemail.com", "yopmail.com", "sharklasers.com",
+}
+RISKY_PAYMENT_METHODS = {"prepaid_card", "gift_card", "crypto", "cryptocurrency", "money_order"}
+SUSPICIOUS_ADDRESS_WORDS = ("fake", "nowhere", "test", "unknown", "n/a", "asdf")
+
+FEATURE_NAMES = (
+    "order_value",
+    "high_value_item_count",
+    "max_quantity",
+    "anonymous_email_domain",
+    "email_digit_ratio",
+    "risky_payment_method",
+    "suspicious_address",
+    "name_email_mismatch",
+    "missing_fields",
+)
+# Weights sum to more than 1 on purpose: a couple of strong signals alone should reach the flag band
+FEATURE_WEIGHTS = np.array([0.20, 0.20, 0.15, 0.20, 0.10, 0.30, 0.30, 0.10, 0.50], dtype=np.float64)
+
+
+def _number(value: Any) -> Optional[float]:
+    """`value` as a finite float, or None if it is not a number."""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+class FraudPreScorer:
+    """
+    Local, rule-based fraud pre-scoring computed for a batch of orders at once.
+    Scores below `auto_approve_below` are approved and scores above `auto_flag_above` are flagged
+    without an LLM call; only the ambiguous middle band is sent to the LLM. Orders with malformed items
+    (a quantity that is not a positive number, or a price that is not a non-negative one) are scored on
+    their valid items only and always sent to the LLM, with the offending fields listed under "invalid".
+    """
+
+    def __init__(self, auto_approve_below: float = 0.15, auto_flag_above: float = 0.6, high_value_price: float = 500.0):
+        if auto_approve_below > auto_flag_above:
+            raise ValueError("auto_approve_below must not exceed auto_flag_above")
+        self.auto_approve_below = auto_approve_below
+        self.auto_flag_above = auto_flag_above
+        self.high_value_price = high_value_price
+
+    @classmethod
+    def from_config(cls, config) -> "FraudPreScorer":
+        return cls(auto_approve_below=config.fraud_auto_approve_below, auto_flag_above=config.fraud_auto_flag_above)
+
+    def features(self, orders: List[Dict[str, Any]]) -> np.ndarray:
+        """Builds the (n_orders, n_features) feature matrix, every feature scaled to [0, 1]."""
+        return self._features(orders)[0]
+
+    def _features(self, orders: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[List[str]]]:
+        """The feature matrix, and per order the fields of the items that were left out as malformed."""
+        parsed = [self._items(order) for order in orders]
+        n = len(orders)
+        max_items = max((len(lines) for lines, _ in parsed), default=0)
+        quantities = np.zeros((n, max(max_items, 1)), dtype=np.float64)
+        prices = np.zeros_like(quantities)
+        text_features = np.zeros((n, 6), dtype=np.float64)
+
+        for row, (order, (lines, _)) in enumerate(zip(orders, parsed)):
+            for col, (quantity, price) in enumerate(lines):
+                quantities[row, col] = quantity
+                prices[row, col] = price
+            text_features[row] = self._text_features(order)
+
+        line_values = quantities * prices
+        order_value = line_values.sum(axis=1)
+        high_value_count = (quantities * (prices >= self.high_value_price)).sum(axis=1)
+        max_quantity = quantities.max(axis=1)
+
+        numeric = np.column_stack([
+            np.clip(np.log1p(order_value) / math.log1p(10_000), 0.0, 1.0),
+            np.clip(high_value_count / 5.0, 0.0, 1.0),
+            np.clip((max_quantity - 1) / 9.0, 0.0, 1.0),
+        ])
+        return np.hstack([numeric, text_features]), [invalid for _, invalid in parsed]
+
+    def score(self, orders: List[Dict[str, Any]]) -> np.ndarray:
+        """Fraud scores in [0, 1] for a batch of orders."""
+        return self._score(orders)[0]
+
+    def _score(self, orders: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[List[str]]]:
+        if not orders:
+            return np.zeros(0), []
+        features, invalid = self._features(orders)
+        return np.clip(features @ FEATURE_WEIGHTS, 0.0, 1.0), invalid
+
+    def score_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Scores a batch of orders and assigns each one a decision: "approve", "flag" or "llm"."""
+        scores, invalid = self._score(orders)
+        decisions = np.where(scores < self.auto_approve_below, "approve",
+                             np.where(scores > self.auto_flag_above, "flag", "llm"))
+        results = []
+        for score, decision, fields in zip(scores, decisions, invalid):
+            if fields:
+                results.append({"score": round(float(score), 4), "decision": "llm", "invalid": fields})
+            else:
+                results.append({"score": round(float(score), 4), "decision": str(decision)})
+        return results
+
+    @staticmethod
+    def _items(order: Dict[str, Any]) -> Tuple[List[Tuple[float, float]], List[str]]:
+        """The (quantity, price) of each well-formed item, and the fields of the malformed ones."""
+        items = order.get("items") if isinstance(order, dict) else None
+        if not items:
+            return [], []
+        if not isinstance(items, list):
+            return [], ["items"]
+        lines, invalid = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                invalid.append(f"items[{index}]")
+                continue
+            quantity, price = _number(item.get("quantity", 1)), _number(item.get("price") or 0)
+            if quantity is None or quantity <= 0:
+                invalid.append(f"items[{index}].quantity")
+            if price is None or price < 0:
+                invalid.append(f"items[{index}].price")
+            if quantity is not None and quantity > 0 and price is not None and price >= 0:
+                lines.append((quantity, price))
+        return lines, invalid
+
+    def _text_features(self, order: Dict[str, Any]) -> List[float]:
+        customer = (order.get("customer_info") if isinstance(order, dict) else None) or {}
+        if not isinstance(customer, dict):
+            customer = {}
+        email = str(customer.get("email", "")).lower()
+        local_part, _, domain = email.partition("@")
+        name_tokens = [token for token in re.split(r"\W+", str(customer.get("name", "")).lower()) if len(token) > 1]
+        address = str(customer.get("address", "")).lower()
+
+        anonymous_domain = 1.0 if domain in ANONYMOUS_EMAIL_DOMAINS else 0.0
+        digit_ratio = sum(ch.isdigit() for ch in local_part) / len(local_part) if local_part else 1.0
+        risky_payment = 1.0 if str(customer.get("payment_method", "")).lower() in RISKY_PAYMENT_METHODS else 0.0
+        suspicious_address = 1.0 if (
+            any(word in address for word in SUSPICIOUS_ADDRESS_WORDS)
+            or not re.search(r"\d", address)
+            or len(address) < 10
+        ) else 0.0
+        name_mismatch = 0.0 if any(token in local_part for token in name_tokens) else 1.0
+        missing = [customer.get("name"), customer.get("email"), customer.get("address"), customer.get("payment_method")]
+        missing_fields = sum(1 for value in missing if not value) / len(missing)
+
+        return [anonymous_domain, min(1.0, digit_ratio * 2), risky_payment, suspicious_address, name_mismatch, missing_fields]
+
+
+if __name__ == "__main__":
+    scorer = FraudPreScorer()
+    sample_orders = [
+        {"items": [{"quantity": 1, "price": 1200}, {"quantity": 2, "price": 25}],
+         "customer_info": {"name": "Alice Smith", "email": "alice.smith@example.com", "address": "123 Main St, Anytown, USA", "payment_method": "credit_card"}},
+        {"items": [{"quantity": 5, "price": 800}],
+         "customer_info": {"name": "David Smith", "email": "davidsmith123@protonmail.com", "address": "999 Fake Address, Nowhere, CA", "payment_method": "prepaid_card"}},
+    ]
+    print(scorer.score_orders(sample_orders))
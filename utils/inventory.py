@@ -0,0 +1,254 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/inventory.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import csv
+import logging
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryIndex:
+    """
+    In-memory stock index with O(1) per-item lookups and atomic all-or-nothing reservations.
+
+    Stock levels live in flat arrays addressed through a SKU -> slot dict. Reservations lock only the
+    stripes that hold the order's items (always acquired in ascending order, so concurrent orders cannot
+    deadlock), which lets orders for unrelated items proceed in parallel instead of queueing on one lock.
+    Calls for the same order id are serialised on a striped per-order lock, so a retried reservation never
+    reserves twice and a reservation cannot be committed or released halfway through.
+    Committed stock changes can optionally be written through to SQLite, together with the ids of committed
+    orders so that a resumed order is never committed twice. Each write happens under the stripe locks of the
+    change it records, so concurrent changes to one SKU reach the database in the order they were made.
+    """
+    COMMITTED_HISTORY = 100_000
+
+    def __init__(self, num_stripes: int = 64, db_path: Optional[str] = None):
+        self._slots: Dict[str, int] = {}
+        self._skus: List[str] = []
+        self._names: List[str] = []
+        self._on_hand = array("q")
+        self._reserved = array("q")
+        self._stripes = [threading.Lock() for _ in range(num_stripes)]
+        self._order_stripes = [threading.Lock() for _ in range(num_stripes)]
+        self._catalog_lock = threading.Lock()
+        self._reservations: Dict[str, Dict[int, int]] = {}
+        self._reservations_lock = threading.Lock()
+        self._committed: "OrderedDict[str, None]" = OrderedDict()
+        self._db = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._open_db(db_path)
+
+    # --- catalog ---
+
+    def set_stock(self, sku: str, quantity: int, name: str = ""):
+        """Adds a SKU or overwrites its on-hand quantity."""
+        with self._catalog_lock:
+            slot = self._slots.get(sku)
+            if slot is None:
+                self._slots[sku] = len(self._on_hand)
+                self._skus.append(sku)
+                self._names.append(name or sku)
+                self._on_hand.append(int(quantity))
+                self._reserved.append(0)
+                slot = self._slots[sku]
+        with self._stripes[slot % len(self._stripes)]:
+            self._on_hand[slot] = int(quantity)
+            self._persist([slot])
+
+    def bulk_load(self, rows: Iterable[Tuple[str, int, str]]) -> int:
+        """
+        Loads many (sku, quantity, name) rows under the catalog lock and every stripe lock, so no reservation
+        sees a half-loaded catalog. Returns the number of rows loaded.
+        """
+        loaded = 0
+        with self._catalog_lock, self._locked(range(len(self._stripes))):
+            for sku, quantity, name in rows:
+                slot = self._slots.get(sku)
+                if slot is None:
+                    self._slots[sku] = len(self._on_hand)
+                    self._skus.append(sku)
+                    self._names.append(name or sku)
+                    self._on_hand.append(int(quantity))
+                    self._reserved.append(0)
+                else:
+                    self._on_hand[slot] = int(quantity)
+                loaded += 1
+            self._persist(range(len(self._on_hand)))
+        return loaded
+
+    def load_csv(self, path: str, sku_column: str = "item_id", quantity_column: str = "quantity", name_column: str = "name") -> int:
+        """Bulk-loads stock levels from a CSV file with a header row."""
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            loaded = self.bulk_load(
+                (row[sku_column], int(row[quantity_column] or 0), row.get(name_column, "") or "") for row in reader
+            )
+        logger.info(f"Loaded {loaded} inventory rows from {path}.")
+        return loaded
+
+    def available(self, sku: str) -> int:
+        """Quantity that can still be reserved (0 for unknown SKUs)."""
+        slot = self._slots.get(sku)
+        if slot is None:
+            return 0
+        return self._on_hand[slot] - self._reserved[slot]
+
+    def __len__(self) -> int:
+        return len(self._on_hand)
+
+    # --- reservations ---
+
+    def reserve(self, order_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Atomically reserves every item of an order, or nothing at all. Items with a quantity that is not a
+        positive integer are rejected as unavailable and also listed under "invalid_items".
+        Re-reserving an order that already holds a reservation is a no-op, so retries are safe.
+        """
+        with self._order_claim(order_id):
+            return self._reserve(order_id, items)
+
+    def _reserve(self, order_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._reservations_lock:
+            if order_id in self._reservations:
+                return {"reserved": True, "unavailable_items": []}
+
+        wanted: Dict[int, int] = {}
+        unknown, invalid = [], []
+        for item in items:
+            slot = self._slots.get(item.get("item_id"))
+            quantity = _quantity(item.get("quantity", 1))
+            if quantity is None:
+                invalid.append(item.get("name") or item.get("item_id"))
+            elif slot is None:
+                unknown.append(item.get("name") or item.get("item_id"))
+            else:
+                wanted[slot] = wanted.get(slot, 0) + quantity
+        if invalid:
+            return {"reserved": False, "unavailable_items": invalid + unknown, "invalid_items": invalid}
+        if unknown:
+            return {"reserved": False, "unavailable_items": unknown}
+
+        with self._locked(wanted):
+            short = [slot for slot, quantity in wanted.items() if self._on_hand[slot] - self._reserved[slot] < quantity]
+            if short:
+                return {"reserved": False, "unavailable_items": [self._names[slot] for slot in short]}
+            for slot, quantity in wanted.items():
+                self._reserved[slot] += quantity
+
+        with self._reservations_lock:
+            self._reservations[order_id] = wanted
+        return {"reserved": True, "unavailable_items": []}
+
+    def commit(self, order_id: str) -> bool:
+        """Turns an order's reservation into a stock decrement. Returns False if nothing was reserved."""
+        with self._order_claim(order_id):
+            wanted = self._pop_reservation(order_id)
+            if wanted is None:
+                return False
+            with self._locked(wanted):
+                for slot, quantity in wanted.items():
+                    self._reserved[slot] -= quantity
+                    self._on_hand[slot] -= quantity
+                self._persist(wanted.keys(), committed_order_id=order_id)
+            with self._reservations_lock:
+                self._committed[order_id] = None
+                if len(self._committed) > self.COMMITTED_HISTORY:
+                    self._committed.popitem(last=False)
+        return True
+
+    def is_committed(self, order_id: str) -> bool:
+        """Whether an order's stock was already committed (remembered for recent orders, or all of them with SQLite)."""
+        with self._reservations_lock:
+            if order_id in self._committed:
+                return True
+        if self._db is None:
+            return False
+        with self._db_lock:
+            return self._db.execute("SELECT 1 FROM committed_orders WHERE order_id = ?", (order_id,)).fetchone() is not None
+
+    def release(self, order_id: str) -> bool:
+        """Returns an order's reserved stock to the available pool. Returns False if nothing was reserved."""
+        with self._order_claim(order_id):
+            wanted = self._pop_reservation(order_id)
+            if wanted is None:
+                return False
+            with self._locked(wanted):
+                for slot, quantity in wanted.items():
+                    self._reserved[slot] -= quantity
+        return True
+
+    def _pop_reservation(self, order_id: str) -> Optional[Dict[int, int]]:
+        with self._reservations_lock:
+            return self._reservations.pop(order_id, None)
+
+    def _order_claim(self, order_id: str) -> threading.Lock:
+        """The lock that serialises reserve, commit and release calls for one order id. Taken before any stripe lock."""
+        return self._order_stripes[hash(order_id) % len(self._order_stripes)]
+
+    @contextmanager
+    def _locked(self, slots: Iterable[int]):
+        """Holds the stripe locks covering `slots`, acquired in ascending order."""
+        stripe_ids = sorted({slot % len(self._stripes) for slot in slots})
+        for stripe_id in stripe_ids:
+            self._stripes[stripe_id].acquire()
+        try:
+            yield
+        finally:
+            for stripe_id in reversed(stripe_ids):
+                self._stripes[stripe_id].release()
+
+    # --- SQLite persistence ---
+
+    def _open_db(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS inventory (sku TEXT PRIMARY KEY, name TEXT, on_hand INTEGER NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS committed_orders (order_id TEXT PRIMARY KEY)")
+        rows = self._db.execute("SELECT sku, on_hand, name FROM inventory").fetchall()
+        db, self._db = self._db, None  # Do not write back rows that were just read
+        self.bulk_load(rows)
+        self._db = db
+        logger.info(f"Opened inventory database {db_path} with {len(rows)} items.")
+
+    def _persist(self, slots: Iterable[int], committed_order_id: Optional[str] = None):
+        """Writes the stock of `slots` to SQLite. Caller must hold the stripe locks covering `slots`."""
+        if self._db is None:
+            return
+        rows = [(self._skus[slot], self._names[slot], self._on_hand[slot]) for slot in slots]
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT INTO inventory (sku, name, on_hand) VALUES (?, ?, ?) "
+                "ON CONFLICT(sku) DO UPDATE SET name = excluded.name, on_hand = excluded.on_hand",
+                rows
+            )
+            if committed_order_id is not None:
+                self._db.execute("INSERT OR IGNORE INTO committed_orders (order_id) VALUES (?)", (committed_order_id,))
+            self._db.commit()
+
+
+def _quantity(value: Any) -> Optional[int]:
+    """`value` as a positive integer quantity, or None if it is not one."""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return quantity if quantity > 0 else None
+
+
+if __name__ == "__main__":
+    inventory = InventoryIndex()
+    inventory.bulk_load([("P001", 2, "Laptop Pro"), ("P002", 10, "Wireless Mouse")])
+    print(inventory.reserve("A", [{"item_id": "P001", "quantity": 1}, {"item_id": "P002", "quantity": 2}]))
+    print(inventory.reserve("B", [{"item_id": "P001", "quantity": 2}]))
+    print(inventory.commit("A"), inventory.available("P001"), inventory.available("P002"))
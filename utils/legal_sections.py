@@ -0,0 +1,220 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/legal_sections.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Numbered headings such as "4. Termination." or "2.1 Governing Law." at the start of a line.
+SECTION_HEADING_RE = re.compile(
+    r"^[ \t]*(?P<number>\d+(?:\.\d+)*)\.?[ \t]+(?P<heading>[A-Z][A-Za-z ,'&/\-]{1,80}?)\.(?=\s)",
+    re.MULTILINE
+)
+# Lettered sub-clauses such as "a. To use ..." or "(b) Not to disclose ...".
+SUBCLAUSE_RE = re.compile(r"^[ \t]*(?:\((?P<paren>[a-z])\)|(?P<dot>[a-z])[.)])[ \t]+", re.MULTILINE)
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+CATEGORY_KEYWORDS = {
+    "termination": ["terminat", "expir", "cancel", "term and", "upon termination", "notice of"],
+    "obligations": ["agrees", "must ", "obligat", "undertake", "required to", "responsible for",
+                    "shall not", "shall pay", "shall promptly", "shall maintain", "shall return", "shall provide"],
+    "rights": ["may ", "entitled", "right", "license", "remed", "relief", "consent"],
+    "payment": ["pay", "fee", "invoice", "compensation", "price"],
+    "confidentiality": ["confidential", "non-disclosure", "proprietary", "secre"],
+    "governing_law": ["governing law", "governed by", "jurisdiction", "venue", "conflict of law"],
+    "liability": ["liabil", "indemn", "damages", "warrant"],
+}
+CLAUSE_CATEGORIES = ("rights", "obligations", "termination")
+
+
+def classify_text(text: str, heading: str = "") -> List[str]:
+    """Returns the keyword categories matched by a heading and its body text, heading matches first."""
+    heading_lower = heading.lower()
+    body_lower = text.lower()
+    categories = []
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if any(keyword in heading_lower for keyword in keywords):
+            categories.append(category)
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if category not in categories and any(keyword in body_lower for keyword in keywords):
+            categories.append(category)
+    return categories
+
+
+@dataclass
+class ClauseSpan:
+    """A lettered sub-clause with character offsets into the source document."""
+    label: str
+    start: int
+    end: int
+    categories: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Section:
+    """A numbered section with character offsets into the source document."""
+    number: Optional[str]
+    heading: str
+    start: int
+    end: int
+    categories: List[str] = field(default_factory=list)
+    subclauses: List[ClauseSpan] = field(default_factory=list)
+
+
+class LegalDocumentIndex:
+    """Section/clause index of a legal document, built locally without any LLM call."""
+
+    def __init__(self, text: str, sections: List[Section]):
+        self.text = text
+        self.sections = sections
+
+    def candidates(self, categories=CLAUSE_CATEGORIES) -> List[Section]:
+        """Sections classified under any of the given categories."""
+        return [section for section in self.sections if set(section.categories) & set(categories)]
+
+    def render_candidates(self, categories=CLAUSE_CATEGORIES) -> str:
+        """
+        Compact prompt text containing only the candidate sections, each labelled with its number.
+        Falls back to the full document when no section structure was detected.
+        """
+        candidates = [section for section in self.candidates(categories) if section.number]
+        if not candidates:
+            return self.text
+        return "\n\n".join(
+            f"[Section {section.number}] {' '.join(self.text[section.start:section.end].split())}"
+            for section in candidates
+        )
+
+    def locate(self, clause_text: str) -> Dict[str, Any]:
+        """
+        Maps clause text (e.g. as returned by the LLM) back to document offsets.
+        Tries a whitespace-insensitive exact match first, then the best-overlapping clause or section.
+        """
+        words = clause_text.split()
+        if words:
+            pattern = r"\s+".join(re.escape(word) for word in words)
+            match = re.search(pattern, self.text, re.IGNORECASE)
+            if match:
+                section = self._section_at(match.start())
+                return self._located(clause_text, match.start(), match.end(), section, "exact")
+
+        best_span, best_section, best_score = None, None, 0.0
+        clause_words = set(WORD_RE.findall(clause_text.lower()))
+        for section in self.sections:
+            for span_start, span_end in [(section.start, section.end)] + [(sub.start, sub.end) for sub in section.subclauses]:
+                span_words = set(WORD_RE.findall(self.text[span_start:span_end].lower()))
+                if not clause_words or not span_words:
+                    continue
+                score = len(clause_words & span_words) / len(clause_words | span_words)
+                if score > best_score:
+                    best_span, best_section, best_score = (span_start, span_end), section, score
+
+        if best_span and best_score >= 0.2:
+            return self._located(clause_text, best_span[0], best_span[1], best_section, "overlap")
+        return self._located(clause_text, None, None, None, "none")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable representation of the index."""
+        return {
+            "sections": [
+                {
+                    "number": section.number,
+                    "heading": section.heading,
+                    "start": section.start,
+                    "end": section.end,
+                    "categories": section.categories,
+                    "subclauses": [
+                        {"label": sub.label, "start": sub.start, "end": sub.end, "categories": sub.categories}
+                        for sub in section.subclauses
+                    ],
+                }
+                for section in self.sections
+            ]
+        }
+
+    def _section_at(self, offset: int) -> Optional[Section]:
+        for section in self.sections:
+            if section.start <= offset < section.end:
+                return section
+        return None
+
+    @staticmethod
+    def _located(clause_text: str, start: Optional[int], end: Optional[int], section: Optional[Section], match: str) -> Dict[str, Any]:
+        return {
+            "text": clause_text,
+            "start": start,
+            "end": end,
+            "section": section.number if section else None,
+            "heading": section.heading if section else None,
+            "categories": section.categories if section else [],
+            "match": match,
+        }
+
+
+def _trimmed_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrinks [start, end) so it does not begin or end with whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def split_legal_sections(text: str) -> LegalDocumentIndex:
+    """Parses a legal document into numbered sections and lettered sub-clauses with offsets and categories."""
+    headings = list(SECTION_HEADING_RE.finditer(text))
+    sections = []
+
+    first_start = headings[0].start() if headings else len(text)
+    preamble_start, preamble_end = _trimmed_span(text, 0, first_start)
+    if preamble_end > preamble_start:
+        preamble_text = text[preamble_start:preamble_end]
+        sections.append(Section(None, "Preamble", preamble_start, preamble_end, classify_text(preamble_text)))
+
+    for position, heading_match in enumerate(headings):
+        raw_end = headings[position + 1].start() if position + 1 < len(headings) else len(text)
+        start, end = _trimmed_span(text, heading_match.start(), raw_end)
+        heading = heading_match.group("heading").strip()
+        body = text[heading_match.end():end]
+
+        subclauses = []
+        sub_matches = list(SUBCLAUSE_RE.finditer(text, heading_match.end(), end))
+        for sub_position, sub_match in enumerate(sub_matches):
+            sub_raw_end = sub_matches[sub_position + 1].start() if sub_position + 1 < len(sub_matches) else end
+            sub_start, sub_end = _trimmed_span(text, sub_match.start(), sub_raw_end)
+            label = sub_match.group("paren") or sub_match.group("dot")
+            subclauses.append(ClauseSpan(label, sub_start, sub_end, classify_text(text[sub_start:sub_end])))
+
+        sections.append(Section(
+            heading_match.group("number"),
+            heading,
+            start,
+            end,
+            classify_text(body, heading),
+            subclauses
+        ))
+
+    logger.debug(f"Indexed legal document: {len(sections)} sections, {sum(len(s.subclauses) for s in sections)} sub-clauses.")
+    return LegalDocumentIndex(text, sections)
+
+
+if __name__ == "__main__":
+    sample = """
+    1. Services. The Service Provider agrees to provide web development services.
+    2. Obligations of Receiving Party. The Receiving Party agrees:
+       a. To use the Confidential Information solely for the Permitted Purpose.
+       b. Not to disclose any Confidential Information.
+    3. Termination. Either party may terminate this Agreement with 30 days' written notice.
+    4. Governing Law. This Agreement shall be governed by the laws of the State of New York.
+    """
+    index = split_legal_sections(sample)
+    for section in index.sections:
+        print(section.number, section.heading, (section.start, section.end), section.categories, len(section.subclauses))
+    print(index.render_candidates())
+    print(index.locate("Either party may terminate this Agreement with 30 days' written notice"))
@@ -0,0 +1,128 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/llm_gateway.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import json
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from utils.rate_limiter import AdaptiveRateLimiter, estimate_tokens, get_shared_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+def chat_result_tokens(result: ChatResult) -> Optional[int]:
+    """Total tokens reported by the provider for a LangChain chat result, if any."""
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    if usage.get("total_tokens"):
+        return int(usage["total_tokens"])
+    total = 0
+    for generation in result.generations:
+        metadata = getattr(generation.message, "usage_metadata", None) or {}
+        total += metadata.get("total_tokens", 0)
+    return total or None
+
+
+class ManagedChatModel(BaseChatModel):
+    """
+    Routes every call of a LangChain chat model through the shared AdaptiveRateLimiter, so LangChain and
+    LangGraph workflows share one watsonx quota with the other frameworks. Streams hold a limiter slot for
+    their whole duration but are not retried.
+    """
+    inner: BaseChatModel
+    limiter: Any = None
+    call_name: str = "langchain"
+
+    @property
+    def _llm_type(self) -> str:
+        return f"managed-{self.inner._llm_type}"
+
+    @property
+    def _limiter(self) -> AdaptiveRateLimiter:
+        return self.limiter or get_shared_rate_limiter()
+
+    def _inner_streams(self) -> bool:
+        return type(self.inner)._stream is not BaseChatModel._stream
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return self._limiter.call(
+            lambda: self.inner._generate(messages, stop=stop, **kwargs),
+            estimated_tokens=estimate_tokens(messages), name=self.call_name, usage=chat_result_tokens,
+        )
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return await self._limiter.acall(
+            lambda: self.inner._agenerate(messages, stop=stop, **kwargs),
+            estimated_tokens=estimate_tokens(messages), name=self.call_name, usage=chat_result_tokens,
+        )
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if not self._inner_streams():
+            result = self._generate(messages, stop=stop, **kwargs)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=result.generations[0].message.content))
+            return
+        with self._limiter.slot(estimate_tokens(messages), name=f"{self.call_name}_stream"):
+            for chunk in self.inner._stream(messages, stop=stop, **kwargs):
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if not self._inner_streams():
+            result = await self._agenerate(messages, stop=stop, **kwargs)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=result.generations[0].message.content))
+            return
+        async with self._limiter.aslot(estimate_tokens(messages), name=f"{self.call_name}_stream"):
+            async for chunk in self.inner._astream(messages, stop=stop, **kwargs):
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+
+
+def managed(chat_model: BaseChatModel, call_name: str = "langchain", limiter: Optional[AdaptiveRateLimiter] = None) -> BaseChatModel:
+    """Wraps a chat model in ManagedChatModel unless it already is one."""
+    if isinstance(chat_model, ManagedChatModel):
+        return chat_model
+    return ManagedChatModel(inner=chat_model, call_name=call_name, limiter=limiter)
+
+
+async def benchmark_hedging(calls: int = 400, concurrency: int = 16, latency_s: float = 0.05,
+                            tail_probability: float = 0.03, tail_latency_s: float = 1.0) -> dict:
+    """
+    Runs the same heavy-tailed mock workload through a limiter without and with hedging and reports
+    p50/p95/p99 caller latency and how many hedges were sent.
+    """
+    from utils.mock_llm import MockChatModel
+
+    report = {}
+    for hedging in (False, True):
+        limiter = AdaptiveRateLimiter(max_concurrency=concurrency * 2, initial_concurrency=concurrency * 2, hedging=hedging)
+        model = ManagedChatModel(
+            inner=MockChatModel(latency_s=latency_s, jitter_s=latency_s / 5, tail_probability=tail_probability, tail_latency_s=tail_latency_s),
+            limiter=limiter, call_name="benchmark",
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one_call(index: int):
+            async with semaphore:
+                await model.ainvoke(f"Write a shipping confirmation for order {index}.")
+
+        await asyncio.gather(*(one_call(index) for index in range(calls)))
+        stats = limiter.stats()
+        latency = stats["observations"]["rate_limiter.latency_s"]
+        report["hedged" if hedging else "baseline"] = {
+            "p50_s": latency["p50"], "p95_s": latency["p95"], "p99_s": latency["p99"], "max_s": latency["max"],
+            "hedges": stats["hedging"]["hedges"], "hedge_wins": stats["hedging"]["wins"], "hedge_rate": stats["hedging"]["hedge_rate"],
+        }
+    return report
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(benchmark_hedging()), indent=2))
@@ -0,0 +1,365 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/memory_profiler.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import gc
+import os
+import sys
+import time
+import atexit
+import asyncio
+import logging
+import threading
+import functools
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.metrics import WorkflowMetrics
+
+logger = logging.getLogger(__name__)
+
+# Entry points wrapped by `MemoryProfiler.attach`, per workflow class
+WORKFLOW_ENTRY_POINTS = {
+    "LangGraphEcommerceWorkflow": ("process_order", "aprocess_order"),
+    "LangChainLegalWorkflow": ("analyze_legal_document", "aanalyze_legal_document"),
+    "BeeAIResearchAssistant": ("get_research_answer",),
+    "BeeAIResearchAssistantFallback": ("get_research_answer",),
+    "AutoGenFinancialAnalyzer": ("analyze_stock_performance",),
+    "CrewAIContentCreation": ("generate_blog_post",),
+}
+# Allocation sites inside these files are left out of the top-sites report
+_IGNORED_FILES = ("<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>",
+                  tracemalloc.__file__, __file__)
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, read from /proc (Linux); None where that is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Highest resident set size of this process so far."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """Samples the process RSS every `interval_s` seconds on a daemon thread and keeps the last `max_samples`."""
+
+    def __init__(self, interval_s: float = 5.0, max_samples: int = 720):
+        self.interval_s = interval_s
+        self.samples = deque(maxlen=max_samples)
+        self._first: Optional[tuple] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None and current_rss_bytes() is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 1)
+            self._thread = None
+
+    def sample(self) -> Optional[int]:
+        rss = current_rss_bytes()
+        if rss is not None:
+            sample = (time.time(), rss)
+            self._first = self._first or sample
+            self.samples.append(sample)
+        return rss
+
+    def _run(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval_s):
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        samples = list(self.samples)
+        if not samples:
+            return {"samples": 0, "peak_rss_bytes": peak_rss_bytes()}
+        values = [rss for _, rss in samples]
+        elapsed = samples[-1][0] - self._first[0]
+        return {
+            "samples": len(samples),
+            "current_rss_bytes": values[-1],
+            "min_rss_bytes": min(values),
+            "max_rss_bytes": max(values),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "growth_bytes": values[-1] - self._first[1],
+            "growth_bytes_per_hour": round((values[-1] - self._first[1]) * 3600 / elapsed) if elapsed > 0 else None,
+        }
+
+
+class MemoryProfiler:
+    """
+    Opt-in memory profiling with tracemalloc. `profile(label)` records, per label, the peak memory
+    allocated during a call and the memory it left allocated. `attach(instance)` wraps a workflow's entry
+    points with it. `top_allocations()` lists the code sites that gained the most memory since the
+    profiler started. An RssSampler adds process RSS, which also covers memory tracemalloc cannot see.
+    tracemalloc's peak is process-wide, so calls that overlap share one peak; such calls are counted
+    under "overlapped" and their peaks are upper bounds.
+    """
+
+    def __init__(self, frames: int = 1, rss_interval_s: float = 5.0, metrics: Optional[WorkflowMetrics] = None):
+        self.frames = frames
+        self.metrics = metrics or WorkflowMetrics()
+        self.rss = RssSampler(rss_interval_s)
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._started_tracing = False
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "MemoryProfiler":
+        return cls(frames=config.memory_profiling_frames, rss_interval_s=config.memory_rss_sample_interval_s)
+
+    def start(self) -> "MemoryProfiler":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._baseline = tracemalloc.take_snapshot()
+        self.rss.start()
+        return self
+
+    def stop(self):
+        self.rss.stop()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def profile(self, label: str):
+        with self._lock:
+            overlapped = self._in_flight > 0
+            if not overlapped:
+                tracemalloc.reset_peak()
+            self._in_flight += 1
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            with self._lock:
+                self._in_flight -= 1
+            self.metrics.increment(f"memory.calls.{label}")
+            if overlapped:
+                self.metrics.increment(f"memory.overlapped.{label}")
+            self.metrics.observe(f"memory.peak_bytes.{label}", max(0, peak - before))
+            self.metrics.observe(f"memory.retained_bytes.{label}", current - before)
+
+    def attach(self, instance: Any, methods: Optional[Iterable[str]] = None, label: Optional[str] = None) -> Any:
+        """
+        Profiles the entry points of a workflow instance (WORKFLOW_ENTRY_POINTS by default). Only this
+        instance is affected; its methods are wrapped in place. Returns the instance.
+        """
+        class_name = type(instance).__name__
+        for name in methods or WORKFLOW_ENTRY_POINTS.get(class_name, ()):
+            method = getattr(instance, name, None)
+            if method is None or getattr(method, "_memory_profiled", False):
+                continue
+            setattr(instance, name, self._wrap(method, f"{label or class_name}.{name}"))
+        return instance
+
+    def _wrap(self, method, label: str):
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def profiled(*args, **kwargs):
+                with self.profile(label):
+                    return await method(*args, **kwargs)
+        else:
+            @functools.wraps(method)
+            def profiled(*args, **kwargs):
+                with self.profile(label):
+                    return method(*args, **kwargs)
+        profiled._memory_profiled = True
+        return profiled
+
+    def top_allocations(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Code sites with the largest growth in allocated memory since `start()`."""
+        if not tracemalloc.is_tracing():
+            return []
+        ignored = [tracemalloc.Filter(False, filename) for filename in _IGNORED_FILES]
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignored)
+        baseline = self._baseline.filter_traces(ignored) if self._baseline else None
+        stats = snapshot.compare_to(baseline, "traceback" if self.frames > 1 else "lineno") if baseline else snapshot.statistics("lineno")
+        sites = []
+        for stat in stats[:limit]:
+            sites.append({
+                "site": " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff_bytes": getattr(stat, "size_diff", stat.size),
+                "count": stat.count,
+                "count_diff": getattr(stat, "count_diff", stat.count),
+            })
+        return sites
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        """Peak and retained bytes per label (mean, p95, max), traced memory, RSS and the top allocation sites."""
+        snapshot = self.metrics.snapshot()
+        counters, observations = snapshot["counters"], snapshot["observations"]
+        labels = {}
+        for name, calls in counters.items():
+            if not name.startswith("memory.calls."):
+                continue
+            label = name[len("memory.calls."):]
+            peak = observations.get(f"memory.peak_bytes.{label}", {})
+            retained = observations.get(f"memory.retained_bytes.{label}", {})
+            labels[label] = {
+                "calls": calls,
+                "overlapped": counters.get(f"memory.overlapped.{label}", 0),
+                "peak_bytes_mean": peak.get("mean"),
+                "peak_bytes_p95": peak.get("p95"),
+                "peak_bytes_max": peak.get("max"),
+                "retained_bytes_mean": retained.get("mean"),
+                "retained_bytes_total": round(retained["mean"] * retained["count"]) if retained else 0,
+            }
+        traced_current, traced_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+        return {
+            "traced_current_bytes": traced_current,
+            "traced_peak_bytes": traced_peak,
+            "rss": self.rss.stats(),
+            "calls": labels,
+            "top_allocations": self.top_allocations(top),
+        }
+
+
+_shared_profiler: Optional[MemoryProfiler] = None
+_shared_lock = threading.Lock()
+
+
+def get_memory_profiler(config=None) -> Optional[MemoryProfiler]:
+    """The process-wide profiler, started on first use when MEMORY_PROFILING_ENABLED is set; otherwise None."""
+    global _shared_profiler
+    if _shared_profiler is not None:
+        return _shared_profiler
+    if config is None:
+        from config.config import get_config
+        config = get_config()
+    if not config.memory_profiling_enabled:
+        return None
+    with _shared_lock:
+        if _shared_profiler is None:
+            _shared_profiler = MemoryProfiler.from_config(config).start()
+            atexit.register(_shared_profiler.stop)
+            logger.info(f"Memory profiling enabled: tracemalloc with {config.memory_profiling_frames} frame(s), "
+                        f"RSS sampled every {config.memory_rss_sample_interval_s}s.")
+        return _shared_profiler
+
+
+def _soak_record(workflow: str, index: int) -> Dict[str, Any]:
+    if workflow == "ecommerce":
+        from frameworks.langgraph_ecommerce_workflow import get_test_order_data
+        return {**get_test_order_data(("valid", "suspicious")[index % 2]), "order_id": f"SOAK_{index}"}
+    from frameworks.langchain_legal_analysis import get_test_legal_document
+    return {"document": get_test_legal_document(("simple_contract", "complex_nda")[index % 2])["content"]}
+
+
+def _slope(points: List[tuple]) -> float:
+    """Least-squares slope of y over x."""
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance if variance else 0.0
+
+
+async def soak_test(workflow: str = "ecommerce", iterations: int = 1000, warm_up: int = 100, checkpoints: int = 20,
+                    max_growth_bytes_per_iteration: float = 1024.0, mock_latency_s: float = 0.0, frames: int = 1,
+                    top: int = 10, config=None) -> Dict[str, Any]:
+    """
+    Runs a workflow `iterations` times, one request at a time, against the mock LLM. Traced memory is
+    measured after a full GC at each checkpoint. Warm-up runs come first so caches and bounded buffers can
+    fill. The test fails when traced memory over the second half of the checkpoints keeps growing by more
+    than `max_growth_bytes_per_iteration`, the least-squares slope. Memory that levels off passes. The
+    allocation sites that grew the most since warm-up are reported.
+    """
+    from utils.mock_llm import MockChatModel
+    from utils.workflow_factory import create_workflow
+
+    if config is None:
+        from config.config import get_config
+        config = get_config()
+    profiler = MemoryProfiler(frames=frames, rss_interval_s=1.0).start()
+    try:
+        instance, handler = create_workflow(workflow, config, MockChatModel(latency_s=mock_latency_s, jitter_s=0.0))
+        profiler.attach(instance, label=workflow)
+        for index in range(warm_up):
+            await handler(_soak_record(workflow, index))
+        gc.collect()
+        profiler._baseline = tracemalloc.take_snapshot()
+        profiler.metrics.reset()
+
+        started_at = time.perf_counter()
+        every = max(1, iterations // max(1, checkpoints))
+        traced, rss = [], []
+        for index in range(iterations):
+            await handler(_soak_record(workflow, warm_up + index))
+            if (index + 1) % every == 0 or index + 1 == iterations:
+                gc.collect()
+                traced.append((index + 1, tracemalloc.get_traced_memory()[0]))
+                rss.append((index + 1, profiler.rss.sample()))
+        elapsed = time.perf_counter() - started_at
+
+        tail = traced[len(traced) // 2:]
+        growth = _slope(tail) if len(tail) > 1 else 0.0
+        report = {
+            "workflow": workflow,
+            "iterations": iterations,
+            "warm_up": warm_up,
+            "elapsed_s": round(elapsed, 3),
+            "passed": growth <= max_growth_bytes_per_iteration,
+            "growth_bytes_per_iteration": round(growth, 1),
+            "max_growth_bytes_per_iteration": max_growth_bytes_per_iteration,
+            "traced_bytes": {"first": traced[0][1], "last": traced[-1][1], "checkpoints": [value for _, value in traced]},
+        }
+        if rss[-1][1] is not None:
+            report["rss_bytes"] = {"first": rss[0][1], "last": rss[-1][1]}
+        report.update(profiler.report(top))
+        return report
+    finally:
+        profiler.stop()
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Soak-test a workflow against the mock LLM and fail on unbounded memory growth.")
+    parser.add_argument("--workflow", default="ecommerce", choices=["ecommerce", "legal"])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--warm-up", type=int, default=100, help="Runs before measuring, so caches can fill")
+    parser.add_argument("--checkpoints", type=int, default=20)
+    parser.add_argument("--max-growth", type=float, default=1024.0, help="Allowed traced memory growth per iteration in bytes")
+    parser.add_argument("--frames", type=int, default=1, help="Stack frames per allocation site")
+    parser.add_argument("--top", type=int, default=10, help="Allocation sites to report")
+    args = parser.parse_args()
+
+    report = asyncio.run(soak_test(args.workflow, args.iterations, args.warm_up, args.checkpoints, args.max_growth,
+                                   frames=args.frames, top=args.top))
+    print(json.dumps(report, indent=2))
+    if not report["passed"]:
+        logger.error(f"Soak test failed: traced memory grows by ~{report['growth_bytes_per_iteration']} bytes per {args.workflow} run.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
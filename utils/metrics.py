@@ -0,0 +1,94 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/metrics.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import random
+import threading
+from typing import Dict, Any, List
+
+
+class _Observation:
+    """Running count/sum/min/max plus a bounded reservoir sample for percentiles."""
+    __slots__ = ("count", "total", "minimum", "maximum", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+        self.samples: List[float] = []
+
+
+class WorkflowMetrics:
+    """Thread-safe counters and value observations shared by the workflows."""
+    RESERVOIR_SIZE = 2048
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._observations: Dict[str, _Observation] = {}
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            observation = self._observations.get(name)
+            if observation is None:
+                observation = self._observations[name] = _Observation()
+            observation.count += 1
+            observation.total += value
+            observation.minimum = min(observation.minimum, value)
+            observation.maximum = max(observation.maximum, value)
+            if len(observation.samples) < self.RESERVOIR_SIZE:
+                observation.samples.append(value)
+            else:
+                slot = random.randrange(observation.count)
+                if slot < self.RESERVOIR_SIZE:
+                    observation.samples[slot] = value
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def mean(self, name: str) -> float:
+        with self._lock:
+            observation = self._observations.get(name)
+            return observation.total / observation.count if observation and observation.count else 0.0
+
+    def percentile(self, name: str, q: float) -> float:
+        with self._lock:
+            observation = self._observations.get(name)
+            samples = sorted(observation.samples) if observation else []
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns all counters and a summary (count, mean, min, max, p50, p95, p99) of each observation."""
+        with self._lock:
+            counters = dict(self._counters)
+            observations = {name: (obs.count, obs.total, obs.minimum, obs.maximum, sorted(obs.samples))
+                            for name, obs in self._observations.items()}
+        summaries = {}
+        for name, (count, total, minimum, maximum, samples) in observations.items():
+            def pct(q):
+                return round(samples[min(len(samples) - 1, int(q * len(samples)))], 6) if samples else None
+            summaries[name] = {
+                "count": count,
+                "mean": round(total / count, 6) if count else None,
+                "min": round(minimum, 6) if count else None,
+                "max": round(maximum, 6) if count else None,
+                "p50": pct(0.50),
+                "p95": pct(0.95),
+                "p99": pct(0.99),
+            }
+        return {"counters": counters, "observations": summaries}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
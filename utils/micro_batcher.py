@@ -0,0 +1,82 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/micro_batcher.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from utils.metrics import WorkflowMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMicroBatcher:
+    """
+    Collects concurrent requests for up to `max_batch_size` items or `max_wait_ms` milliseconds,
+    whichever comes first, and hands them to `process_batch` as one list. Each caller awaits its own
+    result; `process_batch` must return results in the same order as its input.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], Awaitable[List[Any]]], max_batch_size: int = 16,
+                 max_wait_ms: float = 20.0, metrics: Optional[WorkflowMetrics] = None, name: str = "batch"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.metrics = metrics or WorkflowMetrics()
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queues an item for the next batch and waits for its individual result."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A new event loop (e.g. another asyncio.run) cannot reuse futures from the old one
+            self._loop, self._pending, self._timer = loop, [], None
+
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = self._loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        flushed_at = time.perf_counter()
+        self.metrics.increment(f"{self.name}.batches")
+        self.metrics.observe(f"{self.name}.batch_size", len(batch))
+        for _, _, enqueued_at in batch:
+            self.metrics.observe(f"{self.name}.queue_wait_s", flushed_at - enqueued_at)
+
+        try:
+            results = await self.process_batch([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"process_batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            logger.error(f"Micro-batch '{self.name}' of {len(batch)} items failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
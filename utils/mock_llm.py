@@ -0,0 +1,117 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/mock_llm.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import re
+import json
+import time
+import random
+import asyncio
+import logging
+from typing import Any, Callable, Iterator, AsyncIterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+
+def default_mock_response(prompt: str) -> str:
+    """Returns a plausible canned answer for the prompts used in this repository."""
+    text = prompt.lower()
+    if "json array" in text and "order_id" in text:
+        order_ids = dict.fromkeys(re.findall(r'"order_id":\s*"([^"]+)"', prompt))
+        return json.dumps([{"order_id": order_id, "status": "valid", "reason": "Consistent order details."} for order_id in order_ids])
+    if "fraud" in text:
+        return '{"status": "valid", "reason": "Order details are consistent with normal purchasing patterns."}'
+    if "json array" in text:
+        return '["Either party may terminate this Agreement with 30 days\' written notice."]'
+    if "risk" in text:
+        return '{"risk_level": "Low", "identified_risks": ["Payment terms lack a due date."]}'
+    if "shipping" in text:
+        return "Your order has been confirmed and shipped. Thank you for shopping with us!"
+    return "This is a mock response generated without calling a real LLM."
+
+
+class MockChatModel(BaseChatModel):
+    """
+    Offline LangChain chat model with configurable latency, used for benchmarks, load tests and soak tests.
+    Supports invoke/ainvoke and token streaming; no network access is performed.
+    `max_concurrent_requests` (0 = unlimited) models a provider that only serves that many requests at once.
+    `tail_probability` of the calls take `tail_latency_s` longer, modelling occasional slow responses.
+    """
+    latency_s: float = 0.05
+    latency_per_1k_chars_s: float = 0.0
+    jitter_s: float = 0.0
+    tail_probability: float = 0.0
+    tail_latency_s: float = 0.0
+    chunk_words: int = 3
+    max_concurrent_requests: int = 0
+    responder: Optional[Callable[[str], str]] = None
+    _async_slots: Any = PrivateAttr(default=None)
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock-chat-model"
+
+    def _response_text(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        return (self.responder or default_mock_response)(prompt)
+
+    def _delay(self, messages: Optional[List[BaseMessage]] = None) -> float:
+        size_cost = self.latency_per_1k_chars_s * sum(len(str(message.content)) for message in messages or []) / 1000
+        tail = self.tail_latency_s if random.random() < self.tail_probability else 0.0
+        return max(0.0, self.latency_s + size_cost + tail + random.uniform(-self.jitter_s, self.jitter_s))
+
+    def _slots(self) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrent_requests <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._async_slots is None or self._async_slots[0] is not loop:
+            self._async_slots = (loop, asyncio.Semaphore(self.max_concurrent_requests))
+        return self._async_slots[1]
+
+    def _chunks(self, text: str) -> List[str]:
+        words = text.split(" ")
+        return [" ".join(words[i:i + self.chunk_words]) + " " for i in range(0, len(words), self.chunk_words)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._delay(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._response_text(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        slots = self._slots()
+        if slots is None:
+            await asyncio.sleep(self._delay(messages))
+        else:
+            async with slots:
+                await asyncio.sleep(self._delay(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._response_text(messages)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        chunks = self._chunks(self._response_text(messages))
+        for text in chunks:
+            time.sleep(self._delay(messages) / len(chunks))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        chunks = self._chunks(self._response_text(messages))
+        for text in chunks:
+            await asyncio.sleep(self._delay(messages) / len(chunks))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+
+if __name__ == "__main__":
+    mock = MockChatModel(latency_s=0.01)
+    print(mock.invoke("Analyze the following order for potential fraud").content)
+    print([chunk.content for chunk in mock.stream("Generate a shipping confirmation")])
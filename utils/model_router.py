@@ -0,0 +1,197 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/model_router.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import logging
+import threading
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.metrics import WorkflowMetrics
+from utils.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+STRONG = "strong"
+FAST = "fast"
+AUTO = "auto"
+
+# Phrases that mark an answer the fast model was unsure about; such answers are escalated to the strong model
+LOW_CONFIDENCE_MARKERS = ("not sure", "unsure", "cannot determine", "can't determine", "unclear", "insufficient information")
+
+# Sent once per model by the frameworks' `warm_up()` at startup (see utils/runtime.py)
+WARM_UP_PROMPT = "Reply with the single word OK."
+
+
+def parse_model_routes(spec: Optional[str]) -> Dict[str, str]:
+    """
+    Parses "ecommerce.confirm_shipping=fast, legal=auto, financial.InvestmentStrategist=ibm/granite-..." into
+    a {"workflow.step" or "workflow": route} dict. A route is fast, strong, auto or a literal model id.
+    """
+    routes = {}
+    for entry in (spec or "").split(","):
+        if "=" not in entry:
+            continue
+        key, route = (part.strip() for part in entry.split("=", 1))
+        if key and route:
+            routes[key] = route
+    return routes
+
+
+def message_tokens(message: Any, prompt: Any) -> int:
+    """Tokens used by a chat call: the provider's usage metadata, or an estimate from prompt and answer."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens") or estimate_tokens(prompt) + estimate_tokens(getattr(message, "content", message))
+
+
+def is_low_confidence(text: str) -> bool:
+    """True for empty answers and answers that hedge (see LOW_CONFIDENCE_MARKERS)."""
+    lowered = (text or "").lower()
+    return not lowered.strip() or any(marker in lowered for marker in LOW_CONFIDENCE_MARKERS)
+
+
+class ModelRouter:
+    """
+    Picks the model for each step of a workflow. Routes come from WATSONX_MODEL_ROUTES, keyed by
+    "workflow.step" (a node, chain step or agent) or by "workflow". Unrouted steps use the strong model
+    (Config.model_id), or the auto policy when it is enabled. The auto policy sends low-stakes steps and
+    short prompts to the fast model. Callers escalate a fast answer to the strong model on parse failure
+    or low confidence. Latency and tokens are recorded per step and route, and `report()` turns them into savings.
+    """
+
+    def __init__(self, workflow: str, model_factory: Callable[[str], Any], strong_model_id: Optional[str],
+                 fast_model_id: Optional[str] = None, routes: Optional[Dict[str, str]] = None, auto_routing: bool = False,
+                 auto_max_prompt_chars: int = 1500, low_stakes_steps: Iterable[str] = (), metrics: Optional[WorkflowMetrics] = None):
+        self.workflow = workflow
+        self.model_factory = model_factory
+        self.strong_model_id = strong_model_id
+        self.fast_model_id = fast_model_id
+        self.routes = routes or {}
+        self.auto_routing = auto_routing
+        self.auto_max_prompt_chars = auto_max_prompt_chars
+        self.low_stakes_steps = set(low_stakes_steps)
+        self.metrics = metrics or WorkflowMetrics()
+        self._models: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, workflow: str, model_factory: Callable[[str], Any], low_stakes_steps: Iterable[str] = ()) -> "ModelRouter":
+        return cls(
+            workflow,
+            model_factory,
+            strong_model_id=config.model_id,
+            fast_model_id=config.fast_model_id,
+            routes=parse_model_routes(config.model_routes),
+            auto_routing=config.auto_model_routing,
+            auto_max_prompt_chars=config.auto_routing_max_prompt_chars,
+            low_stakes_steps=low_stakes_steps,
+        )
+
+    def assignment(self, step: str) -> str:
+        """The configured route for a step before the auto policy is applied."""
+        return self.routes.get(f"{self.workflow}.{step}") or self.routes.get(self.workflow) or (AUTO if self.auto_routing else STRONG)
+
+    def route(self, step: str, prompt: Optional[str] = None) -> str:
+        """Resolves a step (and, for the auto policy, its prompt) to fast, strong or a literal model id."""
+        route = self.assignment(step)
+        if route == AUTO:
+            short = prompt is not None and len(prompt) <= self.auto_max_prompt_chars
+            route = FAST if step in self.low_stakes_steps or short else STRONG
+        if route == FAST and not self.fast_model_id:
+            return STRONG
+        return route
+
+    def model_id(self, route: str) -> Optional[str]:
+        return {STRONG: self.strong_model_id, FAST: self.fast_model_id}.get(route, route)
+
+    def model(self, route: str) -> Any:
+        """The (cached) model for a route, built by the workflow's model factory."""
+        with self._lock:
+            if route not in self._models:
+                self._models[route] = self.model_factory(self.model_id(route))
+            return self._models[route]
+
+    def warm_up_routes(self) -> List[str]:
+        """The routes a workflow can call: strong, fast when a fast model is set, and any literal model ids."""
+        routes = [STRONG] + ([FAST] if self.fast_model_id else [])
+        for key, route in self.routes.items():
+            if (key == self.workflow or key.startswith(f"{self.workflow}.")) and route not in (STRONG, FAST, AUTO) and route not in routes:
+                routes.append(route)
+        return routes
+
+    def step_model(self, step: str, route: Optional[str] = None) -> Any:
+        """
+        A dedicated (cached) model for a fixed step such as an agent. Clients with a `route_recorder`
+        attribute report their calls to this router.
+        """
+        route = route or self.route(step)
+        with self._lock:
+            if (step, route) not in self._models:
+                model = self.model_factory(self.model_id(route))
+                if hasattr(model, "route_recorder"):
+                    model.route_recorder = self.recorder(step, route)
+                self._models[(step, route)] = model
+            return self._models[(step, route)]
+
+    def recorder(self, step: str, route: str) -> Callable[[float, Optional[int]], None]:
+        """A `(latency_s, tokens)` callback for clients that report their own calls."""
+        return partial(self.record, step, route)
+
+    def record(self, step: str, route: str, latency_s: float, tokens: Optional[int] = None):
+        key = f"{step}.{route}"
+        self.metrics.increment(f"routing.calls.{key}")
+        self.metrics.observe(f"routing.latency_s.{key}", latency_s)
+        if tokens:
+            self.metrics.increment(f"routing.tokens.{key}", tokens)
+
+    def escalated(self, step: str, reason: str):
+        self.metrics.increment(f"routing.escalations.{step}")
+        logger.info(f"{self.workflow}.{step}: escalating to the strong model ({reason}).")
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Per step and route: calls, mean latency and tokens. Savings compare fast-routed calls with the strong
+        model's mean latency for the same step (or across the workflow if that step never ran on it), minus
+        the fast calls that had to be escalated.
+        """
+        snapshot = self.metrics.snapshot()
+        counters, observations = snapshot["counters"], snapshot["observations"]
+        steps: Dict[str, Dict[str, Any]] = {}
+        for name, calls in counters.items():
+            if not name.startswith("routing.calls."):
+                continue
+            step, route = name[len("routing.calls."):].split(".", 1)
+            steps.setdefault(step, {})[route] = {
+                "model_id": self.model_id(route),
+                "calls": calls,
+                "mean_latency_s": observations.get(f"routing.latency_s.{step}.{route}", {}).get("mean"),
+                "tokens": counters.get(f"routing.tokens.{step}.{route}", 0),
+            }
+        strong_latencies = [routes[STRONG]["mean_latency_s"] for routes in steps.values() if STRONG in routes]
+        workflow_strong_latency = sum(strong_latencies) / len(strong_latencies) if strong_latencies else None
+
+        latency_saved = tokens_moved = 0.0
+        for step, routes in steps.items():
+            escalations = counters.get(f"routing.escalations.{step}", 0)
+            fast = routes.get(FAST)
+            strong_latency = routes.get(STRONG, {}).get("mean_latency_s") or workflow_strong_latency
+            if fast and strong_latency is not None:
+                kept = max(0.0, fast["calls"] - escalations)
+                saved = kept * (strong_latency - fast["mean_latency_s"]) - escalations * fast["mean_latency_s"]
+                fast["latency_saved_s"] = round(saved, 4)
+                latency_saved += saved
+            if fast:
+                fast["strong_tokens_avoided"] = round(fast["tokens"] * max(0.0, 1 - escalations / fast["calls"]))
+                tokens_moved += fast["strong_tokens_avoided"]
+            routes["escalations"] = escalations
+        return {
+            "workflow": self.workflow,
+            "strong_model_id": self.strong_model_id,
+            "fast_model_id": self.fast_model_id,
+            "auto_routing": self.auto_routing,
+            "steps": steps,
+            "latency_saved_s": round(latency_saved, 4),
+            "strong_tokens_avoided": round(tokens_moved),
+        }
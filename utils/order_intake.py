@@ -0,0 +1,376 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/order_intake.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.metrics import WorkflowMetrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IntakeItem:
+    """An order read from a source, with the position needed to acknowledge it."""
+    order: Optional[Dict[str, Any]]
+    source: str = ""
+    position: Any = None
+    received_at: float = field(default_factory=time.perf_counter)
+    error: Optional[str] = None
+
+
+class OrderSource(ABC):
+    """
+    Pluggable order source. `get()` returns the next item, or None once the source is exhausted
+    (a following source never is). `ack()` is called after the item's result has been written.
+    """
+
+    @abstractmethod
+    async def get(self) -> Optional[IntakeItem]:
+        """The next order, or None once the source is exhausted."""
+
+    async def ack(self, item: IntakeItem):
+        pass
+
+    def backlog(self) -> Optional[int]:
+        """Orders (or bytes, for spools) waiting in the source, if known."""
+        return None
+
+    async def close(self):
+        pass
+
+
+class QueueOrderSource(OrderSource):
+    """Reads orders from an asyncio.Queue; putting None on the queue ends the source."""
+
+    def __init__(self, queue: asyncio.Queue, name: str = "queue"):
+        self.queue = queue
+        self.name = name
+        self._sequence = 0
+
+    async def get(self) -> Optional[IntakeItem]:
+        order = await self.queue.get()
+        if order is None:
+            return None
+        self._sequence += 1
+        return IntakeItem(order=order, source=self.name, position=self._sequence)
+
+    def backlog(self) -> Optional[int]:
+        return self.queue.qsize()
+
+
+class JsonlSpoolSource(OrderSource):
+    """
+    Reads one JSON order per line from a JSONL file, or from every *.jsonl file of a directory in name order.
+    Only complete lines are consumed, so writers may append while the worker runs. Offsets are committed to
+    `offsets_path` only up to the last contiguously acknowledged line, so after a restart every order whose
+    result was not written yet is read again (at-least-once). File reads and offset commits run in worker
+    threads, so a slow disk never stalls the event loop.
+    """
+
+    def __init__(self, path: str, offsets_path: Optional[str] = None, follow: bool = False,
+                 poll_interval_s: float = 0.5, commit_interval_s: float = 1.0):
+        self.path = path
+        self.offsets_path = offsets_path or (path.rstrip(os.sep) + ".offsets.json")
+        self.follow = follow
+        self.poll_interval_s = poll_interval_s
+        self.commit_interval_s = commit_interval_s
+        self._committed: Dict[str, int] = self._load_offsets()
+        self._read_offsets: Dict[str, int] = dict(self._committed)
+        # file -> {start offset: [end offset, acknowledged]} for lines read but not yet committed
+        self._outstanding: Dict[str, Dict[int, List[Any]]] = {}
+        self._current: Optional[str] = None
+        self._handle = None
+        self._last_commit = time.monotonic()
+        self._commit_lock = asyncio.Lock()
+
+    def _load_offsets(self) -> Dict[str, int]:
+        if not os.path.exists(self.offsets_path):
+            return {}
+        try:
+            with open(self.offsets_path, "r", encoding="utf-8") as f:
+                return {name: int(offset) for name, offset in json.load(f).items()}
+        except Exception as e:
+            logger.error(f"Could not read spool offsets from {self.offsets_path}, starting from the beginning: {e}")
+            return {}
+
+    def _files(self) -> List[str]:
+        if os.path.isdir(self.path):
+            return sorted(os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(".jsonl"))
+        return [self.path] if os.path.exists(self.path) else []
+
+    def _next_file(self) -> Optional[str]:
+        """The first file that still has unread bytes."""
+        for path in self._files():
+            if os.path.getsize(path) > self._read_offsets.get(os.path.basename(path), 0):
+                return path
+        return None
+
+    def _open(self, path: str):
+        if self._handle is not None:
+            self._handle.close()
+        self._current = path
+        self._handle = open(path, "rb")
+        self._handle.seek(self._read_offsets.get(os.path.basename(path), 0))
+
+    def _read_line(self) -> Optional[Tuple[str, int, bytes]]:
+        if self._handle is None:
+            path = self._next_file()
+            if path is None:
+                return None
+            self._open(path)
+        name = os.path.basename(self._current)
+        start = self._handle.tell()
+        line = self._handle.readline()
+        if not line.endswith(b"\n"):
+            # EOF or a line that is still being written: rewind and move on to a later file if there is one
+            self._handle.seek(start)
+            path = self._next_file()
+            if path is not None and path != self._current:
+                self._open(path)
+                return self._read_line()
+            return None
+        self._read_offsets[name] = self._handle.tell()
+        return name, start, line
+
+    async def get(self) -> Optional[IntakeItem]:
+        while True:
+            record = await asyncio.to_thread(self._read_line)
+            if record is None:
+                if not self.follow:
+                    return None
+                await asyncio.sleep(self.poll_interval_s)
+                continue
+            name, start, line = record
+            if not line.strip():
+                self._track(name, start, self._read_offsets[name], acknowledged=True)
+                continue
+            self._track(name, start, self._read_offsets[name], acknowledged=False)
+            try:
+                return IntakeItem(order=json.loads(line), source=name, position=start)
+            except json.JSONDecodeError as e:
+                return IntakeItem(order=None, source=name, position=start, error=f"Malformed order line: {e}")
+
+    def _track(self, name: str, start: int, end: int, acknowledged: bool):
+        self._outstanding.setdefault(name, {})[start] = [end, acknowledged]
+        if acknowledged:
+            self._advance(name)
+
+    async def ack(self, item: IntakeItem):
+        entry = self._outstanding.get(item.source, {}).get(item.position)
+        if entry is None:
+            return
+        entry[1] = True
+        self._advance(item.source)
+        if time.monotonic() - self._last_commit >= self.commit_interval_s:
+            await self._acommit()
+
+    def _advance(self, name: str):
+        """Moves the committable offset past every acknowledged line at the front of the file's outstanding lines."""
+        outstanding = self._outstanding[name]
+        offset = self._committed.get(name, 0)
+        while offset in outstanding and outstanding[offset][1]:
+            offset = outstanding.pop(offset)[0]
+        self._committed[name] = offset
+
+    async def _acommit(self):
+        """Writes the committed offsets in a worker thread, one commit at a time, with the offsets current when it starts."""
+        self._last_commit = time.monotonic()
+        async with self._commit_lock:
+            await asyncio.to_thread(self.commit, dict(self._committed))
+
+    def commit(self, offsets: Optional[Dict[str, int]] = None):
+        """Atomically writes the committed offsets (or `offsets`, a snapshot of them)."""
+        tmp_path = self.offsets_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._committed if offsets is None else offsets, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.offsets_path)
+        self._last_commit = time.monotonic()
+
+    def backlog(self) -> Optional[int]:
+        """Unread bytes across the spool."""
+        return sum(max(0, os.path.getsize(path) - self._read_offsets.get(os.path.basename(path), 0)) for path in self._files())
+
+    async def close(self):
+        await self._acommit()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class OrderIntakeWorker:
+    """
+    Long-running worker that feeds orders from an OrderSource into a workflow's `aprocess_order`.
+    At most `max_in_flight` orders are processed at once and the hand-off queue holds at most as many again,
+    so a slow workflow stops the worker from reading further (backpressure). Each result is appended to
+    `output_path` as one JSON line and flushed before its order is acknowledged to the source. A result that
+    cannot be written or acknowledged is logged and counted, and the worker moves on to the next order.
+    """
+
+    def __init__(self, workflow, source: OrderSource, output_path: str, max_in_flight: int = 32,
+                 stats_interval_s: float = 5.0, metrics: Optional[WorkflowMetrics] = None):
+        self.workflow = workflow
+        self.source = source
+        self.output_path = output_path
+        self.max_in_flight = max_in_flight
+        self.stats_interval_s = stats_interval_s
+        self.metrics = metrics or WorkflowMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._unacked: Dict[int, float] = {}
+        self._stop = asyncio.Event()
+        self._started_at = None
+        self._window = (time.perf_counter(), 0)
+
+    def stop(self):
+        """Stops reading new orders; orders already read are finished and acknowledged."""
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Throughput, queue depth and lag of the running worker. `throughput_per_s` covers the time since the
+        previous call; `lag_s` is the age of the oldest order read but not yet acknowledged.
+        """
+        now = time.perf_counter()
+        processed = self.metrics.counter("intake.processed")
+        window_started, window_processed = self._window
+        self._window = (now, processed)
+        elapsed = now - self._started_at if self._started_at else 0.0
+        return {
+            "processed": processed,
+            "failed": self.metrics.counter("intake.failed"),
+            "record_failed": self.metrics.counter("intake.record_failed"),
+            "in_flight": len(self._unacked) - (self._queue.qsize() if self._queue else 0),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "source_backlog": self.source.backlog(),
+            "throughput_per_s": round((processed - window_processed) / (now - window_started), 2) if now > window_started else 0.0,
+            "overall_throughput_per_s": round(processed / elapsed, 2) if elapsed else 0.0,
+            "lag_s": round(now - min(self._unacked.values()), 4) if self._unacked else 0.0,
+            "latency_s": self.metrics.snapshot()["observations"].get("intake.latency_s"),
+        }
+
+    async def _read(self):
+        """Producer: blocks on the bounded queue when the consumers fall behind."""
+        stopped = asyncio.ensure_future(self._stop.wait())
+        try:
+            while True:
+                next_item = asyncio.ensure_future(self.source.get())
+                await asyncio.wait({next_item, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_item.done():
+                    next_item.cancel()
+                    break
+                item = next_item.result()
+                if item is None:
+                    break
+                self.metrics.increment("intake.received")
+                self._unacked[id(item)] = item.received_at
+                await self._queue.put(item)
+        finally:
+            stopped.cancel()
+            for _ in range(self.max_in_flight):
+                await self._queue.put(None)
+
+    async def _consume(self, output):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            try:
+                await self._handle(item, output)
+            except Exception as e:
+                # An unwritten result is not acknowledged, so a spool order is read again after a restart
+                logger.error(f"Order intake could not record the result of {item.source}@{item.position}: {e}")
+                self.metrics.increment("intake.record_failed")
+            finally:
+                self._unacked.pop(id(item), None)
+
+    async def _handle(self, item: IntakeItem, output):
+        """Processes one order, writes its result and acknowledges it."""
+        try:
+            if item.error:
+                result = {"error": item.error, "framework": "langgraph"}
+            else:
+                result = await self.workflow.aprocess_order(item.order)
+        except Exception as e:
+            logger.error(f"Order intake failed for {item.source}@{item.position}: {e}")
+            result = {"error": str(e), "framework": "langgraph"}
+        order_id = item.order.get("order_id") if isinstance(item.order, dict) else None
+        result = {**result, "order_id": order_id, "source": item.source, "position": item.position}
+        await asyncio.to_thread(self._write_result, output, json.dumps(result, default=str) + "\n")
+        self.metrics.increment("intake.failed" if "error" in result else "intake.processed")
+        self.metrics.observe("intake.latency_s", time.perf_counter() - item.received_at)
+        await self.source.ack(item)
+
+    @staticmethod
+    def _write_result(output, line: str):
+        """Appends and flushes one result line; the file's own lock keeps concurrent lines whole."""
+        output.write(line)
+        output.flush()
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.stats_interval_s)
+            logger.info(f"Order intake: {json.dumps(self.stats(), default=str)}")
+
+    async def run(self) -> Dict[str, Any]:
+        """Runs until the source is exhausted (or `stop()` is called) and every order read has been written."""
+        self._queue = asyncio.Queue(maxsize=self.max_in_flight)
+        self._started_at = time.perf_counter()
+        self._window = (self._started_at, 0)
+        reporter = asyncio.create_task(self._report())
+        try:
+            with open(self.output_path, "a", encoding="utf-8") as output:
+                await asyncio.gather(self._read(), *(self._consume(output) for _ in range(self.max_in_flight)))
+        finally:
+            reporter.cancel()
+            await self.source.close()
+        self._window = (self._started_at, 0)
+        summary = self.stats()
+        logger.info(f"Order intake finished: {json.dumps(summary, default=str)}")
+        return summary
+
+
+async def main():
+    import argparse
+    from config.config import get_config
+    from frameworks.langgraph_ecommerce_workflow import LangGraphEcommerceWorkflow, get_test_inventory
+
+    parser = argparse.ArgumentParser(description="Feed orders from a JSONL spool into the LangGraph e-commerce workflow.")
+    parser.add_argument("spool", help="JSONL file or directory of JSONL files with one order per line")
+    parser.add_argument("--output", default="order_results.jsonl", help="JSONL file the results are appended to")
+    parser.add_argument("--max-in-flight", type=int, default=32)
+    parser.add_argument("--follow", action="store_true", help="Keep polling the spool for new orders")
+    parser.add_argument("--stats-interval", type=float, default=5.0)
+    parser.add_argument("--mock-llm", action="store_true", help="Use the offline mock chat model")
+    parser.add_argument("--detail-level", default="standard", choices=["summary", "standard", "full"], help="Detail level of the written results")
+    args = parser.parse_args()
+
+    chat_model = None
+    if args.mock_llm:
+        from utils.mock_llm import MockChatModel
+        chat_model = MockChatModel()
+    workflow = LangGraphEcommerceWorkflow(get_config(), chat_model=chat_model, inventory=get_test_inventory(stock_level=1_000_000),
+                                          result_detail_level=args.detail_level)
+    worker = OrderIntakeWorker(
+        workflow,
+        JsonlSpoolSource(args.spool, follow=args.follow),
+        args.output,
+        max_in_flight=args.max_in_flight,
+        stats_interval_s=args.stats_interval
+    )
+    print(json.dumps(await worker.run(), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/order_payloads.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import os
+import json
+import uuid
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Returning this key from a node resets the merged metadata instead of merging into it
+RESET_METADATA = "__reset__"
+
+
+def merge_metadata(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """LangGraph reducer for `metadata`: node updates are merged into the existing dict instead of replacing it."""
+    if right and right.get(RESET_METADATA):
+        return {key: value for key, value in right.items() if key != RESET_METADATA}
+    if not right:
+        return left or {}
+    if not left:
+        return right
+    return {**left, **right}
+
+
+def payload_db_path(checkpoint_db: Optional[str]) -> Optional[str]:
+    """
+    The payload database kept next to a checkpoint database ("orders.db" -> "orders.payloads.db"). Payloads get
+    their own file so their writes never wait on the checkpointer's write lock.
+    """
+    if not checkpoint_db or checkpoint_db == ":memory:":
+        return checkpoint_db
+    root, ext = os.path.splitext(checkpoint_db)
+    return f"{root}.payloads{ext or '.db'}"
+
+
+@dataclass(frozen=True, slots=True)
+class OrderPayload:
+    """The immutable, potentially large part of an order that graph state refers to by `order_ref`."""
+    order_id: Optional[str]
+    items: list = field(default_factory=list)
+    customer_info: dict = field(default_factory=dict)
+
+
+class OrderPayloadStore:
+    """
+    Keeps each order's payload once, so graph state and every checkpoint carry a short reference instead of
+    a copy of the items and customer info. With `db_path` the payloads are also written to SQLite, so
+    checkpointed orders can be resumed after a restart. The in-memory copy is discarded when a run ends and
+    the SQLite row once the order has run to completion, so only interrupted orders keep a stored payload.
+    Rows of finished orders are deleted in batches of `delete_batch_size`, or on `flush()`.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, delete_batch_size: int = 64, busy_timeout_ms: int = 30_000):
+        self._payloads: Dict[str, OrderPayload] = {}
+        self._lock = threading.Lock()
+        self._finished: List[str] = []
+        self.delete_batch_size = max(1, delete_batch_size)
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=busy_timeout_ms / 1000, check_same_thread=False)
+            # WAL lets other processes read while a payload is written; busy_timeout waits out their writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            self._db.execute("CREATE TABLE IF NOT EXISTS order_payloads (order_ref TEXT PRIMARY KEY, payload TEXT NOT NULL)")
+            self._db.commit()
+
+    def put(self, order_data: Dict[str, Any]) -> str:
+        """Stores an order's payload and returns its reference. Writes to SQLite, so async callers use a thread."""
+        order_id = order_data.get("order_id")
+        order_ref = f"{order_id or 'order'}-{uuid.uuid4().hex[:12]}"
+        payload = OrderPayload(order_id, order_data.get("items") or [], order_data.get("customer_info") or {})
+        with self._lock:
+            self._payloads[order_ref] = payload
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO order_payloads (order_ref, payload) VALUES (?, ?)",
+                    (order_ref, json.dumps({"order_id": order_id, "items": payload.items, "customer_info": payload.customer_info}))
+                )
+                self._db.commit()
+        return order_ref
+
+    def get(self, order_ref: Optional[str]) -> OrderPayload:
+        """Returns the payload for a reference; unknown references yield an empty payload."""
+        with self._lock:
+            payload = self._payloads.get(order_ref)
+            if payload is not None or self._db is None or not order_ref or order_ref in self._finished:
+                return payload or OrderPayload(None)
+            row = self._db.execute("SELECT payload FROM order_payloads WHERE order_ref = ?", (order_ref,)).fetchone()
+        if row is None:
+            logger.info(f"No payload stored for order reference {order_ref}; the order finished or was never stored.")
+            return OrderPayload(None)
+        data = json.loads(row[0])
+        return OrderPayload(data.get("order_id"), data.get("items") or [], data.get("customer_info") or {})
+
+    def discard(self, order_ref: Optional[str], finished: bool = False):
+        """
+        Drops the in-memory copy once a run has ended. The SQLite row is deleted too when the order `finished`,
+        together with those of other finished orders once a batch is full, and kept for a resume when the run
+        was interrupted.
+        """
+        with self._lock:
+            self._payloads.pop(order_ref, None)
+            if not (finished and self._db is not None and order_ref):
+                return
+            self._finished.append(order_ref)
+            if len(self._finished) >= self.delete_batch_size:
+                self._delete_finished()
+
+    def flush(self):
+        """Deletes the rows of finished orders that are still waiting for a full batch."""
+        with self._lock:
+            self._delete_finished()
+
+    def _delete_finished(self):
+        if not self._finished or self._db is None:
+            return
+        finished, self._finished = self._finished, []
+        try:
+            self._db.executemany("DELETE FROM order_payloads WHERE order_ref = ?", [(order_ref,) for order_ref in finished])
+            self._db.commit()
+        except sqlite3.Error:
+            # Keep them for the next batch; a leftover row only costs disk space
+            self._finished = finished + self._finished
+            raise
+
+    def stored(self) -> int:
+        """Number of payloads kept in SQLite for orders that have not finished."""
+        if self._db is None:
+            return 0
+        with self._lock:
+            self._delete_finished()
+            return self._db.execute("SELECT COUNT(*) FROM order_payloads").fetchone()[0]
+
+    def __len__(self) -> int:
+        return len(self._payloads)
@@ -0,0 +1,567 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/rate_limiter.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager, asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+from utils.deadlines import DeadlineExceeded, check_deadline, remaining_s
+from utils.metrics import WorkflowMetrics
+
+logger = logging.getLogger(__name__)
+
+THROTTLED = "throttled"
+TRANSIENT = "transient"
+FATAL = "fatal"
+# Exception class names that providers use for throttling (OpenAI/LiteLLM, requests-style clients)
+THROTTLE_ERROR_TYPES = ("RateLimitError", "TooManyRequests", "TooManyRequestsError")
+# A 429 given as a status in the error message, e.g. watsonx's "Status code: 429", and throttling phrases
+_THROTTLE_TEXT = re.compile(r"\b(?:status(?:[ _]code)?|http(?: error)?|error code)\W{0,3}429\b|rate limit|too many requests")
+
+
+def estimate_tokens(text: Any) -> int:
+    """Rough token count (about four characters per token) for rate limiting before the real usage is known."""
+    if isinstance(text, (list, tuple)):
+        return sum(estimate_tokens(getattr(item, "content", item)) for item in text)
+    return max(1, len(str(text)) // 4)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    response = getattr(error, "response", None)
+    for status in (getattr(error, "status_code", None), getattr(response, "status_code", None), getattr(error, "status", None)):
+        try:
+            if status is not None:
+                return int(status)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Sorts an LLM call failure into throttled (429), transient (timeouts, 5xx) or fatal. A 429 is recognised
+    by the status code, the exception type or a status in the message, never by a bare "429" in ids or sizes.
+    """
+    status = _status_code(error)
+    text = str(error).lower()
+    if status == 429 or type(error).__name__ in THROTTLE_ERROR_TYPES or _THROTTLE_TEXT.search(text):
+        return THROTTLED
+    if (status in (500, 502, 503, 504)
+            or isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError))
+            or "timed out" in text or "timeout" in text or "temporarily unavailable" in text):
+        return TRANSIENT
+    return FATAL
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `per_minute` units per minute. `reserve()` takes the units
+    immediately (the balance may go negative) and returns how long the caller must wait, so waiting
+    callers are served in arrival order. A limit of 0 disables the bucket.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.per_minute = per_minute
+        self.capacity = burst if burst is not None else per_minute / 6  # ten seconds worth of burst
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        if self.per_minute <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_minute / 60.0)
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens * 60.0 / self.per_minute)
+
+    def try_take(self, amount: float) -> bool:
+        """Takes `amount` units only if they are available right now."""
+        if self.per_minute <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_minute / 60.0)
+            self._updated = now
+            if self._tokens < amount:
+                return False
+            self._tokens -= amount
+            return True
+
+    def refund(self, amount: float):
+        """Gives back units that were reserved but not used (or charges more when `amount` is negative)."""
+        if self.per_minute <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class AIMDConcurrencyLimiter:
+    """
+    Concurrency gate whose limit adapts AIMD-style: +1/limit per successful call (about +1 per round trip
+    of the whole window), halved on a 429, and reduced by 10% when latency spikes above `latency_spike_factor`
+    times its moving average. Sync and async callers share the same FIFO queue of waiters.
+    """
+
+    def __init__(self, initial_limit: int = 8, min_limit: int = 1, max_limit: int = 64,
+                 backoff_factor: float = 0.5, latency_spike_factor: float = 3.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_factor = backoff_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._latency_ewma: Optional[float] = None
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def try_acquire(self) -> bool:
+        """Takes a slot only if one is free and nobody is queued for it."""
+        with self._lock:
+            if self._in_flight < int(self.limit) and not self._waiters:
+                self._in_flight += 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._in_flight < int(self.limit) and not self._waiters:
+                self._in_flight += 1
+                return True
+            event = threading.Event()
+            self._waiters.append((None, event))
+        if event.wait(timeout):
+            return True
+        with self._lock:
+            try:
+                self._waiters.remove((None, event))
+                return False
+            except ValueError:
+                return True  # the slot was handed over just as the wait timed out
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < int(self.limit) and not self._waiters:
+                self._in_flight += 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, future))
+                    handed_over = False
+                except ValueError:
+                    handed_over = True
+            # A slot handed over to a future that got cancelled is returned by `_resolve`; one handed over
+            # to a future that was already resolved is returned here
+            if handed_over and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._wake()
+
+    def _wake(self):
+        """Hands free slots to waiters in arrival order. Must be called with the lock held."""
+        while self._waiters and self._in_flight < int(self.limit):
+            loop, waiter = self._waiters.popleft()
+            self._in_flight += 1
+            if loop is None:
+                waiter.set()
+            else:
+                loop.call_soon_threadsafe(self._resolve, waiter)
+
+    def _resolve(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def on_success(self, latency_s: float):
+        with self._lock:
+            spiked = self._latency_ewma is not None and latency_s > self.latency_spike_factor * self._latency_ewma
+            self._latency_ewma = latency_s if self._latency_ewma is None else 0.9 * self._latency_ewma + 0.1 * latency_s
+            if spiked:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self._wake()
+
+    def on_throttle(self):
+        with self._lock:
+            self.limit = max(self.min_limit, self.limit * self.backoff_factor)
+
+
+class AdaptiveRateLimiter:
+    """
+    Shared gate for LLM calls: requests-per-minute and tokens-per-minute buckets, an AIMD concurrency limit
+    and retries with jittered exponential backoff (honouring Retry-After). Each attempt is bounded by
+    `call_timeout_s` and by the workflow deadline (utils/deadlines.py). With `hedging`, an async call still
+    running after the observed p95 latency gets one duplicate request and the first answer wins. Hedges are
+    paid for by a credit that grows by `hedge_max_fraction` per call, and they only start when a concurrency
+    slot and rate budget are free. Every call records queue wait, throttling, retries and hedges in `metrics`.
+    """
+    HEDGE_CREDIT_CAP = 10.0
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, max_concurrency: int = 16,
+                 initial_concurrency: Optional[int] = None, max_retries: int = 5, base_backoff_s: float = 0.5,
+                 max_backoff_s: float = 30.0, expected_output_tokens: int = 256, call_timeout_s: Optional[float] = None,
+                 hedging: bool = False, hedge_quantile: float = 0.95, hedge_max_fraction: float = 0.05,
+                 hedge_min_samples: int = 20, metrics: Optional[WorkflowMetrics] = None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AIMDConcurrencyLimiter(initial_limit=initial_concurrency or max(1, max_concurrency // 2), max_limit=max_concurrency)
+        self.max_retries = max_retries
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.expected_output_tokens = expected_output_tokens
+        self.call_timeout_s = call_timeout_s
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_max_fraction = hedge_max_fraction
+        self.hedge_min_samples = hedge_min_samples
+        self.metrics = metrics or WorkflowMetrics()
+        self._hedge_credit = 0.0
+        self._hedge_lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "AdaptiveRateLimiter":
+        return cls(
+            requests_per_minute=config.llm_requests_per_minute,
+            tokens_per_minute=config.llm_tokens_per_minute,
+            max_concurrency=config.llm_max_concurrency,
+            max_retries=config.llm_max_retries,
+            call_timeout_s=config.llm_call_timeout_s,
+            hedging=config.llm_hedging_enabled,
+            hedge_max_fraction=config.llm_hedge_max_fraction,
+        )
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(self.max_backoff_s, retry_after)
+        return random.uniform(0, min(self.max_backoff_s, self.base_backoff_s * 2 ** attempt))
+
+    def _reserve(self, tokens: int, name: str) -> float:
+        delay = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        left = remaining_s()
+        if left is not None and delay >= left:
+            self.requests.refund(1)
+            self.tokens.refund(tokens)
+            self.metrics.increment("rate_limiter.deadline_exceeded")
+            raise DeadlineExceeded(f"LLM call '{name}' would wait {delay:.2f}s for rate budget with {max(0.0, left):.2f}s left.")
+        if delay > 0:
+            self.metrics.increment("rate_limiter.rate_limited")
+            self.metrics.observe("rate_limiter.rate_wait_s", delay)
+        return delay
+
+    def _call_timeout(self, name: str) -> Optional[float]:
+        """The time an attempt may take: the per-call timeout, capped by what is left of the workflow deadline."""
+        try:
+            check_deadline(f"LLM call '{name}'")
+        except DeadlineExceeded:
+            self.metrics.increment("rate_limiter.deadline_exceeded")
+            raise
+        limits = [limit for limit in (self.call_timeout_s, remaining_s()) if limit is not None]
+        return min(limits) if limits else None
+
+    def _timed_out(self, name: str, timeout: float) -> TimeoutError:
+        left = remaining_s()
+        if left is not None and left <= 0:
+            self.metrics.increment("rate_limiter.deadline_exceeded")
+            return DeadlineExceeded(f"LLM call '{name}' ran past the workflow deadline.")
+        self.metrics.increment("rate_limiter.timeouts")
+        return TimeoutError(f"LLM call '{name}' timed out after {timeout:.2f}s.")
+
+    def _queue_timeout(self, name: str) -> DeadlineExceeded:
+        self.metrics.increment("rate_limiter.deadline_exceeded")
+        return DeadlineExceeded(f"Workflow deadline exceeded while LLM call '{name}' was queued.")
+
+    def _settle(self, name: str, reserved_tokens: int, used_tokens: Optional[int], latency_s: float):
+        if used_tokens is not None:
+            self.tokens.refund(reserved_tokens - used_tokens)
+        self.concurrency.on_success(latency_s)
+        self.metrics.increment(f"rate_limiter.calls.{name}")
+        self.metrics.observe("rate_limiter.latency_s", latency_s)
+        self.metrics.observe(f"rate_limiter.latency_s.{name}", latency_s)
+
+    def _on_error(self, name: str, error: BaseException, attempt: int) -> Optional[float]:
+        """Returns the backoff before the next attempt, or None if the error should be raised."""
+        kind = FATAL if isinstance(error, DeadlineExceeded) else classify_error(error)
+        if kind == THROTTLED:
+            self.concurrency.on_throttle()
+            self.metrics.increment("rate_limiter.throttled")
+        delay = self._backoff(attempt, error) if kind != FATAL and attempt < self.max_retries else None
+        left = remaining_s()
+        if delay is not None and left is not None and delay >= left:
+            delay = None
+        if delay is None:
+            self.metrics.increment(f"rate_limiter.failures.{name}")
+            return None
+        self.metrics.increment("rate_limiter.retries")
+        logger.warning(f"LLM call '{name}' failed ({kind}: {error}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s.")
+        return delay
+
+    def _run_in_slot(self, func: Callable[[], Any], name: str) -> Any:
+        """
+        Runs a blocking call in the concurrency slot the caller acquired, and gives the slot back. After the
+        attempt's timeout the caller stops waiting, but the abandoned call keeps running in the background and
+        keeps its slot until it finishes, so timed-out calls still count against the concurrency limit.
+        """
+        try:
+            timeout = self._call_timeout(name)
+        except BaseException:
+            self.concurrency.release()
+            raise
+        if timeout is None:
+            try:
+                return func()
+            finally:
+                self.concurrency.release()
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency.max_limit * 2, thread_name_prefix="llm-call")
+        future = self._executor.submit(contextvars.copy_context().run, func)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise self._timed_out(name, timeout) from None
+        finally:
+            if future.cancel() or future.done():
+                self.concurrency.release()
+            else:
+                self.metrics.increment("rate_limiter.abandoned")
+                future.add_done_callback(lambda _: self.concurrency.release())
+
+    def call(self, func: Callable[[], Any], estimated_tokens: int = 0, name: str = "llm",
+             usage: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+        """Runs a blocking LLM call under the limits, retrying throttled and transient failures."""
+        reserved = estimated_tokens + self.expected_output_tokens
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.perf_counter()
+            time.sleep(self._reserve(reserved, name))
+            if not self.concurrency.acquire(remaining_s()):
+                raise self._queue_timeout(name)
+            self.metrics.observe("rate_limiter.queue_wait_s", time.perf_counter() - queued_at)
+            started_at = time.perf_counter()
+            try:
+                result = self._run_in_slot(func, name)
+            except Exception as e:
+                delay = self._on_error(name, e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self._settle(name, reserved, usage(result) if usage else None, time.perf_counter() - started_at)
+                return result
+            time.sleep(delay)
+
+    def _hedge_delay(self, name: str) -> Optional[float]:
+        if not self.hedging or self.metrics.counter(f"rate_limiter.calls.{name}") < self.hedge_min_samples:
+            return None
+        return self.metrics.percentile(f"rate_limiter.latency_s.{name}", self.hedge_quantile)
+
+    def _try_start_hedge(self, reserved_tokens: int) -> bool:
+        """Claims a hedge credit, a free concurrency slot and rate budget without waiting for any of them."""
+        with self._hedge_lock:
+            if self._hedge_credit < 1:
+                self.metrics.increment("rate_limiter.hedges_skipped")
+                return False
+            self._hedge_credit -= 1
+        if self.concurrency.try_acquire():
+            if self.requests.try_take(1):
+                if self.tokens.try_take(reserved_tokens):
+                    return True
+                self.requests.refund(1)
+            self.concurrency.release()
+        with self._hedge_lock:
+            self._hedge_credit += 1
+        self.metrics.increment("rate_limiter.hedges_skipped")
+        return False
+
+    async def _run_hedged(self, func: Callable[[], Awaitable[Any]], name: str, timeout: Optional[float], reserved_tokens: int) -> Any:
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + timeout if timeout is not None else None
+        with self._hedge_lock:
+            self._hedge_credit = min(self.HEDGE_CREDIT_CAP, self._hedge_credit + self.hedge_max_fraction)
+        primary, hedge = asyncio.ensure_future(func()), None
+        try:
+            hedge_after = self._hedge_delay(name)
+            if hedge_after is not None:
+                wait = hedge_after if give_up_at is None else min(hedge_after, give_up_at - loop.time())
+                done, _ = await asyncio.wait({primary}, timeout=max(0.0, wait))
+                if not done and (give_up_at is None or loop.time() < give_up_at) and self._try_start_hedge(reserved_tokens):
+                    self.metrics.increment("rate_limiter.hedges")
+                    hedge = asyncio.ensure_future(func())
+            pending, error = {task for task in (primary, hedge) if task is not None}, None
+            while pending:
+                left = None if give_up_at is None else give_up_at - loop.time()
+                done, pending = await asyncio.wait(pending, timeout=left if left is None else max(0.0, left),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise self._timed_out(name, timeout)
+                winner = None
+                for task in done:
+                    if task.exception() is None:
+                        winner = winner or task
+                    else:
+                        error = error or task.exception()
+                if winner is not None:
+                    if winner is hedge:
+                        self.metrics.increment("rate_limiter.hedge_wins")
+                    return winner.result()
+            raise error
+        finally:
+            losers = [task for task in (primary, hedge) if task is not None and not task.done()]
+            for task in losers:
+                task.cancel()
+            # The hedge slot is only given back once the cancelled requests have actually stopped
+            try:
+                if losers:
+                    await asyncio.gather(*losers, return_exceptions=True)
+            finally:
+                if hedge is not None:
+                    self.concurrency.release()
+
+    async def acall(self, func: Callable[[], Awaitable[Any]], estimated_tokens: int = 0, name: str = "llm",
+                    usage: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+        """Async variant of `call`; `func` creates a fresh awaitable for every attempt (and for a hedge)."""
+        reserved = estimated_tokens + self.expected_output_tokens
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.perf_counter()
+            await asyncio.sleep(self._reserve(reserved, name))
+            try:
+                await asyncio.wait_for(self.concurrency.aacquire(), remaining_s())
+            except asyncio.TimeoutError:
+                raise self._queue_timeout(name) from None
+            self.metrics.observe("rate_limiter.queue_wait_s", time.perf_counter() - queued_at)
+            started_at = time.perf_counter()
+            # The slot is returned however the attempt ends, including when the caller is cancelled
+            try:
+                result = await self._run_hedged(func, name, self._call_timeout(name), reserved)
+            except Exception as e:
+                delay = self._on_error(name, e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self._settle(name, reserved, usage(result) if usage else None, time.perf_counter() - started_at)
+                return result
+            finally:
+                self.concurrency.release()
+            await asyncio.sleep(delay)
+
+    @contextmanager
+    def slot(self, estimated_tokens: int = 0, name: str = "llm_stream"):
+        """Holds a rate and concurrency slot around a streaming call; streams are not retried or hedged."""
+        queued_at = time.perf_counter()
+        time.sleep(self._reserve(estimated_tokens + self.expected_output_tokens, name))
+        if not self.concurrency.acquire(remaining_s()):
+            raise self._queue_timeout(name)
+        self.metrics.observe("rate_limiter.queue_wait_s", time.perf_counter() - queued_at)
+        started_at = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self._on_error(name, e, self.max_retries)
+            raise
+        else:
+            self._settle(name, 0, None, time.perf_counter() - started_at)
+        finally:
+            self.concurrency.release()
+
+    @asynccontextmanager
+    async def aslot(self, estimated_tokens: int = 0, name: str = "llm_stream"):
+        """Async variant of `slot`."""
+        queued_at = time.perf_counter()
+        await asyncio.sleep(self._reserve(estimated_tokens + self.expected_output_tokens, name))
+        try:
+            await asyncio.wait_for(self.concurrency.aacquire(), remaining_s())
+        except asyncio.TimeoutError:
+            raise self._queue_timeout(name) from None
+        self.metrics.observe("rate_limiter.queue_wait_s", time.perf_counter() - queued_at)
+        started_at = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self._on_error(name, e, self.max_retries)
+            raise
+        else:
+            self._settle(name, 0, None, time.perf_counter() - started_at)
+        finally:
+            self.concurrency.release()
+
+    def stats(self) -> dict:
+        """Live limiter state plus queue wait, throttling, retry, timeout and hedging metrics."""
+        snapshot = self.metrics.snapshot()
+        counters = snapshot["counters"]
+        calls = sum(value for name, value in counters.items() if name.startswith("rate_limiter.calls."))
+        snapshot["concurrency_limit"] = round(self.concurrency.limit, 2)
+        snapshot["in_flight"] = self.concurrency.in_flight
+        snapshot["waiting"] = self.concurrency.waiting
+        snapshot["hedging"] = {
+            "enabled": self.hedging,
+            "hedges": counters.get("rate_limiter.hedges", 0),
+            "wins": counters.get("rate_limiter.hedge_wins", 0),
+            "skipped": counters.get("rate_limiter.hedges_skipped", 0),
+            "hedge_rate": round(counters.get("rate_limiter.hedges", 0) / calls, 4) if calls else 0.0,
+            "latency_p99_s": snapshot["observations"].get("rate_limiter.latency_s", {}).get("p99"),
+        }
+        return snapshot
+
+
+_shared_limiter: Optional[AdaptiveRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_rate_limiter(config=None) -> AdaptiveRateLimiter:
+    """The process-wide limiter shared by every framework calling the same watsonx project."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            if config is None:
+                from config.config import get_config
+                config = get_config()
+            _shared_limiter = AdaptiveRateLimiter.from_config(config)
+            logger.info(
+                f"Shared LLM rate limiter: {config.llm_requests_per_minute or 'unlimited'} RPM, "
+                f"{config.llm_tokens_per_minute or 'unlimited'} TPM, up to {config.llm_max_concurrency} concurrent calls, "
+                f"hedging {'on' if config.llm_hedging_enabled else 'off'}."
+            )
+        return _shared_limiter
@@ -0,0 +1,163 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/runtime.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import time
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from config.config import Config, get_config
+from utils.memory_profiler import get_memory_profiler
+from utils.workflow_factory import WORKFLOW_FIELDS, WorkflowHandler, create_workflow
+
+logger = logging.getLogger(__name__)
+
+READY = "ready"
+DEGRADED = "degraded"
+UNAVAILABLE = "unavailable"
+
+
+@dataclass
+class ComponentStatus:
+    """Startup outcome of one framework. A degraded component was created but its warm-up call failed."""
+    name: str
+    status: str = UNAVAILABLE
+    init_s: float = 0.0
+    warm_up_s: Optional[float] = None
+    error: Optional[str] = None
+
+
+class RuntimeContext:
+    """
+    Loads the config once and creates the requested frameworks concurrently, each on its own thread, so a
+    cold start takes about as long as the slowest framework rather than the sum of all of them. With
+    `warm_up`, every ready framework then sends one tiny prompt to its models, which moves the first call's
+    auth and connection setup out of the first request. The created frameworks are kept for reuse.
+    """
+
+    def __init__(self, config: Optional[Config] = None, mock_model: Optional[BaseChatModel] = None):
+        started_at = time.perf_counter()
+        self.config = config or get_config()
+        self.config_load_s = time.perf_counter() - started_at
+        self.mock_model = mock_model
+        self.components: Dict[str, ComponentStatus] = {}
+        self.cold_start_s: Optional[float] = None
+        self._ready: Dict[str, Tuple[Any, WorkflowHandler]] = {}
+
+    async def start(self, workflows: Optional[Iterable[str]] = None, warm_up: Optional[bool] = None,
+                    timeout_s: Optional[float] = None) -> "RuntimeContext":
+        """
+        Creates the workflows (all five by default). A framework that fails to initialise is recorded as
+        unavailable and does not hold up the others. `warm_up` and `timeout_s` default to the config.
+        """
+        names = list(dict.fromkeys(workflows or WORKFLOW_FIELDS))
+        warm_up = self.config.startup_warm_up if warm_up is None else warm_up
+        timeout_s = self.config.startup_warm_up_timeout_s if timeout_s is None else timeout_s
+        started_at = time.perf_counter()
+        # A dedicated pool, so slow framework setup never occupies the threads that serve requests
+        with ThreadPoolExecutor(max_workers=max(1, len(names)), thread_name_prefix="runtime-init") as pool:
+            await asyncio.gather(*(self._start_component(name, pool, warm_up, timeout_s) for name in names))
+        self.cold_start_s = time.perf_counter() - started_at
+        report = self.report()
+        logger.info(f"Runtime started in {report['cold_start_s']}s (components took {report['sum_component_s']}s in total): "
+                    + ", ".join(f"{name}={component['status']}" for name, component in report["components"].items()))
+        return self
+
+    async def _start_component(self, name: str, pool: ThreadPoolExecutor, warm_up: bool, timeout_s: float):
+        status = self.components[name] = ComponentStatus(name)
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        try:
+            # copy_context carries the caller's trace span and deadline into the init thread
+            instance, handler = await loop.run_in_executor(
+                pool, contextvars.copy_context().run, create_workflow, name, self.config, self.mock_model)
+        except Exception as e:
+            status.error = str(e)
+            logger.warning(f"Workflow '{name}' failed to start: {e}")
+            return
+        finally:
+            status.init_s = time.perf_counter() - started_at
+        # With MEMORY_PROFILING_ENABLED, every served workflow call is profiled
+        profiler = get_memory_profiler(self.config)
+        if profiler is not None:
+            profiler.attach(instance, label=name)
+        self._ready[name] = (instance, handler)
+        status.status = READY
+        if not warm_up or not hasattr(instance, "warm_up"):
+            return
+
+        started_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(instance.warm_up(), timeout_s)
+        except Exception as e:
+            # The framework stays usable; its first real request pays the connection setup instead
+            status.status = DEGRADED
+            status.error = f"warm-up failed: {e or type(e).__name__}"
+            logger.warning(f"Workflow '{name}' {status.error}")
+        finally:
+            status.warm_up_s = time.perf_counter() - started_at
+
+    def require(self, name: str) -> Tuple[Any, WorkflowHandler]:
+        """(instance, handler) of a started workflow; raises RuntimeError if it is not available."""
+        if name not in self._ready:
+            component = self.components.get(name)
+            raise RuntimeError(component.error if component else f"The {name} workflow was not started")
+        return self._ready[name]
+
+    def instance(self, name: str) -> Any:
+        return self._ready[name][0] if name in self._ready else None
+
+    def handler(self, name: str) -> Optional[WorkflowHandler]:
+        return self._ready[name][1] if name in self._ready else None
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Config load time, wall-clock cold start, the sum of the component times (roughly what a one-by-one
+        start would cost) and per-component init and warm-up timings and status.
+        """
+        components = {name: asdict(component) for name, component in self.components.items()}
+        for component in components.values():
+            del component["name"]
+            for key in ("init_s", "warm_up_s"):
+                if component[key] is not None:
+                    component[key] = round(component[key], 4)
+        slowest = max(self.components.values(), key=lambda c: c.init_s + (c.warm_up_s or 0.0), default=None)
+        return {
+            "config_load_s": round(self.config_load_s, 4),
+            "cold_start_s": round(self.cold_start_s, 4) if self.cold_start_s is not None else None,
+            "sum_component_s": round(sum(c.init_s + (c.warm_up_s or 0.0) for c in self.components.values()), 4),
+            "slowest_component": slowest.name if slowest else None,
+            "components": components,
+        }
+
+
+async def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Start the workflows concurrently and report per-component startup timings.")
+    parser.add_argument("--workflows", default=",".join(WORKFLOW_FIELDS), help="Comma-separated workflows to start")
+    parser.add_argument("--warm-up", action="store_true", help="Send one tiny prompt to each framework's models after init")
+    parser.add_argument("--mock-llm", action="store_true", help="Run LangGraph and LangChain with the offline mock chat model")
+    args = parser.parse_args()
+
+    mock_model = None
+    if args.mock_llm:
+        from utils.mock_llm import MockChatModel
+        mock_model = MockChatModel()
+    runtime = RuntimeContext(mock_model=mock_model)
+    await runtime.start([name.strip() for name in args.workflows.split(",") if name.strip()], warm_up=args.warm_up or None)
+    print(json.dumps(runtime.report(), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/shipping_templates.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import logging
+from string import Template
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (locale, channel) -> template source. Placeholders: order_id, name, address, items, item_count, status
+SHIPPING_TEMPLATES: Dict[Tuple[str, str], str] = {
+    ("en", "email"): (
+        "Hi $name,\n\n"
+        "Good news! Your order $order_id has been $status.\n\n"
+        "Items ($item_count): $items\n"
+        "Shipping to: $address\n\n"
+        "Thank you for shopping with us!"
+    ),
+    ("en", "sms"): "Hi $name, your order $order_id ($item_count items) has been $status to $address. Thank you!",
+    ("es", "email"): (
+        "Hola $name,\n\n"
+        "¡Buenas noticias! Tu pedido $order_id ha sido $status.\n\n"
+        "Artículos ($item_count): $items\n"
+        "Dirección de envío: $address\n\n"
+        "¡Gracias por tu compra!"
+    ),
+    ("es", "sms"): "Hola $name, tu pedido $order_id ($item_count artículos) ha sido $status a $address. ¡Gracias!",
+    ("de", "email"): (
+        "Hallo $name,\n\n"
+        "gute Nachrichten! Ihre Bestellung $order_id wurde $status.\n\n"
+        "Artikel ($item_count): $items\n"
+        "Lieferadresse: $address\n\n"
+        "Vielen Dank für Ihren Einkauf!"
+    ),
+    ("de", "sms"): "Hallo $name, Ihre Bestellung $order_id ($item_count Artikel) wurde an $address $status. Danke!",
+}
+
+# Shipping status wording per locale; unknown statuses are rendered as-is
+STATUS_LABELS: Dict[str, Dict[str, str]] = {
+    "en": {"shipped": "shipped"},
+    "es": {"shipped": "enviado"},
+    "de": {"shipped": "versandt"},
+}
+
+
+class ShippingMessageRenderer:
+    """
+    Renders shipping confirmations locally from templates compiled once per (locale, channel).
+    Unknown locales and channels fall back to the defaults.
+    """
+
+    def __init__(self, templates: Optional[Dict[Tuple[str, str], str]] = None, default_locale: str = "en", default_channel: str = "email"):
+        self._templates = {key: Template(source) for key, source in (templates or SHIPPING_TEMPLATES).items()}
+        self.default_locale = default_locale
+        self.default_channel = default_channel
+        if (default_locale, default_channel) not in self._templates:
+            raise ValueError(f"No shipping template for default locale/channel ({default_locale}, {default_channel}).")
+
+    def _template(self, locale: Optional[str], channel: Optional[str]) -> Template:
+        locale = (locale or self.default_locale).split("-")[0].split("_")[0].lower()
+        channel = (channel or self.default_channel).lower()
+        return (self._templates.get((locale, channel))
+                or self._templates.get((locale, self.default_channel))
+                or self._templates[(self.default_locale, self.default_channel)])
+
+    @staticmethod
+    def _items_summary(items: List[Dict[str, Any]]) -> str:
+        return ", ".join(f"{item.get('quantity', 1)} x {item.get('name') or item.get('item_id')}" for item in items)
+
+    def render(self, order_id: str, items: List[Dict[str, Any]], customer_info: Dict[str, Any], shipping_status: str = "shipped",
+               locale: Optional[str] = None, channel: Optional[str] = None) -> str:
+        """Renders the shipping confirmation for an order."""
+        locale = locale or customer_info.get("locale")
+        channel = channel or customer_info.get("notification_channel")
+        language = (locale or self.default_locale).split("-")[0].split("_")[0].lower()
+        return self._template(locale, channel).safe_substitute(
+            order_id=order_id,
+            name=customer_info.get("name") or "there",
+            address=customer_info.get("address") or "",
+            items=self._items_summary(items or []),
+            item_count=sum(int(item.get("quantity", 1)) for item in items or []),
+            status=STATUS_LABELS.get(language, {}).get(shipping_status, shipping_status),
+        )
+
+
+if __name__ == "__main__":
+    renderer = ShippingMessageRenderer()
+    sample_items = [{"item_id": "P001", "name": "Laptop Pro", "quantity": 1}, {"item_id": "P002", "name": "Wireless Mouse", "quantity": 2}]
+    sample_customer = {"name": "Alice Smith", "address": "123 Main St, Anytown, USA"}
+    print(renderer.render("ORD_001", sample_items, sample_customer))
+    print(renderer.render("ORD_001", sample_items, {**sample_customer, "locale": "es-MX", "notification_channel": "sms"}))
@@ -0,0 +1,93 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/streaming.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, AsyncIterator, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+NODE_STARTED = "node_started"
+TOKEN = "token"
+NODE_FINISHED = "node_finished"
+RUN_FINISHED = "run_finished"
+
+
+@dataclass
+class StreamEvent:
+    """A typed event emitted while a workflow runs: node lifecycle, token chunks and the final result."""
+    type: str
+    node: Optional[str] = None
+    data: Any = None
+    elapsed_s: float = 0.0
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "node": self.node, "data": self.data, "elapsed_s": round(self.elapsed_s, 4), "metrics": self.metrics}
+
+
+async def stream_runnable_events(
+    runnable,
+    run_input: Any,
+    node_names: Iterable[str],
+    finalize: Callable[[Any, Dict[str, Any]], Any],
+    config: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[StreamEvent]:
+    """
+    Converts a runnable's `astream_events` (v2) into typed StreamEvents for the named nodes.
+    Token chunks are attributed to the nearest enclosing node. The last event is RUN_FINISHED, carrying
+    `finalize(root_output, node_outputs)` and the time-to-first-token metric.
+    """
+    node_names = set(node_names)
+    node_runs: Dict[str, str] = {}
+    started_at = time.perf_counter()
+    first_token_at = None
+    token_chunks = 0
+    root_output = None
+    node_outputs: Dict[str, Any] = {}
+
+    async for event in runnable.astream_events(run_input, config=config, version="v2"):
+        kind = event["event"]
+        name = event.get("name")
+        run_id = event.get("run_id")
+        parent_ids = event.get("parent_ids", [])
+        elapsed = time.perf_counter() - started_at
+
+        if kind == "on_chain_start" and name in node_names and run_id not in node_runs:
+            # A runnable nested inside a node of the same name (e.g. a named RunnableLambda) is the same node
+            if any(node_runs.get(parent) == name for parent in parent_ids):
+                continue
+            node_runs[run_id] = name
+            yield StreamEvent(NODE_STARTED, node=name, elapsed_s=elapsed)
+
+        elif kind == "on_chat_model_stream":
+            chunk = event["data"].get("chunk")
+            text = getattr(chunk, "content", chunk)
+            if not text:
+                continue
+            if first_token_at is None:
+                first_token_at = elapsed
+            token_chunks += 1
+            node = next((node_runs[parent] for parent in reversed(parent_ids) if parent in node_runs), None)
+            yield StreamEvent(TOKEN, node=node, data=text, elapsed_s=elapsed)
+
+        elif kind == "on_chain_end" and run_id in node_runs:
+            output = event["data"].get("output")
+            node_outputs[node_runs[run_id]] = output
+            yield StreamEvent(NODE_FINISHED, node=node_runs[run_id], data=output, elapsed_s=elapsed)
+
+        elif kind == "on_chain_end" and not parent_ids:
+            root_output = event["data"].get("output")
+
+    total = time.perf_counter() - started_at
+    metrics = {
+        "time_to_first_token_s": round(first_token_at, 4) if first_token_at is not None else None,
+        "total_s": round(total, 4),
+        "token_chunks": token_chunks,
+    }
+    logger.info(f"Stream finished: time to first token {metrics['time_to_first_token_s']}s, total {metrics['total_s']}s.")
+    yield StreamEvent(RUN_FINISHED, data=finalize(root_output, node_outputs), elapsed_s=total, metrics=metrics)
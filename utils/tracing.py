@@ -0,0 +1,612 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/tracing.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import json
+import time
+import atexit
+import random
+import asyncio
+import logging
+import threading
+import functools
+import urllib.request
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "agentic-ai"
+# Span kinds; OTLP only knows internal/server/client, the rest are exported as internal with a "kind" attribute
+SERVER, INTERNAL, CHAIN, LLM, TOOL, AGENT = "server", "internal", "chain", "llm", "tool", "agent"
+_OTLP_KINDS = {INTERNAL: 1, SERVER: 2, LLM: 3}
+
+# The span the current task or thread is working in; asyncio tasks inherit it, worker threads need copy_context()
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """
+    A timed operation in a trace. Use it as a context manager (`with tracer.span(...)`) to make it the parent
+    of spans started inside; spans created by callbacks are ended explicitly with `end()`.
+    """
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "error", "_token")
+    sampled = True
+
+    def __init__(self, tracer: "Tracer", name: str, kind: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]] = None, start_ns: Optional[int] = None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self, end_ns: Optional[int] = None):
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+            self.tracer.processor.on_end(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.record_error(exc)
+        self.end()
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited in another context (e.g. an async generator closed by a different task)
+            _current_span.set(None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class NonRecordingSpan:
+    """
+    Stands in for spans that are not exported: a sampled-out root (which carries the decision to its children
+    while it is the current span) or any span of a disabled tracer.
+    """
+    __slots__ = ("_token", "_carries_context")
+    sampled = False
+
+    def __init__(self, carries_context: bool = False):
+        self._token = None
+        self._carries_context = carries_context
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def end(self, end_ns: Optional[int] = None):
+        pass
+
+    def __enter__(self):
+        if self._carries_context:
+            self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                _current_span.set(None)
+
+
+_NOOP_SPAN = NonRecordingSpan()
+
+
+class JsonlSpanExporter:
+    """Appends finished spans, one JSON object per line, to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Dict[str, Any]]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+    def shutdown(self):
+        pass
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+
+
+def to_otlp(spans: List[Dict[str, Any]], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """Converts exported span dicts to an OTLP/JSON ExportTraceServiceRequest."""
+    otlp_spans = []
+    for span in spans:
+        attributes = {**span["attributes"], "span.kind": span["kind"]}
+        otlp_spans.append({
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "parentSpanId": span["parent_id"] or "",
+            "name": span["name"],
+            "kind": _OTLP_KINDS.get(span["kind"], 1),
+            "startTimeUnixNano": str(span["start_time_ns"]),
+            "endTimeUnixNano": str(span["start_time_ns"] + int(span["duration_ms"] * 1e6)),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None],
+            "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1},
+        })
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{"scope": {"name": "utils.tracing"}, "spans": otlp_spans}],
+    }]}
+
+
+def _from_otlp_value(value: Dict[str, Any]) -> Any:
+    kind, raw = next(iter(value.items()), (None, None))
+    return int(raw) if kind == "intValue" else raw
+
+
+def from_otlp(request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Converts an OTLP/JSON ExportTraceServiceRequest back to the JSONL span format."""
+    spans = []
+    for resource_spans in request.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                attributes = {item["key"]: _from_otlp_value(item["value"]) for item in span.get("attributes", [])}
+                start_ns, end_ns = int(span["startTimeUnixNano"]), int(span["endTimeUnixNano"])
+                error = span.get("status", {}).get("code") == 2
+                spans.append({
+                    "trace_id": span["traceId"],
+                    "span_id": span["spanId"],
+                    "parent_id": span.get("parentSpanId") or None,
+                    "name": span["name"],
+                    "kind": attributes.pop("span.kind", INTERNAL),
+                    "start_time_ns": start_ns,
+                    "duration_ms": round((end_ns - start_ns) / 1e6, 3),
+                    "status": "error" if error else "ok",
+                    "error": span["status"].get("message") if error else None,
+                    "attributes": attributes,
+                })
+    return spans
+
+
+class OtlpHttpSpanExporter:
+    """Posts spans as OTLP/JSON to a collector's /v1/traces endpoint (e.g. `python -m utils.tracing collect`)."""
+
+    def __init__(self, endpoint: str, service_name: str = SERVICE_NAME, timeout_s: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout_s = timeout_s
+
+    def export(self, spans: List[Dict[str, Any]]):
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(to_otlp(spans, self.service_name)).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+            response.read()
+
+    def shutdown(self):
+        pass
+
+
+class InMemorySpanExporter:
+    """Keeps exported spans in a list, for benchmarks and interactive debugging."""
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, spans: List[Dict[str, Any]]):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        pass
+
+
+class BatchSpanProcessor:
+    """
+    Hands finished spans to the exporter from a background thread, so ending a span costs one deque append.
+    When the queue is full (exporter down or too slow) new spans are dropped and counted instead of blocking.
+    """
+
+    def __init__(self, exporter, max_queue_size: int = 20_000, max_batch_size: int = 512, flush_interval_s: float = 1.0):
+        self.exporter = exporter
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.flush_interval_s = flush_interval_s
+        self.exported = 0
+        self.dropped = 0
+        self.failed_exports = 0
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._export_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span):
+        if len(self._queue) >= self.max_queue_size:
+            self.dropped += 1
+            return
+        self._queue.append(span)
+        if len(self._queue) >= self.max_batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Exports every queued span now."""
+        with self._export_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.max_batch_size:
+                    batch.append(self._queue.popleft().to_dict())
+                try:
+                    self.exporter.export(batch)
+                    self.exported += len(batch)
+                except Exception as e:
+                    self.failed_exports += 1
+                    self.dropped += len(batch)
+                    logger.warning(f"Span export failed, dropped {len(batch)} spans: {e}")
+
+    def shutdown(self):
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self.exporter.shutdown()
+
+
+class Tracer:
+    """
+    Creates hierarchical spans. The parent comes from the current span (a ContextVar, so it follows asyncio
+    tasks, and threads started with contextvars.copy_context()). Sampling is decided once per trace at its root
+    with probability `sample_rate`, and children follow the root, so a trace is either complete or absent.
+    A tracer without a processor is disabled and hands out a shared no-op span.
+    """
+
+    def __init__(self, processor: Optional[BatchSpanProcessor] = None, sample_rate: float = 1.0):
+        self.processor = processor
+        self.sample_rate = sample_rate if processor is not None else 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    @classmethod
+    def from_config(cls, config) -> "Tracer":
+        if not config.tracing_enabled:
+            return cls()
+        if config.tracing_exporter == "otlp":
+            exporter = OtlpHttpSpanExporter(config.tracing_otlp_endpoint)
+        else:
+            exporter = JsonlSpanExporter(config.tracing_jsonl_path)
+        return cls(BatchSpanProcessor(exporter), sample_rate=config.tracing_sample_rate)
+
+    def start_span(self, name: str, kind: str = INTERNAL, attributes: Optional[Dict[str, Any]] = None,
+                   parent: Any = None, start_ns: Optional[int] = None):
+        """A span under `parent` (default: the current span) that is not made current; end it with `end()`."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        parent = parent if parent is not None else _current_span.get()
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return NonRecordingSpan(carries_context=True)
+            return Span(self, name, kind, _new_id(128), None, attributes, start_ns)
+        if not parent.sampled:
+            return _NOOP_SPAN
+        return Span(self, name, kind, parent.trace_id, parent.span_id, attributes, start_ns)
+
+    def span(self, name: str, kind: str = INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        """A span under the current span, made current for the `with` block it is used in."""
+        return self.start_span(name, kind, attributes)
+
+    def record(self, name: str, start_ns: int, end_ns: int, kind: str = INTERNAL,
+               attributes: Optional[Dict[str, Any]] = None, parent: Any = None):
+        """Records an operation that has already finished, for frameworks that only report completions."""
+        span = self.start_span(name, kind, attributes, parent=parent, start_ns=start_ns)
+        span.end(end_ns)
+        return span
+
+    def stats(self) -> Dict[str, Any]:
+        if self.processor is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "sample_rate": self.sample_rate,
+            "exported": self.processor.exported,
+            "dropped": self.processor.dropped,
+            "failed_exports": self.processor.failed_exports,
+            "queued": len(self.processor._queue),
+        }
+
+    def flush(self):
+        if self.processor is not None:
+            self.processor.flush()
+
+    def shutdown(self):
+        if self.processor is not None:
+            self.processor.shutdown()
+
+
+def current_span():
+    """The current span, or None outside any traced operation."""
+    return _current_span.get()
+
+
+def traced(name: Optional[str] = None, kind: str = INTERNAL):
+    """Decorator that runs a sync or async function inside a span named after it."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().span(span_name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class LangChainTracingHandler(BaseCallbackHandler):
+    """
+    Turns LangChain callbacks into spans: every chain step (LangGraph nodes, RunnableParallel branches,
+    prompt/model/parser steps), chat model call and tool call. Runs are linked by their run ids, and a root
+    run is parented to the current span. Runs LangGraph tags as hidden (channel writes) are skipped.
+    """
+    run_inline = True
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        # run id -> (span, owned); hidden runs map to their parent's span so their children attach to it
+        self._runs: Dict[UUID, Any] = {}
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: str, tags: Optional[List[str]],
+               attributes: Optional[Dict[str, Any]] = None):
+        parent = self._runs.get(parent_run_id, (None, False))[0] if parent_run_id else None
+        if parent is None:
+            parent = _current_span.get()
+        # Hidden runs, and runnables that only wrap a step of the same name (a LangGraph node around its
+        # RunnableLambda), are folded into their parent's span
+        if (tags and "langsmith:hidden" in tags) or (parent is not None and parent.sampled and parent.name == name):
+            self._runs[run_id] = (parent, False)
+            return
+        self._runs[run_id] = (self.tracer.start_span(name, kind, attributes, parent=parent), True)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, attributes: Optional[Dict[str, Any]] = None):
+        span, owned = self._runs.pop(run_id, (None, False))
+        if not owned:
+            return
+        if error is not None:
+            span.record_error(error)
+        for key, value in (attributes or {}).items():
+            span.set_attribute(key, value)
+        span.end()
+
+    @staticmethod
+    def _name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any], default: str) -> str:
+        return kwargs.get("name") or (serialized or {}).get("name") or ((serialized or {}).get("id") or [default])[-1]
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        attributes = {"langgraph.step": metadata["langgraph_step"]} if metadata and "langgraph_step" in metadata else None
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chain"), CHAIN, tags, attributes)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name")
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chat_model"), LLM, tags, {"model": model} if model else None)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "llm"), LLM, tags)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        self._end(run_id, attributes={"tokens": usage["total_tokens"]} if usage.get("total_tokens") else None)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "tool"), TOOL, tags)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer(config=None) -> Tracer:
+    """
+    The process-wide tracer (see Config.tracing_*). When enabled, a LangChainTracingHandler is registered as a
+    LangChain configure hook, so every LangChain and LangGraph run in the process is traced without passing callbacks.
+    """
+    global _tracer
+    if _tracer is not None:
+        return _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            if config is None:
+                from config.config import get_config
+                config = get_config()
+            tracer = Tracer.from_config(config)
+            if tracer.enabled:
+                from langchain_core.tracers.context import register_configure_hook
+                register_configure_hook(ContextVar("tracing_callback_handler", default=LangChainTracingHandler(tracer)), inheritable=True)
+                atexit.register(tracer.shutdown)
+                logger.info(f"Tracing enabled: {config.tracing_exporter} exporter, sample rate {tracer.sample_rate}.")
+            _tracer = tracer
+        return _tracer
+
+
+def summarize(spans: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per span name: count, errors and mean/p95/max/total duration in ms, slowest total first."""
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for span in spans:
+        durations.setdefault(span["name"], []).append(span["duration_ms"])
+        errors[span["name"]] = errors.get(span["name"], 0) + (span["status"] == "error")
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append({
+            "name": name,
+            "count": len(values),
+            "errors": errors[name],
+            "mean_ms": round(sum(values) / len(values), 3),
+            "p95_ms": values[min(len(values) - 1, int(0.95 * len(values)))],
+            "max_ms": values[-1],
+            "total_ms": round(sum(values), 3),
+        })
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def run_collector(output_path: str, host: str = "127.0.0.1", port: int = 4318):
+    """A stand-in OTLP/HTTP collector: accepts OTLP/JSON on /v1/traces and appends the spans to a JSONL file."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    exporter = JsonlSpanExporter(output_path)
+    lock = threading.Lock()
+
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_error(404)
+                return
+            try:
+                spans = from_otlp(json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0))))
+            except Exception as e:
+                self.send_error(400, str(e))
+                return
+            with lock:
+                exporter.export(spans)
+            body = b"{}"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), CollectorHandler)
+    logger.info(f"OTLP collector stand-in listening on http://{host}:{server.server_port}/v1/traces, writing {output_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def benchmark_overhead(iterations: int = 100_000) -> Dict[str, Any]:
+    """Microseconds per three-level span tree (root, child, grandchild) when disabled, sampled out and sampled."""
+    report = {}
+    setups = {
+        "disabled": lambda: Tracer(),
+        "sampled_1pct": lambda: Tracer(BatchSpanProcessor(InMemorySpanExporter(), max_queue_size=10 ** 9), sample_rate=0.01),
+        "sampled_100pct": lambda: Tracer(BatchSpanProcessor(InMemorySpanExporter(), max_queue_size=10 ** 9), sample_rate=1.0),
+    }
+    for label, make_tracer in setups.items():
+        tracer = make_tracer()
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            with tracer.span("root", SERVER):
+                with tracer.span("child", CHAIN):
+                    with tracer.span("grandchild", LLM):
+                        pass
+        elapsed = time.perf_counter() - started_at
+        tracer.shutdown()
+        report[label] = {"us_per_trace": round(elapsed / iterations * 1e6, 3)}
+    return report
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tracing utilities.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    collect = commands.add_parser("collect", help="Run a stand-in OTLP/HTTP collector that writes spans to JSONL")
+    collect.add_argument("--output", default="traces.jsonl")
+    collect.add_argument("--host", default="127.0.0.1")
+    collect.add_argument("--port", type=int, default=4318)
+    summary = commands.add_parser("summarize", help="Where the time went: per-span-name durations from a JSONL trace file")
+    summary.add_argument("path")
+    summary.add_argument("--trace-id", help="Only this trace")
+    commands.add_parser("benchmark", help="Measure per-span overhead")
+    args = parser.parse_args()
+
+    if args.command == "collect":
+        run_collector(args.output, args.host, args.port)
+    elif args.command == "summarize":
+        with open(args.path, "r", encoding="utf-8") as f:
+            spans = [json.loads(line) for line in f if line.strip()]
+        if args.trace_id:
+            spans = [span for span in spans if span["trace_id"] == args.trace_id]
+        for row in summarize(spans):
+            print(json.dumps(row))
+    else:
+        print(json.dumps(benchmark_overhead(), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,89 @@
+"""
+Author: SURYA DEEP SINGH
+File Name: utils/workflow_factory.py
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+WorkflowHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+# Workflow name -> fields every request record must carry
+WORKFLOW_FIELDS = {
+    "ecommerce": ("order_id", "items", "customer_info"),
+    "legal": ("document",),
+    "research": ("query",),
+    "financial": ("name", "financials"),
+    "content": ("topic",),
+}
+
+
+def create_workflow(name: str, config: Config, mock_model: Optional[BaseChatModel] = None) -> Tuple[Any, WorkflowHandler]:
+    """
+    Creates one framework and returns (instance, async handler taking a request record). Frameworks are
+    imported lazily, so a missing optional dependency only affects its own workflow. Raises RuntimeError
+    when the framework cannot be set up. With `mock_model`, LangGraph and LangChain run against it; the
+    other frameworks need watsonx and are rejected.
+    """
+    if name not in WORKFLOW_FIELDS:
+        raise ValueError(f"Unknown workflow '{name}', expected one of: {', '.join(WORKFLOW_FIELDS)}")
+    if mock_model is not None and name in ("research", "financial", "content"):
+        raise RuntimeError(f"The {name} workflow has no mock LLM mode")
+
+    if name == "ecommerce":
+        from frameworks.langgraph_ecommerce_workflow import LangGraphEcommerceWorkflow, get_test_inventory
+        # Mock runs use the sample catalogue with effectively unlimited stock, as the order intake CLI does
+        inventory = get_test_inventory(stock_level=1_000_000) if mock_model is not None else None
+        workflow = LangGraphEcommerceWorkflow(config, chat_model=mock_model, inventory=inventory, result_detail_level="standard")
+
+        async def handle(record):
+            record = dict(record)
+            detail_level = record.pop("detail_level", None)
+            return await workflow.aprocess_order(record, detail_level=detail_level)
+        instance = workflow if workflow.compiled_graph else None
+
+    elif name == "legal":
+        from frameworks.langchain_legal_analysis import LangChainLegalWorkflow
+        workflow = LangChainLegalWorkflow(config, chat_model=mock_model)
+
+        async def handle(record):
+            return await workflow.aanalyze_legal_document(record["document"])
+        instance = workflow if workflow.full_workflow else None
+
+    elif name == "research":
+        from frameworks.beeai_research_assistant import BeeAIResearchAssistant
+        assistant = BeeAIResearchAssistant(config)
+
+        async def handle(record):
+            return await assistant.get_research_answer(record["query"])
+        instance = assistant if assistant.agent else None
+
+    elif name == "financial":
+        from frameworks.autogen_financial_analysis import AutoGenFinancialAnalyzer
+        analyzer = AutoGenFinancialAnalyzer(config)
+
+        async def handle(record):
+            return await analyzer.analyze_stock_performance(record)
+        instance = analyzer if analyzer.watsonx_client else None
+
+    else:
+        from frameworks.crewai_content_creation import CrewAIContentCreation
+        crew = CrewAIContentCreation(config)
+
+        async def handle(record):
+            # CrewAI's kickoff is blocking, so it runs on the loop's default executor; to_thread carries the
+            # caller's context (trace span, deadline) into the worker thread
+            return await asyncio.to_thread(crew.generate_blog_post, record["topic"], int(record.get("word_count_target", 500)))
+        instance = crew if crew.llm else None
+
+    if instance is None:
+        raise RuntimeError(f"The {name} framework is not configured")
+    return instance, handle